@@ -0,0 +1,153 @@
+import sys
+import threading
+import time
+from collections.abc import Mapping
+
+from dateParsing import parse_published
+
+# Field order of the record, which is also the column order of the articles table
+FIELDS = ('link', 'title', 'category', 'source', 'published', 'published_ts', 'expires_at', 'story', 'shingles')
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def format_published(published_ts):
+    """Format epoch seconds as an RFC 2822 date in GMT, like email.utils.formatdate(usegmt=True) but faster."""
+    if published_ts is None:
+        return None
+    t = time.gmtime(published_ts)
+    return (f"{_DAYS[t.tm_wday]}, {t.tm_mday:02d} {_MONTHS[t.tm_mon - 1]} {t.tm_year} "
+            f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d} GMT")
+
+
+class Interner:
+    """
+    Maps strings repeated across many articles, like source and category names,
+    to small integer ids, so each name is held once however many articles use it.
+    """
+
+    def __init__(self):
+        self.ids = {}     # value -> id
+        self.values = []  # id -> value
+        self._lock = threading.Lock()
+
+    def id_of(self, value):
+        """Return the id of a value, assigning the next one if it is new (None stays None)."""
+        if value is None:
+            return None
+        value_id = self.ids.get(value)
+        if value_id is None:
+            with self._lock:
+                value_id = self.ids.get(value)
+                if value_id is None:
+                    value_id = self.ids[value] = len(self.values)
+                    self.values.append(value)
+        return value_id
+
+    def value(self, value_id):
+        return None if value_id is None else self.values[value_id]
+
+    def __len__(self):
+        return len(self.values)
+
+
+# Shared by every record in the process
+SOURCES = Interner()
+CATEGORY_NAMES = Interner()
+
+
+class Article(Mapping):
+    """
+    Compact, slotted record of a classified article.
+
+    The source and category are interned ids, the publication date is kept only
+    as epoch seconds, and the link (and the story id, which is the link of the
+    story's first article) is an interned string shared with the story and
+    embedding indexes. Reads work like a read-only dict (article['title'],
+    article.get('category')), so code written for the old dict records keeps
+    working; to_dict() and to_row() convert it for JSON and the store.
+    """
+
+    __slots__ = ('link', 'title', 'source_id', 'category_id', 'published_ts', 'expires_at', 'story', 'shingles')
+
+    def __init__(self, link, title, source=None, category=None, published_ts=None, expires_at=None,
+                 story=None, shingles=None):
+        self.link = sys.intern(link)
+        self.title = title
+        self.source_id = SOURCES.id_of(source)
+        self.category_id = CATEGORY_NAMES.id_of(category)
+        self.published_ts = published_ts
+        self.expires_at = expires_at
+        self.story = None if story is None else sys.intern(story)
+        self.shingles = shingles
+
+    @classmethod
+    def from_dict(cls, article):
+        """
+        Builds a record from a dict article, as found in JSON files or produced by parse_feed.
+
+        Args:
+            article (dict): Article with 'link' and 'title', and optionally the other FIELDS.
+                'published_ts' is parsed from 'published' when missing.
+
+        Returns:
+            Article: The record.
+        """
+        published_ts = article.get('published_ts')
+        if published_ts is None:
+            published_ts = parse_published(article.get('published'))
+        shingles = article.get('shingles')
+        if isinstance(shingles, str):
+            shingles = bytes.fromhex(shingles)
+        return cls(article['link'], article['title'], article.get('source'), article.get('category'),
+                   published_ts, article.get('expires_at'), article.get('story'), shingles)
+
+    @classmethod
+    def from_row(cls, row):
+        """Builds a record from a row of the articles table."""
+        return cls(row['link'], row['title'], row['source'], row['category'],
+                   row['published_ts'], row['expires_at'], row['story'], row['shingles'])
+
+    @property
+    def source(self):
+        return SOURCES.value(self.source_id)
+
+    @property
+    def category(self):
+        return CATEGORY_NAMES.value(self.category_id)
+
+    @category.setter
+    def category(self, category):
+        self.category_id = CATEGORY_NAMES.id_of(category)
+
+    @property
+    def published(self):
+        """The publication date as an RFC 2822 string, rebuilt from published_ts."""
+        return format_published(self.published_ts)
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __repr__(self):
+        return f"Article({self.link!r}, {self.title!r}, source={self.source!r}, category={self.category!r})"
+
+    def to_dict(self):
+        """Return the article as a plain dict, e.g. for JSON (the shingles hex-encoded)."""
+        article = dict(zip(FIELDS, self.to_row()))
+        if self.shingles is not None:
+            article['shingles'] = self.shingles.hex()
+        return article
+
+    def to_row(self):
+        """Return the article as a tuple of column values in FIELDS order, for the store."""
+        return (self.link, self.title, CATEGORY_NAMES.value(self.category_id), SOURCES.value(self.source_id),
+                format_published(self.published_ts), self.published_ts, self.expires_at, self.story, self.shingles)
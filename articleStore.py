@@ -0,0 +1,475 @@
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+from articleRecord import Article, FIELDS
+from metrics import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    link TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    category TEXT,
+    source TEXT,
+    published TEXT,
+    published_ts INTEGER,
+    expires_at INTEGER,
+    story TEXT,
+    shingles BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_articles_category ON articles (category);
+CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source);
+CREATE INDEX IF NOT EXISTS idx_articles_published_ts ON articles (published_ts);
+CREATE INDEX IF NOT EXISTS idx_articles_expires_at ON articles (expires_at);
+CREATE INDEX IF NOT EXISTS idx_articles_story ON articles (story);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS score_labels (
+    position INTEGER PRIMARY KEY,
+    label TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS label_scores (
+    link TEXT PRIMARY KEY,
+    scores BLOB NOT NULL,
+    scorer TEXT
+);
+CREATE TRIGGER IF NOT EXISTS delete_label_scores AFTER DELETE ON articles BEGIN
+    DELETE FROM label_scores WHERE link = old.link;
+END;
+CREATE TABLE IF NOT EXISTS embedding_rows (
+    link TEXT PRIMARY KEY,
+    row INTEGER UNIQUE NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS delete_embedding_rows AFTER DELETE ON articles BEGIN
+    DELETE FROM embedding_rows WHERE link = old.link;
+END;
+"""
+
+# Stored in the order of the Article record's fields, so Article.to_row() is a ready row
+COLUMNS = FIELDS
+
+# Columns added after the first release, by table, with their types, for upgrading old databases
+# (databases from before the MinHash story index keep an unused simhash column)
+ADDED_COLUMNS = {
+    'articles': {'expires_at': 'INTEGER', 'story': 'TEXT', 'shingles': 'BLOB'},
+    'label_scores': {'scorer': 'TEXT'},
+}
+
+UPSERT = (
+    f"INSERT INTO articles ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)}) "
+    f"ON CONFLICT(link) DO UPDATE SET {', '.join(f'{c}=excluded.{c}' for c in COLUMNS[1:])}"
+)
+
+
+class ArticleStore:
+    """
+    SQLite storage for classified articles. Writes are buffered and committed in one
+    transaction by flush(), and the database runs in WAL mode so readers (the GUI)
+    are not blocked while ingestion writes.
+    """
+
+    def __init__(self, db_path="articles.db"):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._upgrade_schema()
+        self._conn.executescript(SCHEMA)
+        self._pending = {}
+        self._pending_scores = {}
+        self._lock = threading.RLock()
+
+    def _upgrade_schema(self):
+        # Databases created before some columns existed
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if existing:
+                for column, column_type in columns.items():
+                    if column not in existing:
+                        self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    def _row_to_article(self, row):
+        return Article.from_row(row)
+
+    def put(self, article):
+        """
+        Buffers an article for the next flush().
+
+        Args:
+            article (Article or dict): Article with 'link', 'title', 'category', 'source', 'published'
+                and, optionally, 'published_ts' and 'expires_at' (epoch seconds).
+        """
+        if not isinstance(article, Article):
+            article = Article.from_dict(article)
+        with self._lock:
+            self._pending[article.link] = article
+
+    def flush(self):
+        """
+        Writes all buffered articles in a single transaction.
+
+        Returns:
+            int: The number of articles written.
+        """
+        with self._lock:
+            if not self._pending and not self._pending_scores:
+                return 0
+            start = time.perf_counter()
+            rows = [article.to_row() for article in self._pending.values()]
+            with self._transaction():
+                self._conn.executemany(UPSERT, rows)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO label_scores (link, scores, scorer) VALUES (?, ?, ?)",
+                    [(link, scores, scorer) for link, (scores, scorer) in self._pending_scores.items()],
+                )
+            metrics.observe("news_store_flush_seconds", time.perf_counter() - start)
+            metrics.inc("news_store_rows_written_total", len(rows))
+            self._pending.clear()
+            self._pending_scores.clear()
+            return len(rows)
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def get(self, link):
+        with self._lock:
+            if link in self._pending:
+                return self._pending[link]
+            row = self._conn.execute("SELECT * FROM articles WHERE link = ?", (link,)).fetchone()
+        return self._row_to_article(row) if row else None
+
+    def contains(self, link):
+        with self._lock:
+            if link in self._pending:
+                return True
+            return self._conn.execute("SELECT 1 FROM articles WHERE link = ?", (link,)).fetchone() is not None
+
+    def delete(self, links):
+        """
+        Deletes articles in a single transaction.
+
+        Args:
+            links (iterable): Links of the articles to delete.
+
+        Returns:
+            int: The number of rows removed from the database.
+        """
+        links = list(links)
+        with self._lock:
+            for link in links:
+                self._pending.pop(link, None)
+                self._pending_scores.pop(link, None)
+            with self._transaction():
+                cursor = self._conn.executemany("DELETE FROM articles WHERE link = ?", [(link,) for link in links])
+            return cursor.rowcount
+
+    def set_expiry(self, expression, params, only_missing=False, links=None):
+        """
+        Recomputes the expires_at column from an SQL expression over the row.
+
+        Args:
+            expression (str): SQL expression giving the expiry epoch.
+            params (list): Parameters of the expression.
+            only_missing (bool): Only fill rows that have no expiry time yet.
+            links (list): Only recompute these articles, e.g. ones whose category changed.
+        """
+        query = f"UPDATE articles SET expires_at = {expression} WHERE published_ts IS NOT NULL"
+        if only_missing:
+            query += " AND expires_at IS NULL"
+        with self._lock:
+            self.flush()
+            with self._transaction():
+                if links is None:
+                    self._conn.execute(query, params)
+                else:
+                    self._conn.executemany(query + " AND link = ?", [(*params, link) for link in links])
+
+    def delete_expired(self, now):
+        """
+        Deletes every article whose expiry time has passed, walking the expires_at index.
+
+        Args:
+            now (int): Epoch seconds.
+
+        Returns:
+            list: Links of the removed articles.
+        """
+        with self._lock:
+            self.flush()
+            with self._transaction():
+                links = [row[0] for row in self._conn.execute(
+                    "SELECT link FROM articles WHERE expires_at <= ?", (now,))]
+                self._conn.execute("DELETE FROM articles WHERE expires_at <= ?", (now,))
+            return links
+
+    def next_expiry(self):
+        with self._lock:
+            self.flush()
+            return self._conn.execute("SELECT MIN(expires_at) FROM articles").fetchone()[0]
+
+    def count(self):
+        with self._lock:
+            self.flush()
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def links(self):
+        with self._lock:
+            self.flush()
+            return [row[0] for row in self._conn.execute("SELECT link FROM articles")]
+
+    def iter_articles(self, category=None, source=None):
+        """
+        Yields stored articles, optionally filtered by category or source, newest first.
+
+        Args:
+            category (str): Only return articles in this category.
+            source (str): Only return articles from this source.
+
+        Yields:
+            dict: The stored article.
+        """
+        query = "SELECT * FROM articles"
+        conditions = []
+        params = []
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if source is not None:
+            conditions.append("source = ?")
+            params.append(source)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY published_ts DESC"
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(query, params).fetchall()
+        for row in rows:
+            yield self._row_to_article(row)
+
+    def iter_shingles(self):
+        """
+        Yields what the story index needs for every stored article.
+
+        Yields:
+            tuple: Link, title, story id and packed title shingles (None if not computed yet).
+        """
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute("SELECT link, title, story, shingles FROM articles").fetchall()
+        for row in rows:
+            yield tuple(row)
+
+    def put_scores(self, link, scores, scorer=None):
+        """
+        Buffers an article's packed label score vector for the next flush().
+
+        Args:
+            link (str): The article link.
+            scores (bytes): The packed score vector (see labelScores).
+            scorer (str): The model the scores came from, None if unknown.
+        """
+        with self._lock:
+            self._pending_scores[link] = (scores, scorer)
+
+    def get_scores(self, link):
+        """Return an article's packed score vector and its scorer, or (None, None)."""
+        with self._lock:
+            if link in self._pending_scores:
+                return self._pending_scores[link]
+            row = self._conn.execute("SELECT scores, scorer FROM label_scores WHERE link = ?", (link,)).fetchone()
+        return tuple(row) if row else (None, None)
+
+    def iter_scores(self):
+        """
+        Yields every stored article with its packed score vector.
+
+        Yields:
+            tuple: Link, title, packed scores and their scorer (both None if the article has none).
+        """
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                "SELECT articles.link, articles.title, label_scores.scores, label_scores.scorer FROM articles "
+                "LEFT JOIN label_scores ON label_scores.link = articles.link").fetchall()
+        for row in rows:
+            yield tuple(row)
+
+    def score_labels(self):
+        """Return the labels of the score vectors, in vector position order."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT label FROM score_labels ORDER BY position")]
+
+    def add_score_labels(self, labels):
+        """Append labels to the end of the score vectors."""
+        with self._lock:
+            with self._transaction():
+                for label in labels:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO score_labels (position, label) "
+                        "VALUES ((SELECT COUNT(*) FROM score_labels), ?)", (label,))
+
+    def embedding_rows(self):
+        """Return each embedded article's row in the embedding matrix (see embeddingIndex)."""
+        with self._lock:
+            return {sys.intern(link): row for link, row in self._conn.execute("SELECT link, row FROM embedding_rows")}
+
+    def set_embedding_rows(self, rows):
+        """
+        Records the embedding matrix rows of articles in a single transaction.
+
+        Args:
+            rows (dict): Link mapped to its row.
+        """
+        with self._lock:
+            with self._transaction():
+                self._conn.executemany("DELETE FROM embedding_rows WHERE row = ?", [(row,) for row in rows.values()])
+                self._conn.executemany("INSERT OR REPLACE INTO embedding_rows (link, row) VALUES (?, ?)", rows.items())
+
+    def clear_embedding_rows(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embedding_rows")
+
+    def iter_unembedded(self):
+        """
+        Yields the stored articles that have no embedding yet.
+
+        Yields:
+            tuple: Link and title.
+        """
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                "SELECT articles.link, articles.title FROM articles "
+                "LEFT JOIN embedding_rows ON embedding_rows.link = articles.link "
+                "WHERE embedding_rows.link IS NULL").fetchall()
+        for row in rows:
+            yield tuple(row)
+
+    def update_categories(self, categories):
+        """
+        Changes the category of many articles in a single transaction.
+
+        Args:
+            categories (dict): Link mapped to its new category.
+
+        Returns:
+            list: Links of the stored articles whose category changed.
+        """
+        with self._lock:
+            self.flush()
+            current = dict(self._conn.execute("SELECT link, category FROM articles"))
+            changed = [(category, link) for link, category in categories.items()
+                       if link in current and current[link] != category]
+            with self._transaction():
+                self._conn.executemany("UPDATE articles SET category = ? WHERE link = ?", changed)
+        return [link for _, link in changed]
+
+    def set_shingles(self, shingle_sets):
+        """
+        Stores the title shingles of many articles in a single transaction, e.g. to
+        backfill articles stored before they were computed.
+
+        Args:
+            shingle_sets (dict): Link mapped to its packed title shingles.
+        """
+        with self._lock:
+            self.flush()
+            with self._transaction():
+                self._conn.executemany(
+                    "UPDATE articles SET shingles = ? WHERE link = ?",
+                    [(shingle_set, link) for link, shingle_set in shingle_sets.items()],
+                )
+
+    def get_meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def migrate_from_json(self, file_path, published_ts):
+        """
+        One-shot import of a classified articles JSON file into the database.
+
+        Args:
+            file_path (str): The old classified articles JSON file.
+            published_ts (callable): Turns a published date string into epoch seconds.
+
+        Returns:
+            int: The number of articles imported (0 if already migrated or no file).
+        """
+        if self.get_meta('migrated_from_json'):
+            return 0
+        try:
+            with open(file_path, "r") as file:
+                content = file.read().strip()
+        except FileNotFoundError:
+            content = ""
+        articles = json.loads(content).get("articles", {}) if content else {}
+        for link, article in articles.items():
+            article = dict(article, link=article.get('link', link))
+            article['published_ts'] = published_ts(article.get('published'))
+            self.put(Article.from_dict(article))
+        imported = self.flush()
+        self.set_meta('migrated_from_json', file_path)
+        return imported
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+class ArticleMap(MutableMapping):
+    """
+    Dict-like view of the store keyed by link, standing in for the old
+    in-memory `articles_with_categories` dict.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, link):
+        article = self.store.get(link)
+        if article is None:
+            raise KeyError(link)
+        return article
+
+    def __setitem__(self, link, article):
+        if not isinstance(article, Article):
+            article = Article.from_dict(article if article.get('link') == link else dict(article, link=link))
+        elif article.link != link:
+            article = Article.from_dict(dict(article, link=link))
+        self.store.put(article)
+
+    def __delitem__(self, link):
+        if not self.store.contains(link):
+            raise KeyError(link)
+        self.store.delete([link])
+
+    def __contains__(self, link):
+        return self.store.contains(link)
+
+    def __iter__(self):
+        return iter(self.store.links())
+
+    def __len__(self):
+        return self.store.count()
+
+    def values(self):
+        return list(self.store.iter_articles())
@@ -1,46 +1,155 @@
-import requests
-from bs4 import BeautifulSoup
 import tkinter as tk
 from tkinter import scrolledtext
 from xml.etree import ElementTree as ET
+from html import escape
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import queue
 import re
+import threading
+from pageCache import get_page_cache
+
+try:
+    import lxml.etree  # Optional: C parser, much faster than html.parser
+except ImportError:
+    lxml = None
 
-# Function to fetch the RSS feed and parse articles
 rss_feed_url = 'http://feeds.bbci.co.uk/news/rss.xml'
-response = requests.get(rss_feed_url)
 
-tree = ET.ElementTree(ET.fromstring(response.text))
-root = tree.getroot()
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
 
-# BBC RSS items are under 'channel' > 'item'
-items = root.find('channel').findall('item')
+# Function to fetch the RSS feed and parse articles
+def fetch_rss_items(url=rss_feed_url):
+    response = get_page_cache().session.get(url, timeout=30)
+    response.raise_for_status()
+    root = ET.fromstring(response.content)
 
-def extract_article_details(article_url):
-    article_response = requests.get(article_url)
-    article_soup = BeautifulSoup(article_response.text, 'html.parser')
+    # BBC RSS items are under 'channel' > 'item'
+    return [{'title': item.findtext('title', ''), 'link': item.findtext('link', ''), 'date': item.findtext('pubDate', '')}
+            for item in root.find('channel').findall('item')]
+
+class ArticleDetailsCollector:
+    """
+    Collects everything extract_article_details needs in one pass over a page's
+    parse events: the first h1, the author and date meta tags, the text of every
+    paragraph and the story-body__inner section. Works as an lxml parser target,
+    and is driven by html.parser when lxml isn't installed.
+    """
+
+    def __init__(self):
+        self.headline = None
+        self.author = None
+        self.date = None
+        self.paragraphs = []
+        self.background_context = None
+        self._h1 = None          # Text parts of the first h1 while inside it
+        self._paragraph = None   # Text parts of the current paragraph
+        self._section = None     # Markup parts of the story-body__inner section
+        self._section_depth = 0
+
+    def start(self, tag, attrib):
+        tag = tag.lower()
+        attrib = dict(attrib)
+        if self._section is not None:
+            self._section_depth += tag not in VOID_TAGS
+            attributes = ''.join(f' {name}="{escape(value or "")}"' for name, value in attrib.items())
+            self._section.append(f"<{tag}{attributes}/>" if tag in VOID_TAGS else f"<{tag}{attributes}>")
+        elif tag == 'section' and 'story-body__inner' in (attrib.get('class') or '').split() and self.background_context is None:
+            self._section = [f'<section class="{escape(attrib["class"])}">']
+            self._section_depth = 1
+        if tag == 'h1' and self.headline is None:
+            self._h1 = []
+        elif tag == 'p':
+            self._paragraph = []
+        elif tag == 'meta':
+            name = attrib.get('name')
+            if name == 'author' and self.author is None:
+                self.author = attrib.get('content')
+            elif name == 'date' and self.date is None:
+                self.date = attrib.get('content')
+
+    def end(self, tag):
+        tag = tag.lower()
+        if self._section is not None and tag not in VOID_TAGS:
+            self._section.append(f"</{tag}>")
+            self._section_depth -= 1
+            if self._section_depth == 0:
+                self.background_context = ''.join(self._section)
+                self._section = None
+        if tag == 'h1' and self._h1 is not None:
+            self.headline = ''.join(self._h1)
+            self._h1 = None
+        elif tag == 'p' and self._paragraph is not None:
+            self.paragraphs.append(''.join(self._paragraph))
+            self._paragraph = None
+
+    def data(self, text):
+        if self._h1 is not None:
+            self._h1.append(text)
+        if self._paragraph is not None:
+            self._paragraph.append(text)
+        if self._section is not None:
+            self._section.append(escape(text, quote=False))
+
+    def close(self):
+        return self
+
+class _StdlibDriver(HTMLParser):
+    # Feeds html.parser events to a collector
+    def __init__(self, collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, attrs)
+        if tag in VOID_TAGS:
+            self.collector.end(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, attrs)
+        self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in VOID_TAGS:
+            self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+def collect_article_details(body):
+    collector = ArticleDetailsCollector()
+    if lxml is not None:
+        parser = lxml.etree.HTMLParser(target=collector)
+        lxml.etree.fromstring(body, parser)
+    else:
+        from bs4 import UnicodeDammit
+        driver = _StdlibDriver(collector)
+        driver.feed(UnicodeDammit(body, is_html=True).unicode_markup)
+        driver.close()
+    return collector
+
+def parse_article_details(body, article_url):
+    page = collect_article_details(body)
 
     article_details = {}
 
-    article_details['headline'] = article_soup.find('h1').text.strip() if article_soup.find('h1') else 'No headline found'
-    source = article_soup.find('meta', attrs={'name': 'author'})
-    article_details['author'] = source['content'] if source else 'Unknown author'
+    article_details['headline'] = page.headline.strip() if page.headline is not None else 'No headline found'
+    article_details['author'] = page.author if page.author is not None else 'Unknown author'
     article_details['source'] = 'BBC News'
 
-    date_time = article_soup.find('meta', attrs={'name': 'date'})
-    article_details['date'] = date_time['content'] if date_time else 'Unknown date'
+    article_details['date'] = page.date if page.date is not None else 'Unknown date'
 
-    article_details['main_event'] = article_soup.find('p').text.strip() if article_soup.find('p') else 'No main event found'
+    article_details['main_event'] = page.paragraphs[0].strip() if page.paragraphs else 'No main event found'
 
     # Extracting and splitting the key facts into separate sentences
-    facts_paragraphs = article_soup.find_all('p')
     key_facts = []
-    for fact in facts_paragraphs:
-        sentences = re.split(r'(?<=\.)\s', fact.text.strip())  # Split by period followed by space
+    for fact in page.paragraphs:
+        sentences = re.split(r'(?<=\.)\s', fact.strip())  # Split by period followed by space
         key_facts.extend([sentence.strip() for sentence in sentences if sentence.strip()])  # Clean and add non-empty sentences
 
     article_details['key_facts'] = key_facts
 
-    article_details['background_context'] = article_soup.find('section', class_='story-body__inner') or 'No background context available'
+    article_details['background_context'] = page.background_context or 'No background context available'
 
     if any(word in article_details['headline'].lower() for word in ['shocking', 'dramatic', 'unprecedented']):
         article_details['emotional_tone'] = 'Sensational'
@@ -52,6 +161,25 @@ def extract_article_details(article_url):
 
     return article_details
 
+def extract_article_details(article_url):
+    # Downloaded through the shared page cache, and parsed once per version of the page
+    return get_page_cache().extract(article_url, parse_article_details, name="bbc-news-scraper.article_details")
+
+# Function to extract every article of the feed concurrently
+def extract_all_article_details(urls, workers=8, on_result=None):
+    details = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(extract_article_details, url): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                details[url] = future.result()
+            except Exception as e:
+                details[url] = {'error': f"Error extracting the article: {e}"}
+            if on_result is not None:
+                on_result(url, details[url])
+    return details
+
 # GUI Setup
 class NewsApp:
     def __init__(self, root):
@@ -59,6 +187,11 @@ class NewsApp:
         self.root.title("BBC News Article Details")
         self.root.geometry("800x600")
 
+        # Details of every feed article, keyed by URL, filled in by the background extraction
+        self.details = {}
+        self.items = []
+        self.results = queue.Queue()
+
         self.label = tk.Label(root, text="Enter the article URL:", font=("Arial", 14))
         self.label.pack(pady=10)
 
@@ -68,27 +201,91 @@ class NewsApp:
         self.fetch_button = tk.Button(root, text="Fetch Article Details", command=self.display_article_details, font=("Arial", 14))
         self.fetch_button.pack(pady=10)
 
+        self.status_label = tk.Label(root, text="Loading the BBC News feed...", font=("Arial", 10))
+        self.status_label.pack()
+
+        # Articles of the feed; selecting one shows its details
+        self.article_list = tk.Listbox(root, width=80, height=8, font=("Arial", 12))
+        self.article_list.pack(pady=5)
+        self.article_list.bind('<<ListboxSelect>>', self.select_article)
+
         self.text_area = scrolledtext.ScrolledText(root, width=80, height=20, font=("Arial", 12))
         self.text_area.pack(pady=20)
 
+        threading.Thread(target=self.extract_feed, name="bbc-extract", daemon=True).start()
+        self.root.after(100, self.poll_results)
+
+    def extract_feed(self):
+        # Runs on a background thread; results are handed to the Tk thread through the queue
+        try:
+            items = fetch_rss_items()
+        except Exception as e:
+            self.results.put(('error', f"Error fetching the feed: {e}"))
+            return
+        self.results.put(('items', items))
+        extract_all_article_details([item['link'] for item in items],
+                                    on_result=lambda url, details: self.results.put(('details', (url, details))))
+
+    def poll_results(self):
+        while True:
+            try:
+                kind, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'items':
+                self.items = value
+                for item in value:
+                    self.article_list.insert(tk.END, item['title'])
+            elif kind == 'details':
+                url, details = value
+                self.details[url] = details
+                if self.url_entry.get() == url:
+                    self.show_details(details)
+            else:
+                self.status_label.config(text=value)
+                continue
+            self.status_label.config(text=f"{len(self.details)} of {len(self.items)} articles ready")
+        self.root.after(100, self.poll_results)
+
+    def select_article(self, event):
+        selection = self.article_list.curselection()
+        if selection:
+            url = self.items[selection[0]]['link']
+            self.url_entry.delete(0, tk.END)
+            self.url_entry.insert(0, url)
+            self.display_article_details()
+
     def display_article_details(self):
         article_url = self.url_entry.get()
         if article_url:
-            article_data = extract_article_details(article_url)
-
-            # Display the results in the text area
-            self.text_area.delete(1.0, tk.END)  # Clear previous content
-            for key, value in article_data.items():
-                self.text_area.insert(tk.END, f"{key.capitalize()}: \n")
-                if isinstance(value, list):  # Key facts will be in a list
-                    for fact in value:
-                        self.text_area.insert(tk.END, f" - {fact}\n")
-                else:
-                    self.text_area.insert(tk.END, f"{value}\n\n")
-
-# Create the Tkinter window
-root = tk.Tk()
-app = NewsApp(root)
-
-# Run the GUI
-root.mainloop()
+            if article_url in self.details:
+                self.show_details(self.details[article_url])
+                return
+
+            # Not extracted yet: fetch it in the background and show it when it arrives
+            self.text_area.delete(1.0, tk.END)
+            self.text_area.insert(tk.END, "Fetching article details...")
+            threading.Thread(
+                target=lambda: extract_all_article_details(
+                    [article_url], workers=1, on_result=lambda url, details: self.results.put(('details', (url, details)))),
+                daemon=True,
+            ).start()
+
+    def show_details(self, article_data):
+        # Display the results in the text area
+        self.text_area.delete(1.0, tk.END)  # Clear previous content
+        for key, value in article_data.items():
+            self.text_area.insert(tk.END, f"{key.capitalize()}: \n")
+            if isinstance(value, list):  # Key facts will be in a list
+                for fact in value:
+                    self.text_area.insert(tk.END, f" - {fact}\n")
+            else:
+                self.text_area.insert(tk.END, f"{value}\n\n")
+
+if __name__ == "__main__":
+    # Create the Tkinter window
+    root = tk.Tk()
+    app = NewsApp(root)
+
+    # Run the GUI
+    root.mainloop()
@@ -0,0 +1,529 @@
+"""
+Offline benchmarks for each stage of the news pipeline.
+
+Feeds are served from recorded RSS fixtures by a local HTTP server, and the
+classifier can be a deterministic stub, so runs don't depend on the network or
+on model downloads. Results are written as JSON for comparing versions.
+
+    python benchmarks.py                      # all stages, stub classifier
+    python benchmarks.py --record             # re-record the fixtures from the live feeds first
+    python benchmarks.py --stages persist --sizes 1000 10000 100000
+    python benchmarks.py --classifier nli     # time the real zero-shot model
+    python benchmarks.py --stages parse       # streaming feed parser against feedparser
+    python benchmarks.py --stages memory --sizes 100000
+    python benchmarks.py --stages search --sizes 100000   # search box latency
+"""
+import argparse
+import contextlib
+import datetime
+import email.utils
+import functools
+import hashlib
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import requests
+
+import dateParsing
+import feedParsing
+from articleStore import COLUMNS
+from classifierBackends import load_labelled_examples, make_backend
+from newsScraper import NewsCategorizer, CATEGORIES, RSS_FEEDS
+from searchIndex import SearchIndex
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BASE_DIR, "benchmark_fixtures")
+STAGES = ("fetch", "parse", "classify", "persist", "memory", "search", "dates", "tree")
+
+
+class StubBackend:
+    """Deterministic stand-in for the classifier: scores come from a hash of the title."""
+
+    name = "stub"
+    models = ()
+
+    def __init__(self, labels):
+        self.labels = list(labels)
+        self.model_name = "stub"
+        self.scorer = "stub"
+
+    def classify(self, titles):
+        return self.score(titles, self.labels)
+
+    def score(self, titles, labels):
+        results = []
+        for title in titles:
+            scores = {label: hashlib.sha1(f"{label}:{title}".encode()).digest()[0] / 255 for label in labels}
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            results.append({'sequence': title, 'labels': ranked, 'scores': [scores[label] for label in ranked],
+                            'scorer': self.scorer})
+        return results
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def fixture_server(directory):
+    """Serves a directory over HTTP on a free local port, yielding the base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextlib.contextmanager
+def virtual_display():
+    """Makes a display available to Tk, starting Xvfb when there is none."""
+    if os.environ.get("DISPLAY") or platform.system() != "Linux":
+        yield
+        return
+    if shutil.which("Xvfb") is None:
+        raise RuntimeError("no display and Xvfb is not installed")
+    display = ":97"
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = display
+    try:
+        time.sleep(1.0)  # Give the server time to accept connections
+        yield
+    finally:
+        del os.environ["DISPLAY"]
+        process.terminate()
+        process.wait()
+
+
+@contextlib.contextmanager
+def scratch_directory():
+    """Runs the block in an empty working directory, so the store and caches start fresh."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="news-bench-") as directory:
+        os.chdir(directory)
+        try:
+            yield directory
+        finally:
+            os.chdir(previous)
+
+
+def record_fixtures(directory=FIXTURES_DIR, rss_urls=RSS_FEEDS):
+    """Downloads the live feeds once into the fixtures directory."""
+    os.makedirs(directory, exist_ok=True)
+    for i, url in enumerate(rss_urls):
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        with open(os.path.join(directory, f"feed{i}.xml"), "wb") as file:
+            file.write(response.content)
+        print(f"Recorded {url} ({len(response.content)} bytes).")
+
+
+def write_synthetic_fixtures(directory=FIXTURES_DIR, feeds=4, items=100):
+    """Writes RSS fixtures built from the titles in classified_articles.json, for when none were recorded."""
+    examples = load_labelled_examples(os.path.join(BASE_DIR, "classified_articles.json"))
+    titles = [title for category_titles in examples.values() for title in category_titles]
+    titles = titles or [f"Story number {i}" for i in range(items)]
+    now = time.time()
+    os.makedirs(directory, exist_ok=True)
+    for feed in range(feeds):
+        entries = []
+        for item in range(items):
+            title = titles[(feed * items + item) % len(titles)]
+            entries.append(
+                f"<item><title>{escape(title)}</title>"
+                f"<link>https://example.com/feed{feed}/{item}</link>"
+                f"<guid>https://example.com/feed{feed}/{item}</guid>"
+                f"<pubDate>{email.utils.formatdate(now - item * 600, usegmt=True)}</pubDate></item>"
+            )
+        with open(os.path.join(directory, f"feed{feed}.xml"), "w", encoding="utf-8") as file:
+            file.write('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+                       f"<title>Fixture Feed {feed}</title><link>https://example.com/</link>"
+                       f"{''.join(entries)}</channel></rss>")
+
+
+def fixture_names(directory=FIXTURES_DIR):
+    if not os.path.isdir(directory) or not any(name.endswith(".xml") for name in os.listdir(directory)):
+        write_synthetic_fixtures(directory)
+    return sorted(name for name in os.listdir(directory) if name.endswith(".xml"))
+
+
+def synthetic_articles(count, now=None):
+    """Returns `count` stored-article records spread over the last few days."""
+    now = int(now or time.time())
+    sources = ["BBC News", "CNN", "Al Jazeera", "Reuters"]
+    articles = []
+    for i in range(count):
+        published_ts = now - (i * 37) % (5 * 86400)
+        articles.append({
+            'title': f"Synthetic headline {i} about {CATEGORIES[i % len(CATEGORIES)].lower()}",
+            'category': CATEGORIES[i % len(CATEGORIES)],
+            'published': email.utils.formatdate(published_ts, usegmt=True),
+            'source': sources[i % len(sources)],
+            'link': f"https://example.com/article/{i}",
+            'published_ts': published_ts,
+        })
+    return articles
+
+
+def measure(run, repeat, setup=None):
+    """
+    Times `run` `repeat` times, calling `setup` (untimed) before each run.
+
+    Returns:
+        dict: Minimum, median and mean seconds, and the last value returned by `run`.
+    """
+    times = []
+    value = None
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        value = run(state) if setup else run()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'mean': statistics.mean(times), 'value': value}
+
+
+def result(stage, name, timing, items, **params):
+    return {
+        'stage': stage,
+        'name': name,
+        'params': params,
+        'items': items,
+        'seconds': {key: timing[key] for key in ('min', 'median', 'mean')},
+        'items_per_second': items / timing['min'] if timing['min'] else None,
+    }
+
+
+def bench_fetch(backend, repeat, sizes):
+    results = []
+    names = fixture_names()
+    with fixture_server(FIXTURES_DIR) as base_url, scratch_directory():
+        urls = [f"{base_url}/{name}" for name in names]
+        categorizer = NewsCategorizer(backend=backend, embedding_index=False)
+        try:
+            def cold():
+                categorizer.feed_cache.validators.clear()
+                return len(categorizer.fetch_feed(urls[0]))
+            timing = measure(cold, repeat)
+            results.append(result("fetch", "fetch_feed", timing, timing['value'], feed=names[0]))
+
+            # Second poll of an unchanged feed: answered by 304 / body hash, nothing parsed
+            categorizer.fetch_feed(urls[0])
+            timing = measure(lambda: categorizer.fetch_feed(urls[0]), repeat)
+            results.append(result("fetch", "fetch_feed_unchanged", timing, 1, feed=names[0]))
+
+            def all_feeds():
+                categorizer.feed_cache.validators.clear()
+                return len(categorizer.fetch_news(urls))
+            timing = measure(all_feeds, repeat)
+            results.append(result("fetch", "fetch_news", timing, timing['value'], feeds=len(urls)))
+        finally:
+            categorizer.close()
+    return results
+
+
+def bench_parse(backend, repeat, sizes):
+    results = []
+    for name in fixture_names():
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as file:
+            content = file.read()
+        base_url = f"https://example.com/{name}"
+
+        timing = measure(lambda: len(feedParsing.parse_with_feedparser(content, base_url)[1]), repeat)
+        expected = feedParsing.parse_with_feedparser(content, base_url)
+        results.append(result("parse", "feedparser", timing, timing['value'], feed=name))
+
+        try:
+            fast = feedParsing.parse_fast(content, base_url)
+        except (ElementTree.ParseError, feedParsing.UnsupportedFeed) as e:
+            print(f"{name} needs feedparser: {e}")
+            continue
+        timing = measure(lambda: len(feedParsing.parse_fast(content, base_url)[1]), repeat)
+        # Same titles and links as feedparser, so the two paths are interchangeable
+        matches = fast[0] == expected[0] and [(entry['title'], entry['link']) for entry in fast[1]] == \
+            [(entry['title'], entry['link']) for entry in expected[1]]
+        results.append(result("parse", "parse_fast", timing, timing['value'], feed=name, matches_feedparser=matches))
+
+        # A re-poll where everything is stored already stops after the first few entries
+        known = {entry['link'] for entry in fast[1]}
+        timing = measure(lambda: len(feedParsing.parse_fast(content, base_url, known.__contains__)[1]), repeat)
+        results.append(result("parse", "parse_fast_known", timing, len(fast[1]), feed=name))
+    return results
+
+
+def bench_classify(backend, repeat, sizes):
+    with fixture_server(FIXTURES_DIR) as base_url, scratch_directory():
+        categorizer = NewsCategorizer(backend=backend, embedding_index=False)
+        articles = categorizer.fetch_news([f"{base_url}/{name}" for name in fixture_names()])
+        categorizer.close()
+
+    def setup():
+        # Every run classifies the same articles into an empty store
+        stack = contextlib.ExitStack()
+        stack.enter_context(scratch_directory())
+        categorizer = NewsCategorizer(backend=backend, embedding_index=False)
+        stack.callback(categorizer.close)
+        return stack, categorizer
+
+    def run(state):
+        stack, categorizer = state
+        with stack:
+            return len(categorizer.categorise_articles_with_ai([dict(article) for article in articles]))
+
+    timing = measure(run, repeat, setup=setup)
+    return [result("classify", "categorise_articles_with_ai", timing, len(articles), backend=backend.model_name)]
+
+
+def bench_persist(backend, repeat, sizes):
+    results = []
+    for size in sizes:
+        articles = synthetic_articles(size)
+        with scratch_directory():
+            categorizer = NewsCategorizer(backend=backend, embedding_index=False)
+
+            def save():
+                for article in articles:
+                    categorizer.articles_with_categories[article['link']] = article
+                categorizer.save_classified_articles()
+            timing = measure(save, repeat)
+            results.append(result("persist", "save_classified_articles", timing, size, size=size))
+
+            timing = measure(categorizer.save_articles_to_json, repeat)
+            results.append(result("persist", "save_articles_to_json", timing, size, size=size))
+            categorizer.close()
+
+            def load():
+                reopened = NewsCategorizer(backend=backend, embedding_index=False)
+                count = len(reopened.articles_with_categories.values())
+                reopened.close()
+                return count
+            timing = measure(load, repeat)
+            results.append(result("persist", "load_classified_articles", timing, timing['value'], size=size))
+    return results
+
+
+def traced_bytes(build):
+    """Returns the memory still allocated by `build` when it returns, measured with tracemalloc, and its value."""
+    tracemalloc.start()
+    try:
+        value = build()
+        return tracemalloc.get_traced_memory()[0], value
+    finally:
+        tracemalloc.stop()
+
+
+def bench_memory(backend, repeat, sizes):
+    results = []
+    for size in sizes:
+        with scratch_directory():
+            categorizer = NewsCategorizer(backend=backend, embedding_index=False)
+            for article in synthetic_articles(size):
+                categorizer.articles_with_categories[article['link']] = article
+            categorizer.save_classified_articles()
+            db_path = categorizer.store.db_path
+
+            def dicts():
+                # The old layout: a dict per article keyed by link, and a set of the classified links
+                conn = sqlite3.connect(db_path)
+                conn.row_factory = sqlite3.Row
+                articles = {row['link']: {column: row[column] for column in COLUMNS}
+                            for row in conn.execute("SELECT * FROM articles")}
+                conn.close()
+                return articles, set(articles)
+
+            def records():
+                return categorizer.articles_with_categories.values()
+
+            for name, build in (("dict", dicts), ("Article", records)):
+                start = time.perf_counter()
+                size_bytes, _ = traced_bytes(build)
+                timing = {key: time.perf_counter() - start for key in ('min', 'median', 'mean')}
+                entry = result("memory", f"load_{name}", timing, size, size=size)
+                entry['bytes'] = size_bytes
+                entry['bytes_per_article'] = size_bytes / size
+                results.append(entry)
+                print(f"{name:>8} records: {size_bytes / 2 ** 20:.1f} MiB for {size} articles "
+                      f"({size_bytes / size:.0f} bytes each)")
+            categorizer.close()
+    return results
+
+
+# What a user types into the search box, one keystroke at a time
+SEARCH_QUERIES = ("s", "sy", "synthetic", "synthetic headline 12", "about sport", "source:bbc", "about w source:reuters",
+                  "category:health after:2000-01-01", "no such words")
+
+
+def bench_search(backend, repeat, sizes):
+    results = []
+    for size in sizes:
+        with scratch_directory():
+            categorizer = NewsCategorizer(backend=backend, embedding_index=False)
+            for article in synthetic_articles(size):
+                categorizer.articles_with_categories[article['link']] = article
+            categorizer.save_classified_articles()
+            articles = categorizer.articles_with_categories.values()
+
+            timing = measure(lambda: SearchIndex().add(articles), 1)
+            results.append(result("search", "build", timing, size, size=size))
+            index = categorizer.enable_search(articles)
+            for query in SEARCH_QUERIES:
+                timing = measure(lambda: index.search(query)[1], repeat)
+                results.append(result("search", "query", timing, 1, size=size, query=query, matches=timing['value']))
+
+            # Keeping the index current as a batch is classified and old articles expire
+            batch = synthetic_articles(16, now=time.time() + 3600)
+            for article in batch:
+                article['link'] += "/new"
+            timing = measure(lambda: index.add(batch), repeat)
+            results.append(result("search", "add_batch", timing, len(batch), size=size))
+            links = [article['link'] for article in articles[:100]]
+            timing = measure(lambda: index.remove(links), 1)
+            results.append(result("search", "remove", timing, len(links), size=size))
+            categorizer.close()
+    return results
+
+
+def bench_dates(backend, repeat, sizes):
+    results = []
+    now = time.time()
+    with scratch_directory():
+        categorizer = NewsCategorizer(backend=backend, embedding_index=False)
+        for size in sizes:
+            dates = []
+            for i in range(size):
+                moment = now - i * 61
+                if i % 2:
+                    dates.append(email.utils.formatdate(moment, usegmt=True))
+                else:
+                    dates.append(datetime.datetime.fromtimestamp(moment, datetime.timezone.utc).isoformat())
+
+            def cold(_):
+                for published in dates:
+                    categorizer.parse_date(published)
+            # Clearing the parse cache before each run measures the uncached path
+            timing = measure(cold, repeat, setup=dateParsing._parse_string.cache_clear)
+            results.append(result("dates", "parse_date", timing, size, size=size, cache="cold"))
+
+            timing = measure(lambda: [categorizer.parse_date(published) for published in dates], repeat)
+            results.append(result("dates", "parse_date", timing, size, size=size, cache="warm"))
+        categorizer.close()
+    return results
+
+
+def bench_tree(backend, repeat, sizes):
+    results = []
+    with virtual_display():
+        for size in sizes:
+            with scratch_directory():
+                categorizer = NewsCategorizer(backend=backend, embedding_index=False)
+                for article in synthetic_articles(size):
+                    categorizer.articles_with_categories[article['link']] = article
+                categorizer.save_classified_articles()
+
+                def populate():
+                    # Build the window, open every category once and paint it
+                    root, category_tree = categorizer.build_news_gui({})
+                    for category in list(category_tree.category_nodes):
+                        category_tree.load_page(category)
+                    root.update()
+                    root.destroy()
+                timing = measure(populate, repeat)
+                results.append(result("tree", "build_news_gui", timing, size, size=size))
+                categorizer.close()
+    return results
+
+
+BENCHMARKS = {
+    'fetch': bench_fetch,
+    'parse': bench_parse,
+    'classify': bench_classify,
+    'persist': bench_persist,
+    'memory': bench_memory,
+    'search': bench_search,
+    'dates': bench_dates,
+    'tree': bench_tree,
+}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def run_benchmarks(stages=STAGES, sizes=(1000, 10000, 100000), classifier="stub", repeat=3):
+    """
+    Runs the selected stages and returns the report.
+
+    Args:
+        stages (iterable): Stage names from STAGES.
+        sizes (iterable): Article counts for the persist, memory, search, dates and tree stages.
+        classifier (str): "stub", or a classifier backend name for make_backend.
+        repeat (int): Runs per measurement.
+
+    Returns:
+        dict: The environment and one result per measurement; stages that
+            can't run here are listed under 'skipped'.
+    """
+    if classifier == "stub":
+        backend = StubBackend(CATEGORIES)
+    else:
+        backend = make_backend(classifier, CATEGORIES, os.path.join(BASE_DIR, "classified_articles.json"))
+    report = {'environment': environment(), 'classifier': backend.model_name, 'results': [], 'skipped': {}}
+    for stage in stages:
+        print(f"Benchmarking {stage}...")
+        try:
+            report['results'].extend(BENCHMARKS[stage](backend, repeat, sizes))
+        except RuntimeError as e:
+            report['skipped'][stage] = str(e)
+            print(f"Skipped {stage}: {e}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmarks.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--classifier", default="stub", help='"stub", "nli" or "prototype"')
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--record", action="store_true", help="re-record the RSS fixtures from the live feeds")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures()
+    report = run_benchmarks(args.stages, args.sizes, args.classifier, args.repeat)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=4)
+    for entry in report['results']:
+        print(f"{entry['stage']:>8} {entry['name']:<28} {json.dumps(entry['params']):<40} "
+              f"{entry['seconds']['min'] * 1000:10.1f} ms")
+    print(f"Results written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from storyIndex import normalise_title
+
+# Bumped when key() or the stored result changes, so entries stored the old way are dropped
+# (3: results keep the scorer that produced them)
+KEY_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classifications (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+"""
+
+
+class ClassificationCache:
+    """
+    Two-level cache of classifier results keyed by normalised title: an in-memory
+    LRU in front of an SQLite table that survives restarts.
+
+    Keys include a hash of the model name and the label set, and entries written
+    under any other model, label set or KEY_VERSION are dropped when the cache is opened.
+    """
+
+    def __init__(self, model_name, labels, db_path="classification_cache.db", capacity=10000):
+        """
+        Args:
+            model_name (str): Identifies the classifier the results come from.
+            labels (list): The candidate labels the results were computed for.
+            db_path (str): SQLite file of the on-disk layer.
+            capacity (int): Number of results kept in memory.
+        """
+        self.namespace = hashlib.sha256(json.dumps([KEY_VERSION, model_name, list(labels)]).encode()).hexdigest()[:16]
+        self.capacity = capacity
+        self.memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        with self._conn:
+            self._conn.execute("DELETE FROM classifications WHERE namespace != ?", (self.namespace,))
+
+    def key(self, title, source=None):
+        """
+        Return the cache key of a title: its words with the suffix naming its source
+        dropped, or the whole lower-cased title when it has no words (only symbols or
+        emoji), so such titles don't all share one key.
+        """
+        normalised = " ".join(normalise_title(title, source or "")) or title.strip().lower()
+        return hashlib.sha256(f"{self.namespace}:{normalised}".encode()).hexdigest()
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    def get_many(self, titles, sources=None):
+        """
+        Looks titles up in memory, then on disk.
+
+        Args:
+            titles (list): The article titles.
+            sources (dict): Title mapped to the source it came from, for key().
+
+        Returns:
+            dict: Title mapped to its cached result, for the titles that were found.
+        """
+        found = {}
+        missing = {}
+        with self._lock:
+            sources = sources or {}
+            for title in titles:
+                key = self.key(title, sources.get(title))
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[title] = self.memory[key]
+                    self.memory_hits += 1
+                else:
+                    missing.setdefault(key, []).append(title)
+            if missing:
+                keys = list(missing)
+                for start in range(0, len(keys), 500):  # Stay under SQLite's parameter limit
+                    chunk = keys[start:start + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, result FROM classifications WHERE key IN ({', '.join('?' for _ in chunk)})", chunk)
+                    for key, result in rows:
+                        result = json.loads(result)
+                        self._remember(key, result)
+                        for title in missing.pop(key):
+                            found[title] = result
+                            self.disk_hits += 1
+            self.misses += sum(len(titles) for titles in missing.values())
+        return found
+
+    def put_many(self, results, sources=None):
+        """
+        Stores results in both layers, writing the disk layer in one transaction.
+
+        Args:
+            results (dict): Title mapped to its classifier result.
+            sources (dict): Title mapped to the source it came from, for key().
+        """
+        rows = []
+        sources = sources or {}
+        with self._lock:
+            for title, result in results.items():
+                result = {'labels': list(result['labels']), 'scores': [float(score) for score in result['scores']],
+                          'scorer': result.get('scorer')}
+                key = self.key(title, sources.get(title))
+                self._remember(key, result)
+                rows.append((key, self.namespace, json.dumps(result)))
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO classifications (key, namespace, result) VALUES (?, ?, ?)", rows)
+
+    def stats(self):
+        """Return the hit counters of each layer and the overall hit rate."""
+        total = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.memory_hits + self.disk_hits) / total if total else 0.0,
+        }
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,282 @@
+import json
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from modelRegistry import get_classifier, get_sentence_model, CLASSIFIER_MODEL, SENTENCE_MODEL, INFERENCE_BACKEND
+from inferenceScheduler import scheduler
+
+
+def load_labelled_examples(file_path="classified_articles.json"):
+    """
+    Loads the titles already labelled by the classifier, grouped by category.
+
+    Args:
+        file_path (str): The classified articles JSON file.
+
+    Returns:
+        dict: Category name mapped to a list of titles.
+    """
+    examples = defaultdict(list)
+    try:
+        with open(file_path, "r") as file:
+            content = file.read().strip()
+    except FileNotFoundError:
+        return examples
+    if content:
+        for article in json.loads(content).get("articles", {}).values():
+            if article.get('category'):
+                examples[article['category']].append(article['title'])
+    return examples
+
+
+class NLIBackend:
+    """
+    Zero-shot classification with bart-large-mnli: one NLI forward pass per (title, label) pair.
+
+    Labels are scored independently (multi_label), so a stored score stays valid
+    when other labels are added to or removed from the taxonomy.
+    """
+
+    name = "nli"
+    models = ("classifier",)  # Registry models used, loaded by each worker process when it starts
+
+    def __init__(self, labels):
+        self.labels = list(labels)
+        # Optimised backends score slightly differently, so they get their own cache namespace
+        backend = "" if INFERENCE_BACKEND == "pytorch" else f":{INFERENCE_BACKEND}"
+        self.model_name = f"{CLASSIFIER_MODEL}{backend}:multi-label"
+        self.scorer = self.model_name  # Tags the scores, which are entailment probabilities
+
+    def classify(self, titles):
+        """
+        Classifies a batch of titles.
+
+        Args:
+            titles (list): The article titles.
+
+        Returns:
+            list: One result per title with 'labels' and 'scores', best label first.
+        """
+        return self.score(titles, self.labels)
+
+    def score(self, titles, labels):
+        """
+        Scores a batch of titles against any labels.
+
+        Args:
+            titles (list): The article titles.
+            labels (list): The labels to score.
+
+        Returns:
+            list: One result per title with 'labels', 'scores' (best label first) and 'scorer'.
+        """
+        if not titles:
+            return []
+        classifier = get_classifier()
+        labels = list(labels)
+
+        def infer(batch):
+            # Every title is one NLI sequence per label
+            results = classifier(batch, candidate_labels=labels, multi_label=True, batch_size=len(batch) * len(labels))
+            return [results] if isinstance(results, dict) else results
+
+        results = scheduler.run("classifier", titles, infer, tokenizer=classifier.tokenizer, sequences_per_item=len(labels))
+        for result in results:
+            result['scorer'] = self.scorer
+        return results
+
+
+class PrototypeBackend:
+    """
+    Classifies titles by cosine similarity to one prototype embedding per label,
+    computed once with the MiniLM sentence model. Titles whose best two labels are
+    closer than `margin` are sent to the fallback backend instead.
+    """
+
+    name = "prototype"
+
+    def __init__(self, labels, examples=None, fallback=None, margin=0.02, example_weight=0.7, batch_size=64):
+        """
+        Args:
+            labels (list): The category names.
+            examples (dict): Optional category -> titles used to refine the prototypes.
+            fallback (object): Optional backend used for low-margin titles.
+            margin (float): Minimum gap between the two best similarities to trust the result.
+            example_weight (float): Share of the prototype taken from the example titles.
+            batch_size (int): Encoding batch size for the sentence model.
+        """
+        self.labels = list(labels)
+        self.examples = examples or {}
+        self.fallback = fallback
+        self.margin = margin
+        self.example_weight = example_weight
+        self.batch_size = batch_size
+        self.fallback_count = 0
+        self._prototypes = None
+        self._label_vectors = {}
+        self.scorer = f"prototype:{SENTENCE_MODEL}"  # Cosine similarities; fallback results keep their own scorer
+        self.model_name = self.scorer + (f"+{fallback.model_name}" if fallback else "")
+        self.models = ("sentence",) + (fallback.models if fallback else ())
+
+    def _encode(self, texts):
+        return get_sentence_model().encode(
+            list(texts), batch_size=self.batch_size,
+            normalize_embeddings=True, convert_to_numpy=True,
+        ).astype(np.float32)
+
+    def prototypes(self):
+        """Return the (labels x dim) matrix of unit-length label prototypes, computing it once."""
+        if self._prototypes is None:
+            prototypes = self._encode([f"{label} news" for label in self.labels])
+            for i, label in enumerate(self.labels):
+                titles = self.examples.get(label)
+                if titles:
+                    centroid = self._encode(titles).mean(axis=0)
+                    centroid /= np.linalg.norm(centroid) or 1.0
+                    prototypes[i] = (1 - self.example_weight) * prototypes[i] + self.example_weight * centroid
+            prototypes /= np.linalg.norm(prototypes, axis=1, keepdims=True)
+            self._prototypes = prototypes
+        return self._prototypes
+
+    def score(self, titles, labels):
+        """
+        Scores a batch of titles against any labels by cosine similarity.
+
+        Labels outside the backend's own label set get a prototype from their name alone.
+
+        Args:
+            titles (list): The article titles.
+            labels (list): The labels to score.
+
+        Returns:
+            list: One result per title with 'labels', 'scores' (best label first) and 'scorer'.
+        """
+        if not titles:
+            return []
+        unknown = [label for label in labels if label not in self.labels and label not in self._label_vectors]
+        if unknown:
+            for label, vector in zip(unknown, self._encode([f"{label} news" for label in unknown])):
+                self._label_vectors[label] = vector
+        prototypes = np.vstack([
+            self.prototypes()[self.labels.index(label)] if label in self.labels else self._label_vectors[label]
+            for label in labels
+        ])
+        similarities = self._encode(titles) @ prototypes.T
+        results = []
+        for i, ranking in enumerate(np.argsort(-similarities, axis=1)):
+            results.append({
+                'sequence': titles[i],
+                'labels': [labels[j] for j in ranking],
+                'scores': [float(similarities[i, j]) for j in ranking],
+                'scorer': self.scorer,
+            })
+        return results
+
+    def classify(self, titles):
+        """
+        Classifies a batch of titles with one similarity matrix product.
+
+        Args:
+            titles (list): The article titles.
+
+        Returns:
+            list: One result per title with 'labels' and 'scores', best label first.
+        """
+        if not titles:
+            return []
+        similarities = self._encode(titles) @ self.prototypes().T
+        order = np.argsort(-similarities, axis=1)
+
+        results = []
+        uncertain = []
+        for i, ranking in enumerate(order):
+            results.append({
+                'sequence': titles[i],
+                'labels': [self.labels[j] for j in ranking],
+                'scores': [float(similarities[i, j]) for j in ranking],
+                'scorer': self.scorer,
+            })
+            if len(ranking) > 1 and similarities[i, ranking[0]] - similarities[i, ranking[1]] < self.margin:
+                uncertain.append(i)
+
+        # Hand the close calls to the slower but more accurate backend
+        if self.fallback is not None and uncertain:
+            self.fallback_count += len(uncertain)
+            for i, result in zip(uncertain, self.fallback.classify([titles[i] for i in uncertain])):
+                results[i] = result
+        return results
+
+
+def make_backend(name, labels, examples_path="classified_articles.json"):
+    """
+    Builds a classifier backend by name.
+
+    Args:
+        name (str): "nli" or "prototype".
+        labels (list): The category names.
+        examples_path (str): Labelled articles used to refine the prototypes.
+
+    Returns:
+        object: The classifier backend.
+    """
+    if name == "nli":
+        return NLIBackend(labels)
+    if name == "prototype":
+        return PrototypeBackend(labels, examples=load_labelled_examples(examples_path), fallback=NLIBackend(labels))
+    raise ValueError(f"Unknown classifier backend: {name}")
+
+
+def compare_backends(labels, file_path="classified_articles.json", limit=None):
+    """
+    Measures accuracy and throughput of each backend against the stored labels.
+
+    The stored articles are split in two: even positions refine the prototypes and
+    odd positions are used for evaluation, so the prototype backend isn't scored on
+    the titles it was built from. The stored labels came from the NLI backend, so
+    accuracy here is agreement with the current NLI path.
+
+    Args:
+        labels (list): The category names.
+        file_path (str): The classified articles JSON file.
+        limit (int): Optional maximum number of evaluation titles.
+
+    Returns:
+        dict: Backend name mapped to accuracy, items per second and fallback count.
+    """
+    labelled = [(title, category) for category, titles in load_labelled_examples(file_path).items()
+                if category in labels for title in titles]
+    examples = defaultdict(list)
+    for title, category in labelled[0::2]:
+        examples[category].append(title)
+    evaluation = labelled[1::2][:limit]
+    titles = [title for title, _ in evaluation]
+    expected = [category for _, category in evaluation]
+
+    backends = [
+        NLIBackend(labels),
+        PrototypeBackend(labels, examples=examples),
+        PrototypeBackend(labels, examples=examples, fallback=NLIBackend(labels)),
+    ]
+    report = {}
+    for backend in backends:
+        name = backend.name + ("+nli" if getattr(backend, 'fallback', None) else "")
+        if isinstance(backend, PrototypeBackend):
+            backend.prototypes()  # Preparing the prototypes is a one-off cost
+        start = time.perf_counter()
+        results = backend.classify(titles)
+        elapsed = time.perf_counter() - start
+        correct = sum(result['labels'][0] == category for result, category in zip(results, expected))
+        report[name] = {
+            'accuracy': correct / len(titles) if titles else 0.0,
+            'items_per_second': len(titles) / elapsed if elapsed else 0.0,
+            'fallbacks': getattr(backend, 'fallback_count', 0),
+        }
+        print(f"{name}: accuracy {report[name]['accuracy']:.3f}, {report[name]['items_per_second']:.1f} titles/s")
+    return report
+
+
+if __name__ == "__main__":
+    from newsScraper import CATEGORIES
+    compare_backends(CATEGORIES)
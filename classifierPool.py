@@ -0,0 +1,157 @@
+import multiprocessing
+import signal
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from modelRegistry import registry
+from inferenceScheduler import scheduler, available_cores
+
+# Backend used by the worker processes, set by _init_worker
+_worker_backend = None
+
+# Imported once by the fork server, so every worker starts with them already loaded
+# (modules that aren't installed are skipped)
+PRELOAD_MODULES = ["classifierPool", "classifierBackends", "modelRegistry", "numpy", "torch", "transformers", "sentence_transformers"]
+
+
+def _init_worker(backend, threads):
+    global _worker_backend
+    _worker_backend = backend
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Interrupts are handled by the parent
+    # Each worker gets its own slice of the cores instead of every worker using all of them
+    scheduler.configure_threads(threads, force=True)
+    for name in getattr(backend, "models", ()):
+        registry.get(name)
+
+
+def _run_shard(method, titles, args):
+    return getattr(_worker_backend, method)(titles, *args)
+
+
+class ClassifierPool:
+    """
+    Runs a classifier backend in several worker processes for large backlogs.
+
+    Titles are split into fixed-size shards that the workers take as they become
+    free, and the results are put back together in shard order, so the output is
+    the same as running the backend in-process. Workers are started from a fork
+    server (spawned elsewhere) rather than forked from this process, whose other
+    threads may hold locks or torch/OpenMP state at the moment of a fork; each
+    worker loads the models once and keeps them. If a worker dies, or no shard
+    finishes within `timeout` seconds, the pool is restarted and the shards that
+    had not finished are run again.
+
+    The pool has the same interface as the backend it wraps.
+    """
+
+    def __init__(self, backend, workers=None, threads_per_worker=2, shard_size=64, max_restarts=2, timeout=300):
+        """
+        Args:
+            backend (object): The classifier backend to run (see classifierBackends).
+            workers (int): Number of worker processes, by default one per `threads_per_worker` cores.
+            threads_per_worker (int): Torch threads used by each worker.
+            shard_size (int): Titles sent to a worker at a time.
+            max_restarts (int): Pool restarts after crashes or hangs, within one batch, before the
+                rest of that batch is run in-process.
+            timeout (float): Seconds without any shard finishing (including the workers'
+                model loading) after which the workers are considered hung and restarted.
+        """
+        self.backend = backend
+        self.labels = backend.labels
+        self.model_name = backend.model_name
+        self.scorer = backend.scorer
+        self.models = getattr(backend, "models", ())
+        self.threads_per_worker = threads_per_worker
+        self.workers = workers or max(1, available_cores() // threads_per_worker)
+        self.shard_size = shard_size
+        self.max_restarts = max_restarts
+        self.timeout = timeout
+        self.restarts = 0
+        self.shards = 0
+        self._executor = None
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context("forkserver")
+            self._context.set_forkserver_preload(PRELOAD_MODULES)
+        else:
+            self._context = multiprocessing.get_context("spawn")
+
+    def classify(self, titles):
+        """Classifies titles like the wrapped backend's classify()."""
+        return self._map("classify", titles)
+
+    def score(self, titles, labels):
+        """Scores titles against labels like the wrapped backend's score()."""
+        return self._map("score", titles, list(labels))
+
+    def _start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=self._context,
+                initializer=_init_worker, initargs=(self.backend, self.threads_per_worker),
+            )
+        return self._executor
+
+    def _map(self, method, titles, *args):
+        titles = list(titles)
+        # Small batches aren't worth the round trip to the workers
+        if self.workers < 2 or len(titles) <= self.shard_size:
+            return getattr(self.backend, method)(titles, *args)
+
+        pending = {start: titles[start:start + self.shard_size] for start in range(0, len(titles), self.shard_size)}
+        self.shards += len(pending)
+        results = {}
+        restarts = 0  # Per batch, so failures long ago don't keep later batches in-process
+        while pending:
+            if restarts > self.max_restarts:
+                print(f"Classifier workers keep failing; classifying {len(pending)} shards in-process.")
+                for start in sorted(pending):
+                    results[start] = getattr(self.backend, method)(pending.pop(start), *args)
+                break
+            executor = self._start()
+            futures = {executor.submit(_run_shard, method, shard, args): start for start, shard in pending.items()}
+            failure = None
+            running = set(futures)
+            try:
+                while running:
+                    done, running = wait(running, timeout=self.timeout, return_when=FIRST_COMPLETED)
+                    if not done:
+                        failure = f"No classifier shard finished in {self.timeout} s"
+                        break
+                    for future in done:
+                        results[futures[future]] = future.result()
+                        del pending[futures[future]]
+            except BrokenProcessPool:
+                failure = "A classifier worker crashed"
+            if failure is not None:
+                # Keep whatever finished before the failure and run the rest again on a new pool
+                for future, start in futures.items():
+                    if start in pending and future.done() and not future.cancelled() and future.exception() is None:
+                        results[start] = future.result()
+                        del pending[start]
+                restarts += 1
+                self.restarts += 1
+                print(f"{failure}; retrying {len(pending)} shards.")
+                self.close(terminate=True)
+
+        merged = []
+        for start in sorted(results):
+            merged.extend(results[start])
+        return merged
+
+    def stats(self):
+        return {'workers': self.workers, 'shards': self.shards, 'restarts': self.restarts}
+
+    def close(self, terminate=False):
+        """
+        Stops the worker processes.
+
+        Args:
+            terminate (bool): Kill the workers instead of letting them finish their
+                current shard, e.g. when they are hung.
+        """
+        if self._executor is not None:
+            if terminate:
+                for process in list((self._executor._processes or {}).values()):
+                    process.terminate()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
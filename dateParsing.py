@@ -0,0 +1,48 @@
+import calendar
+import datetime
+from email.utils import parsedate_tz, mktime_tz
+from functools import lru_cache
+
+
+@lru_cache(maxsize=65536)
+def _parse_string(published_str):
+    # RFC 822 / RFC 2822, as used by RSS: 'Sat, 11 Jan 2025 11:13:50 GMT' or '... +0100'
+    parsed = parsedate_tz(published_str)
+    if parsed is not None:
+        try:
+            return mktime_tz(parsed)
+        except (OverflowError, ValueError):
+            pass
+
+    # ISO 8601, as used by Atom and by fetch_feed's own fallback
+    try:
+        value = datetime.datetime.fromisoformat(published_str.strip())
+    except ValueError:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return int(value.timestamp())
+
+
+def parse_published(published_str, published_parsed=None):
+    """
+    Converts a feed's published date to epoch seconds.
+
+    Understands RFC 822 dates with named or numeric offsets and ISO 8601 dates.
+    Repeated strings are answered from a cache.
+
+    Args:
+        published_str (str): The published date as it appears in the feed.
+        published_parsed (time.struct_time): feedparser's UTC parse of the date, used
+            when the string itself can't be parsed.
+
+    Returns:
+        int: Epoch seconds, or None if the date can't be understood.
+    """
+    if published_str:
+        timestamp = _parse_string(published_str)
+        if timestamp is not None:
+            return timestamp
+    if published_parsed is not None:
+        return calendar.timegm(published_parsed)
+    return None
@@ -0,0 +1,337 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from modelRegistry import get_sentence_model
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Meta key counting the changes made to the index by any process
+GENERATION_KEY = "embedding_generation"
+
+
+@contextmanager
+def file_lock(path):
+    """Holds an exclusive lock on a file while the block runs, shared by every process that opens it."""
+    with open(path, "a+b") as file:
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def encode_titles(titles, batch_size=64):
+    """Return unit-length float32 MiniLM embeddings of titles, one row per title."""
+    return get_sentence_model().encode(
+        list(titles), batch_size=batch_size,
+        normalize_embeddings=True, convert_to_numpy=True,
+    ).astype(np.float32)
+
+
+class EmbeddingIndex:
+    """
+    Persistent nearest-neighbour index over the titles of stored articles.
+
+    Unit-length embeddings live in a memory-mapped .npy matrix (float16 by default,
+    float32 optionally), and the article store records which row belongs to which
+    link, so rows of deleted articles are freed together with the articles and
+    reused by later ones. Queries are exact top-k cosine searches done as blocked
+    matrix products. For large archives an optional inverted-file (IVF) index,
+    built with k-means, restricts a query to the rows of its nearest clusters.
+
+    Several processes can share the index (the aggregator and povFinder): writes
+    hold a lock file next to the matrix, and each one bumps a generation counter
+    in the store, from which the other processes know to reload the row map and
+    reopen the matrix before their next read or write.
+    """
+
+    def __init__(self, store, path="article_embeddings.npy", dtype=np.float16, encode=encode_titles,
+                 approximate_above=20000, block_rows=65536):
+        """
+        Args:
+            store (ArticleStore): The article store the index belongs to.
+            path (str): File of the embedding matrix.
+            dtype (type): np.float16 or np.float32.
+            encode (callable): Turns a list of titles into unit-length embeddings.
+            approximate_above (int): Indexed articles above which queries use the IVF index.
+            block_rows (int): Rows converted to float32 at a time while searching.
+        """
+        self.store = store
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.encode = encode
+        self.approximate_above = approximate_above
+        self.block_rows = block_rows
+        self.nprobe = 8
+        self._lock = threading.RLock()
+        with self._lock, self._file_lock():
+            self.generation = store.get_meta(GENERATION_KEY)
+            self._load()
+            if self.matrix is not None and self.matrix.dtype != self.dtype:
+                self._resize(len(self.matrix), self.matrix.shape[1])
+                self._bump_generation()
+            if self.links and (self.matrix is None or self.size > len(self.matrix)):
+                # The matrix file was lost or replaced: everything has to be embedded again
+                store.clear_embedding_rows()
+                self._bump_generation()
+                self._load()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, link):
+        return link in self.rows
+
+    def _file_lock(self):
+        return file_lock(f"{self.path}.lock")
+
+    def _load(self):
+        # (Re)reads the row map from the store and reopens the matrix file
+        self.rows = self.store.embedding_rows()  # link -> row
+        self.links = {row: link for link, row in self.rows.items()}
+        self.size = max(self.links) + 1 if self.links else 0
+        self.matrix = np.load(self.path, mmap_mode="r+") if os.path.exists(self.path) else None
+        self.valid = np.zeros(len(self.matrix) if self.matrix is not None else 0, dtype=bool)
+        self.valid[[row for row in self.links if row < len(self.valid)]] = True
+        self.centroids = None  # Reassigned from the saved centroids by the next approximate search
+        self.assignments = None
+
+    def _refresh(self):
+        # Picks up the changes another process made since this one last read or wrote the index
+        generation = self.store.get_meta(GENERATION_KEY)
+        if generation != self.generation:
+            self.generation = generation
+            self._load()
+
+    def _bump_generation(self):
+        self.generation = str(int(self.generation or 0) + 1)
+        self.store.set_meta(GENERATION_KEY, self.generation)
+
+    def _resize(self, capacity, dim):
+        # Copies into a new file, then swaps it in, so a crash never leaves a half-written matrix
+        tmp_path = f"{self.path}.tmp.npy"
+        matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=self.dtype, shape=(capacity, dim))
+        if self.matrix is not None:
+            rows = min(len(self.matrix), capacity)
+            matrix[:rows] = self.matrix[:rows]
+        matrix.flush()
+        del matrix
+        self.matrix = None
+        os.replace(tmp_path, self.path)
+        self.matrix = np.load(self.path, mmap_mode="r+")
+        valid = np.zeros(capacity, dtype=bool)
+        valid[:len(self.valid)] = self.valid[:capacity]
+        self.valid = valid
+        if self.assignments is not None:
+            assignments = np.full(capacity, -1, dtype=np.int32)
+            assignments[:len(self.assignments)] = self.assignments[:capacity]
+            self.assignments = assignments
+
+    def _allocate(self, count, dim):
+        free = np.flatnonzero(~self.valid[:self.size])[:count].tolist()
+        start = self.size
+        self.size += count - len(free)
+        if self.matrix is None or self.size > len(self.matrix):
+            self._resize(max(1024, self.size * 2), dim)
+        return free + list(range(start, self.size))
+
+    def add(self, articles):
+        """
+        Embeds and indexes articles not indexed yet.
+
+        Args:
+            articles (iterable): (link, title) pairs.
+
+        Returns:
+            int: The number of articles added.
+        """
+        with self._lock:
+            self._refresh()
+            articles = [(link, title) for link, title in dict(articles).items() if link not in self.rows]
+        if not articles:
+            return 0
+        vectors = np.asarray(self.encode([title for _, title in articles]), dtype=np.float32)
+        with self._lock, self._file_lock():
+            self._refresh()
+            # Another process may have embedded some of them meanwhile
+            fresh = [i for i, (link, _) in enumerate(articles) if link not in self.rows]
+            if not fresh:
+                return 0
+            articles = [articles[i] for i in fresh]
+            vectors = vectors[fresh]
+            rows = self._allocate(len(articles), vectors.shape[1])
+            self.matrix[rows] = vectors.astype(self.dtype)
+            self.matrix.flush()
+            new_rows = {link: row for (link, _), row in zip(articles, rows)}
+            self.store.set_embedding_rows(new_rows)
+            for link, row in new_rows.items():
+                stale = self.links.get(row)
+                if stale is not None:
+                    self.rows.pop(stale, None)
+                self.rows[link] = row
+                self.links[row] = link
+            self.valid[rows] = True
+            if self.centroids is not None:
+                self.assignments[rows] = self._nearest_centroids(vectors)
+            self._bump_generation()
+        return len(articles)
+
+    def remove(self, links):
+        """Frees the rows of removed articles (the store drops their row records itself)."""
+        with self._lock, self._file_lock():
+            self._refresh()
+            for link in links:
+                row = self.rows.pop(link, None)
+                if row is not None:
+                    self.links.pop(row, None)
+                    self.valid[row] = False
+            self._bump_generation()
+
+    def sync(self, batch_size=1024):
+        """
+        Embeds every stored article that has no embedding yet, e.g. after upgrading.
+
+        Returns:
+            int: The number of articles added.
+        """
+        missing = list(self.store.iter_unembedded())
+        added = 0
+        for start in range(0, len(missing), batch_size):
+            added += self.add(missing[start:start + batch_size])
+        return added
+
+    def vector(self, link):
+        """Return the stored embedding of an article as float32, or None if it isn't indexed."""
+        with self._lock:
+            self._refresh()
+            row = self.rows.get(link)
+            return None if row is None else np.asarray(self.matrix[row], dtype=np.float32)
+
+    def build_approximate(self, clusters=None, iterations=10, sample_size=20000, nprobe=8, seed=0):
+        """
+        Trains the IVF index: k-means centroids over a sample of the embeddings, saved
+        next to the matrix, then the cluster of every row. Call again to retrain
+        once the archive has changed a lot.
+
+        Args:
+            clusters (int): Number of clusters, by default about the square root of the size.
+            iterations (int): k-means iterations.
+            sample_size (int): Rows the centroids are trained on.
+            nprobe (int): Clusters searched per query.
+            seed (int): Seed of the sample and the initial centroids.
+        """
+        with self._lock:
+            self._refresh()
+            rows = np.flatnonzero(self.valid[:self.size])
+            if len(rows) == 0:
+                return
+            clusters = min(len(rows), clusters or max(1, int(np.sqrt(len(rows)))))
+            rng = np.random.default_rng(seed)
+            sample = np.asarray(self.matrix[np.sort(rng.choice(rows, min(sample_size, len(rows)), replace=False))],
+                                dtype=np.float32)
+            centroids = sample[rng.choice(len(sample), clusters, replace=False)]
+            for _ in range(iterations):
+                nearest = np.argmax(sample @ centroids.T, axis=1)
+                # Sum the members of every cluster in one pass over the sorted sample
+                order = np.argsort(nearest, kind="stable")
+                present, starts = np.unique(nearest[order], return_index=True)
+                sums = np.add.reduceat(sample[order], starts, axis=0)
+                centroids[present] = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+            np.save(self._centroids_path(), centroids)
+            self.nprobe = nprobe
+            self._assign(centroids)
+
+    def _centroids_path(self):
+        return f"{os.path.splitext(self.path)[0]}.centroids.npy"
+
+    def _assign(self, centroids):
+        self.centroids = centroids
+        self.assignments = np.full(len(self.valid), -1, dtype=np.int32)
+        for start in range(0, self.size, self.block_rows):
+            block = np.asarray(self.matrix[start:min(start + self.block_rows, self.size)], dtype=np.float32)
+            self.assignments[start:start + len(block)] = self._nearest_centroids(block)
+
+    def _load_approximate(self):
+        # Reuse the centroids trained by an earlier run when there are any
+        path = self._centroids_path()
+        if os.path.exists(path):
+            centroids = np.load(path)
+            if centroids.shape[1] == self.matrix.shape[1]:
+                self._assign(centroids)
+                return
+        self.build_approximate()
+
+    def _nearest_centroids(self, vectors):
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def search(self, vector, k=10, exclude=(), approximate=None):
+        """
+        Finds the indexed articles most similar to a vector.
+
+        Args:
+            vector (np.ndarray): A unit-length query embedding.
+            k (int): Number of results.
+            exclude (iterable): Links left out of the results.
+            approximate (bool): Use the IVF index; by default only above `approximate_above` articles.
+
+        Returns:
+            list: (link, cosine similarity) pairs, most similar first.
+        """
+        query = np.asarray(vector, dtype=np.float32).ravel()
+        with self._lock:
+            self._refresh()
+            exclude = {self.rows[link] for link in exclude if link in self.rows}
+            if self.matrix is None or not self.rows:
+                return []
+            if approximate is None:
+                approximate = len(self.rows) > self.approximate_above
+            if approximate and self.centroids is None:
+                self._load_approximate()
+
+            if approximate:
+                probes = np.argsort(-(self.centroids @ query))[:self.nprobe]
+                candidates = np.flatnonzero(np.isin(self.assignments[:self.size], probes) & self.valid[:self.size])
+                scores = np.asarray(self.matrix[candidates], dtype=np.float32) @ query
+            else:
+                candidates = None
+                scores = np.empty(self.size, dtype=np.float32)
+                for start in range(0, self.size, self.block_rows):
+                    block = np.asarray(self.matrix[start:min(start + self.block_rows, self.size)], dtype=np.float32)
+                    scores[start:start + len(block)] = block @ query
+                scores[~self.valid[:self.size]] = -np.inf
+
+            rows = candidates if candidates is not None else np.arange(self.size)
+            for row in exclude:
+                scores[rows == row] = -np.inf
+            count = min(k, len(scores))
+            if count == 0:
+                return []
+            top = np.argpartition(-scores, count - 1)[:count]
+            top = top[np.argsort(-scores[top])]
+            return [(self.links[int(rows[i])], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def related(self, link, k=10, approximate=None):
+        """Return the (link, similarity) pairs of the articles most similar to an indexed article."""
+        vector = self.vector(link)
+        if vector is None:
+            return []
+        return self.search(vector, k, exclude=[link], approximate=approximate)
+
+    def search_text(self, text, k=10, approximate=None):
+        """Return the (link, similarity) pairs of the articles most similar to some text, e.g. a headline."""
+        return self.search(self.encode([text])[0], k, approximate=approximate)
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+
+
+class ValidatorStore:
+    """
+    Keeps the HTTP cache validators (ETag, Last-Modified) and the hash of the last
+    body seen for every feed URL, so feeds can be fetched with conditional requests.
+    Updates are kept in memory and written by flush(), once per poll.
+    """
+
+    def __init__(self, file_path="feed_validators.json"):
+        self.file_path = file_path
+        self.validators = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Held while writing, so saves land in order
+        self.load()
+
+    def load(self):
+        """Load the stored validators from disk, starting empty if the file is missing or broken."""
+        try:
+            with open(self.file_path, "r") as file:
+                content = file.read().strip()
+                self.validators = json.loads(content) if content else {}
+        except (FileNotFoundError, ValueError):
+            self.validators = {}
+
+    def save(self):
+        """Write the validators to disk, replacing the old file in one step."""
+        with self._save_lock:
+            with self._lock:
+                # Entries are replaced, never changed in place, so a shallow copy is a consistent snapshot
+                validators = dict(self.validators)
+                self._dirty = False
+            temp_path = self.file_path + ".tmp"
+            try:
+                with open(temp_path, "w") as file:
+                    json.dump(validators, file, indent=4)
+                os.replace(temp_path, self.file_path)
+            except OSError:
+                self._dirty = True
+                raise
+
+    def flush(self):
+        """Save the validators if any changed since the last save."""
+        if self._dirty:
+            self.save()
+
+    def request_headers(self, url):
+        """
+        Builds the conditional request headers for a feed.
+
+        Args:
+            url (str): The RSS feed URL.
+
+        Returns:
+            dict: 'If-None-Match' / 'If-Modified-Since' headers for the last stored response.
+        """
+        headers = {}
+        with self._lock:
+            entry = self.validators.get(url, {})
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def is_unchanged(self, url, status, body):
+        """
+        Checks whether a response carries nothing new, counting it as a hit or a miss.
+
+        Args:
+            url (str): The RSS feed URL.
+            status (int): The HTTP status code of the response.
+            body (bytes): The response body.
+
+        Returns:
+            bool: True for a 304 or for a body identical to the last one seen.
+        """
+        with self._lock:
+            if status == 304:
+                self.hits += 1
+                return True
+            entry = self.validators.get(url, {})
+            if body and entry.get('body_hash') == self.body_hash(body):
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def update(self, url, headers, body):
+        """
+        Records the validators of a response that was parsed; flush() writes them to disk.
+
+        Args:
+            url (str): The RSS feed URL.
+            headers (Mapping): The response headers.
+            body (bytes): The response body.
+        """
+        with self._lock:
+            self.validators[url] = {
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'body_hash': self.body_hash(body),
+            }
+            self._dirty = True
+
+    def stats(self):
+        """Return the hit/miss counters and the hit rate."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    @staticmethod
+    def body_hash(body):
+        return hashlib.sha256(body).hexdigest()
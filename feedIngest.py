@@ -0,0 +1,190 @@
+import asyncio
+import queue
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from metrics import metrics
+
+_DONE = object()
+
+# Outcome of the last fetch of each feed, kept in FeedIngestEngine.last_status
+FEED_CHANGED = "changed"
+FEED_UNCHANGED = "unchanged"
+FEED_FAILED = "failed"
+
+
+class FeedIngestEngine:
+    """
+    Fetches RSS feeds on a background asyncio loop with one pooled HTTP session that
+    is kept across polls, a concurrency limit per host, a deadline per request and
+    retries with exponential backoff.
+    """
+
+    def __init__(self, feed_cache, parse_feed, per_host_limit=4, total_limit=64,
+                 timeout=20, retries=2, backoff=1.0):
+        """
+        Args:
+            feed_cache (ValidatorStore): Store of conditional request validators.
+            parse_feed (callable): Turns (url, body) into a list of articles.
+            per_host_limit (int): Maximum number of requests in flight to one host.
+            total_limit (int): Size of the shared connection pool.
+            timeout (float): Deadline in seconds for a single request.
+            retries (int): Number of retries after the first failed attempt.
+            backoff (float): Base delay in seconds, doubled on every retry.
+        """
+        self.feed_cache = feed_cache
+        self.parse_feed = parse_feed
+        self.per_host_limit = per_host_limit
+        self.total_limit = total_limit
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.last_status = {}
+        self.last_bytes = {}
+        self._host_limits = {}
+        self._session = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="feed-ingest", daemon=True)
+        self._thread.start()
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.total_limit, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def _download(self, url):
+        session = await self._get_session()
+        headers = self.feed_cache.request_headers(url)
+        async with self._host_limit(url):
+            async with session.get(url, headers=headers) as response:
+                body = await response.read()
+                if response.status == 429 or response.status >= 500:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, response.history,
+                        status=response.status, message=response.reason,
+                    )
+                return response.status, response.headers, body
+
+    async def fetch(self, url):
+        """
+        Fetches and parses one feed, retrying transient failures.
+
+        Args:
+            url (str): The RSS feed URL.
+
+        Returns:
+            tuple: The URL and its list of new articles (empty when unchanged or failed).
+        """
+        start = time.perf_counter()
+        self.last_bytes[url] = 0
+        url, articles = await self._fetch(url)
+        metrics.record_fetch(url, time.perf_counter() - start, self.last_status[url],
+                             self.last_bytes[url], len(articles))
+        return url, articles
+
+    async def _fetch(self, url):
+        for attempt in range(self.retries + 1):
+            try:
+                status, headers, body = await self._download(url)
+                self.last_bytes[url] = len(body)
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    print(f"Error fetching {url}: {e!r}")
+                    self.last_status[url] = FEED_FAILED
+                    return url, []
+                # Exponential backoff with jitter so retries don't land together
+                await asyncio.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+        if self.feed_cache.is_unchanged(url, status, body):
+            self.last_status[url] = FEED_UNCHANGED
+            return url, []
+        if status >= 400:
+            print(f"Error fetching {url}: HTTP {status}")
+            self.last_status[url] = FEED_FAILED
+            return url, []
+
+        # Parsing is CPU-bound, so keep it off the event loop
+        loop = asyncio.get_running_loop()
+        try:
+            articles = await loop.run_in_executor(None, self.parse_feed, url, body)
+        except Exception as e:
+            print(f"Error parsing {url}: {e!r}")
+            self.last_status[url] = FEED_FAILED
+            return url, []
+        self.feed_cache.update(url, headers, body)
+        self.last_status[url] = FEED_CHANGED
+        return url, articles
+
+    async def stream(self, rss_urls):
+        """
+        Fetches feeds concurrently, yielding each one as soon as it completes.
+
+        Args:
+            rss_urls (list): List of RSS feed URLs.
+
+        Yields:
+            tuple: The URL and its list of new articles.
+        """
+        tasks = [asyncio.ensure_future(self.fetch(url)) for url in rss_urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+            # One write of the validators per poll, and not on the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self.feed_cache.flush)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def iter_feeds(self, rss_urls):
+        """
+        Synchronous version of stream() for callers outside the event loop.
+
+        Args:
+            rss_urls (list): List of RSS feed URLs.
+
+        Yields:
+            tuple: The URL and its list of new articles, in completion order.
+        """
+        results = queue.Queue()
+
+        async def produce():
+            try:
+                async for item in self.stream(rss_urls):
+                    results.put(item)
+            finally:
+                results.put(_DONE)
+
+        future = asyncio.run_coroutine_threadsafe(produce(), self._loop)
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            yield item
+        future.result()
+
+    def close(self):
+        """Close the pooled session and stop the background loop."""
+        async def shutdown():
+            if self._session is not None:
+                await self._session.close()
+
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._loop.close()
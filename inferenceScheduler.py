@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+
+from modelRegistry import resident_memory
+from metrics import metrics, SIZE_BUCKETS
+
+
+def available_cores():
+    """Return the number of CPU cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on Windows / macOS
+        return os.cpu_count() or 1
+
+
+class InferenceScheduler:
+    """
+    Runs transformer pipelines over many inputs in length-bucketed batches.
+
+    Inputs are sorted by token length so each batch holds similar lengths and
+    wastes little padding, and the batch size is chosen so the padded batch fits
+    a memory budget. Torch's intra-op and inter-op thread counts are pinned to
+    the cores available. Throughput and peak resident memory are recorded per task.
+    """
+
+    def __init__(self, memory_budget_mb=1024, bytes_per_token=256 * 1024, max_batch_size=64, max_length=1024):
+        """
+        Args:
+            memory_budget_mb (float): Activation memory one batch may use.
+            bytes_per_token (int): Estimated activation memory per padded token.
+            max_batch_size (int): Upper bound on the batch size.
+            max_length (int): Token length inputs are truncated to.
+        """
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.bytes_per_token = bytes_per_token
+        self.max_batch_size = max_batch_size
+        self.max_length = max_length
+        self.task_stats = {}
+        self._threads_configured = False
+        self._lock = threading.Lock()
+
+    def configure_threads(self, cores=None, force=False):
+        """Pin torch's thread pools to the available cores (once per process unless forced)."""
+        if self._threads_configured and not force:
+            return
+        self._threads_configured = True
+        cores = cores or available_cores()
+        try:
+            import torch
+        except ImportError:
+            return
+        torch.set_num_threads(cores)
+        try:
+            torch.set_num_interop_threads(max(1, min(4, cores // 4)))
+        except RuntimeError:
+            pass  # Can only be set before torch runs any parallel work
+
+    def token_lengths(self, texts, tokenizer=None):
+        """Return the token length of each text, estimated from words without a tokenizer."""
+        if tokenizer is not None:
+            encoded = tokenizer(list(texts), add_special_tokens=True, truncation=True, max_length=self.max_length)
+            return [len(ids) for ids in encoded['input_ids']]
+        return [min(self.max_length, int(len(text.split()) * 1.3) + 2) for text in texts]
+
+    def batches(self, texts, tokenizer=None, sequences_per_item=1):
+        """
+        Groups inputs into length-bucketed batches that fit the memory budget.
+
+        Args:
+            texts (list): The inputs.
+            tokenizer (object): Tokenizer used to measure lengths.
+            sequences_per_item (int): Model sequences per input, e.g. one per label for zero-shot.
+
+        Returns:
+            list: Lists of input indices, one list per batch.
+        """
+        lengths = self.token_lengths(texts, tokenizer)
+        order = sorted(range(len(texts)), key=lengths.__getitem__)
+        batches = []
+        batch = []
+        for index in order:
+            # Sorted ascending, so this input is the longest of the batch it joins
+            padded_tokens = (len(batch) + 1) * sequences_per_item * lengths[index]
+            if batch and (len(batch) >= self.max_batch_size or padded_tokens * self.bytes_per_token > self.memory_budget):
+                batches.append(batch)
+                batch = []
+            batch.append(index)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def run(self, task, texts, infer, tokenizer=None, sequences_per_item=1):
+        """
+        Runs `infer` over all inputs batch by batch, returning results in input order.
+
+        Args:
+            task (str): Name the statistics are recorded under, e.g. "classifier".
+            texts (list): The inputs.
+            infer (callable): Takes a list of inputs and returns one result per input.
+            tokenizer (object): Tokenizer used to measure lengths.
+            sequences_per_item (int): Model sequences per input.
+
+        Returns:
+            list: One result per input.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        self.configure_threads()
+        results = [None] * len(texts)
+        start = time.perf_counter()
+        peak_rss = resident_memory() or 0
+        batch_count = 0
+        for batch in self.batches(texts, tokenizer, sequences_per_item):
+            for index, result in zip(batch, infer([texts[i] for i in batch])):
+                results[index] = result
+            metrics.observe("news_inference_batch_size", len(batch), buckets=SIZE_BUCKETS, task=task)
+            batch_count += 1
+            peak_rss = max(peak_rss, resident_memory() or 0)
+        seconds = time.perf_counter() - start
+        self._record(task, len(texts), batch_count, seconds, peak_rss)
+        metrics.inc("news_inference_items_total", len(texts), task=task)
+        metrics.set("news_inference_items_per_second", len(texts) / seconds if seconds else 0.0, task=task)
+        metrics.event("inference", task=task, items=len(texts), batches=batch_count, seconds=round(seconds, 6))
+        return results
+
+    def _record(self, task, items, batch_count, seconds, peak_rss):
+        with self._lock:
+            stats = self.task_stats.setdefault(task, {'items': 0, 'batches': 0, 'seconds': 0.0, 'peak_rss_bytes': 0})
+            stats['items'] += items
+            stats['batches'] += batch_count
+            stats['seconds'] += seconds
+            stats['peak_rss_bytes'] = max(stats['peak_rss_bytes'], peak_rss)
+
+    def stats(self):
+        """Return items, batches, items per second and peak resident memory per task."""
+        with self._lock:
+            return {
+                task: dict(stats, items_per_second=stats['items'] / stats['seconds'] if stats['seconds'] else 0.0)
+                for task, stats in self.task_stats.items()
+            }
+
+
+# Shared by the classifier and the summarizer
+scheduler = InferenceScheduler()
@@ -0,0 +1,137 @@
+from collections import defaultdict
+
+import numpy as np
+
+
+class LabelScores:
+    """
+    Per-article score vectors over every label ever used, stored as float16 arrays.
+
+    Vector positions follow the store's score_labels table, so a label added later
+    simply extends the vectors, and older vectors read as NaN (not scored yet) in
+    the new positions. Scores are independent per (title, label) pair, which makes
+    removing labels or changing a threshold a pure re-ranking, and adding a label
+    only needs inference for the new pairs.
+
+    Every vector is tagged with the scorer that produced it (NLI entailment
+    probabilities and prototype cosine similarities aren't on the same scale), and
+    scores from different scorers are never merged into one vector.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.vocabulary = store.score_labels()
+        self.positions = {label: i for i, label in enumerate(self.vocabulary)}
+
+    def ensure_labels(self, labels):
+        """Adds any labels not yet in the vocabulary."""
+        new_labels = [label for label in labels if label not in self.positions]
+        if new_labels:
+            self.store.add_score_labels(new_labels)
+            self.vocabulary = self.store.score_labels()
+            self.positions = {label: i for i, label in enumerate(self.vocabulary)}
+
+    def decode(self, packed):
+        """Unpack a stored vector into a float32 array as long as the vocabulary."""
+        vector = np.full(len(self.vocabulary), np.nan, dtype=np.float32)
+        if packed:
+            values = np.frombuffer(packed, dtype=np.float16)
+            vector[:len(values)] = values
+        return vector
+
+    def encode(self, vector):
+        return np.asarray(vector, dtype=np.float16).tobytes()
+
+    def put(self, link, label_scores, scorer=None):
+        """
+        Merges scores into an article's stored vector (written on the next flush).
+
+        Args:
+            link (str): The article link.
+            label_scores (dict): Label mapped to its score.
+            scorer (str): The scorer of the scores; a stored vector from another
+                scorer is replaced instead of merged.
+        """
+        self.ensure_labels(label_scores)
+        packed, stored_scorer = self.store.get_scores(link)
+        vector = self.decode(packed if stored_scorer == scorer else None)
+        for label, score in label_scores.items():
+            vector[self.positions[label]] = score
+        self.store.put_scores(link, self.encode(vector), scorer)
+
+    def put_result(self, link, result):
+        """Stores a classifier result ({'labels': [...], 'scores': [...], 'scorer': ...}) for an article."""
+        self.put(link, dict(zip(result['labels'], result['scores'])), result.get('scorer'))
+
+    def copy(self, source_link, link):
+        """Gives an article the stored vector of another one, e.g. of its story's first article."""
+        packed, scorer = self.store.get_scores(source_link)
+        if packed is not None:
+            self.store.put_scores(link, packed, scorer)
+
+    def matrix(self, labels, scorer=None):
+        """
+        Loads the scores of every stored article for some labels.
+
+        Args:
+            labels (list): The labels to load, in column order.
+            scorer (str): When given, vectors from any other scorer load as unscored.
+
+        Returns:
+            tuple: Links, titles and an (articles x labels) float32 matrix, NaN where unscored.
+        """
+        self.ensure_labels(labels)
+        columns = [self.positions[label] for label in labels]
+        links, titles, rows = [], [], []
+        for link, title, packed, stored_scorer in self.store.iter_scores():
+            links.append(link)
+            titles.append(title)
+            rows.append(self.decode(packed if scorer is None or stored_scorer == scorer else None)[columns])
+        matrix = np.vstack(rows) if rows else np.empty((0, len(labels)), dtype=np.float32)
+        return links, titles, matrix
+
+    def missing_pairs(self, labels, scorer=None):
+        """
+        Finds the (title, label) pairs that have never been scored.
+
+        Args:
+            labels (list): The labels of the taxonomy.
+            scorer (str): When given, every label of a vector from another scorer
+                (or of unknown origin) counts as missing, so it is rescored whole.
+
+        Returns:
+            dict: Tuple of missing labels mapped to the (link, title) pairs missing exactly those.
+        """
+        links, titles, matrix = self.matrix(labels, scorer)
+        missing = defaultdict(list)
+        for i, row in enumerate(np.isnan(matrix)):
+            if row.any():
+                missing[tuple(label for label, absent in zip(labels, row) if absent)].append((links[i], titles[i]))
+        return missing
+
+    def rank(self, labels, top_k=1, threshold=None, fallback_label="Other", scorer=None):
+        """
+        Re-ranks every stored article over a set of labels without running a model.
+
+        Args:
+            labels (list): The labels of the taxonomy.
+            top_k (int): Number of labels returned per article.
+            threshold (float): Labels scoring below this are dropped.
+            fallback_label (str): Label used when nothing passes the threshold.
+            scorer (str): When given, only vectors from this scorer are ranked, so
+                one threshold applies to scores on one scale.
+
+        Returns:
+            dict: Link mapped to its best labels, best first.
+        """
+        links, _, matrix = self.matrix(labels, scorer)
+        scores = np.where(np.isnan(matrix), -np.inf, matrix)
+        order = np.argsort(-scores, axis=1)[:, :top_k]
+        ranked = {}
+        for i, link in enumerate(links):
+            if scorer is not None and np.isnan(matrix[i]).all():
+                continue  # Another scorer's vector, which the caller didn't rescore
+            best = [labels[j] for j in order[i]
+                    if np.isfinite(scores[i, j]) and (threshold is None or scores[i, j] >= threshold)]
+            ranked[link] = best or [fallback_label]
+        return ranked
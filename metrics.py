@@ -0,0 +1,192 @@
+import contextlib
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("newsFeedParser.metrics")
+
+# Prometheus text file written by export(), e.g. for node_exporter's textfile collector
+METRICS_FILE = os.environ.get("NEWS_METRICS_FILE", "news_metrics.prom")
+# Comma-separated stage names to run under cProfile ("all" for every stage)
+PROFILE_STAGES = {stage.strip() for stage in os.environ.get("NEWS_PROFILE", "").split(",") if stage.strip()}
+PROFILE_DIR = os.environ.get("NEWS_PROFILE_DIR", "profiles")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Metrics:
+    """
+    Counters, gauges and histograms for the pipeline, logged as structured (JSON)
+    events and exported in the Prometheus text format.
+
+    Values computed elsewhere, such as cache hit rates, are read when exporting
+    through collectors: named callables returning (name, labels, value) gauges.
+    """
+
+    def __init__(self):
+        self.counters = {}    # (name, labels) -> value
+        self.gauges = {}      # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket bounds, bucket counts, sum, count]
+        self.collectors = {}
+        self._profile_runs = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [buckets, [0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(histogram[0]):
+                if value <= bound:
+                    histogram[1][i] += 1
+            histogram[2] += value
+            histogram[3] += 1
+
+    def event(self, name, **fields):
+        """Logs one structured event as a JSON line."""
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(dict(event=name, time=round(time.time(), 3), **fields), default=str))
+
+    def set_collector(self, name, collect):
+        """
+        Registers (or replaces) a callable polled on export.
+
+        Args:
+            name (str): Identifies the collector.
+            collect (callable): Returns an iterable of (metric name, labels dict, value) gauges.
+        """
+        with self._lock:
+            self.collectors[name] = collect
+
+    @contextlib.contextmanager
+    def stage(self, name, **labels):
+        """
+        Times a block as a pipeline stage, logging it and recording its duration.
+
+        The block can add fields to the logged event through the yielded dict,
+        e.g. item counts. The stage runs under cProfile when it is listed in
+        NEWS_PROFILE, and each run's profile is written to NEWS_PROFILE_DIR.
+
+        Args:
+            name (str): The stage name, e.g. "fetch_news".
+            labels: Extra metric labels.
+        """
+        fields = {}
+        profiler = self._start_profile(name)
+        start = time.perf_counter()
+        try:
+            yield fields
+        except Exception:
+            self.inc("news_stage_errors_total", stage=name, **labels)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler is not None:
+                self._save_profile(name, profiler)
+            self.observe("news_stage_seconds", seconds, stage=name, **labels)
+            self.event("stage", stage=name, seconds=round(seconds, 6), **labels, **fields)
+
+    def _start_profile(self, name):
+        if name not in PROFILE_STAGES and "all" not in PROFILE_STAGES:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # Another profiler is already active, e.g. an enclosing stage
+            return None
+        return profiler
+
+    def _save_profile(self, name, profiler):
+        profiler.disable()
+        with self._lock:
+            run = self._profile_runs[name] = self._profile_runs.get(name, 0) + 1
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{name}-{os.getpid()}-{run}.prof")
+        profiler.dump_stats(path)
+        self.event("profile", stage=name, path=path)
+
+    def record_fetch(self, feed, seconds, status, size=0, entries=0):
+        """
+        Records one feed poll.
+
+        Args:
+            feed (str): The feed URL.
+            seconds (float): Time taken, including parsing.
+            status (str): FEED_CHANGED, FEED_UNCHANGED or FEED_FAILED.
+            size (int): Bytes downloaded.
+            entries (int): Articles parsed.
+        """
+        self.observe("news_feed_fetch_seconds", seconds, feed=feed)
+        self.inc("news_feed_fetches_total", feed=feed, status=status)
+        self.inc("news_feed_bytes_total", size, feed=feed)
+        self.inc("news_feed_entries_total", entries, feed=feed)
+        self.event("feed_fetch", feed=feed, status=status, seconds=round(seconds, 6), bytes=size, entries=entries)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        gauges = dict(self.gauges)
+        for collector_name, collect in list(self.collectors.items()):
+            try:
+                for name, labels, value in collect():
+                    gauges[(name, tuple(sorted(labels.items())))] = value
+            except Exception as e:
+                logger.warning("Metrics collector %s failed: %r", collector_name, e)
+
+        lines = []
+        with self._lock:
+            for kind, values in (("counter", self.counters), ("gauge", gauges)):
+                for name in sorted({name for name, _ in values}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (metric, labels), value in sorted(values.items()):
+                        if metric == name and value is not None:
+                            lines.append(f"{name}{_format_labels(labels)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), (buckets, counts, total, count) in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, bucket_count in zip(buckets, counts):
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {bucket_count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, file_path=None):
+        """Writes the metrics file atomically, so a scraper never reads half of it."""
+        file_path = file_path or METRICS_FILE
+        tmp_path = f"{file_path}.tmp"
+        try:
+            with open(tmp_path, "w") as file:
+                file.write(self.render())
+            os.replace(tmp_path, file_path)
+        except OSError as e:
+            print(f"Error writing metrics to {file_path}: {e}")
+
+
+# Shared by every module in the process
+metrics = Metrics()
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+# Model names shared by all the scripts
+CLASSIFIER_MODEL = "facebook/bart-large-mnli"
+SUMMARIZER_MODEL = "facebook/bart-large-cnn"
+SENTENCE_MODEL = "all-MiniLM-L6-v2"
+
+# "pytorch" (reference), "int8" (dynamically quantised) or "onnx" (ONNX Runtime),
+# used for the classifier and the summarizer; see optimizedModels
+INFERENCE_BACKEND = os.environ.get("NEWS_INFERENCE_BACKEND", "pytorch")
+
+
+def resident_memory():
+    """
+    Returns the resident memory of this process in bytes, or None if it can't be read.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Loads models on first use and shares them across every module in the process.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._models = {}
+        self._stats = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        """
+        Registers how to build a model without loading it.
+
+        Args:
+            name (str): The name the model is requested by.
+            factory (callable): Builds and returns the model.
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """
+        Returns a model, loading it the first time it is requested.
+
+        Args:
+            name (str): The registered model name.
+
+        Returns:
+            object: The loaded model.
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._locks[name]:  # Concurrent callers wait for a single load
+            if name not in self._models:
+                rss_before = resident_memory()
+                start = time.perf_counter()
+                self._models[name] = self._factories[name]()
+                load_time = time.perf_counter() - start
+                rss_after = resident_memory()
+                self._stats[name] = {
+                    'load_seconds': load_time,
+                    'rss_bytes': rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+                }
+                print(f"Loaded model '{name}' in {load_time:.1f}s.")
+            return self._models[name]
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def warm(self, names):
+        """
+        Loads models in a background thread, e.g. while feeds are being fetched.
+
+        Args:
+            names (list): The registered model names to load.
+
+        Returns:
+            threading.Thread: The warming thread.
+        """
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Error warming model '{name}': {e}")
+
+        thread = threading.Thread(target=load_all, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """Return the load time and resident memory added by each loaded model."""
+        return dict(self._stats)
+
+
+def _build_classifier():
+    from optimizedModels import build_pipeline
+    return build_pipeline("zero-shot-classification", CLASSIFIER_MODEL, INFERENCE_BACKEND)
+
+
+def _build_summarizer():
+    from optimizedModels import build_pipeline
+    return build_pipeline("summarization", SUMMARIZER_MODEL, INFERENCE_BACKEND)
+
+
+def _build_sentence_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(SENTENCE_MODEL)
+
+
+registry = ModelRegistry()
+registry.register("classifier", _build_classifier)
+registry.register("summarizer", _build_summarizer)
+registry.register("sentence", _build_sentence_model)
+
+
+def get_classifier():
+    return registry.get("classifier")
+
+
+def get_summarizer():
+    return registry.get("summarizer")
+
+
+def get_sentence_model():
+    return registry.get("sentence")
@@ -0,0 +1,189 @@
+import heapq
+import json
+import logging
+import os
+import random
+import signal
+import threading
+import time
+
+from feedIngest import FEED_CHANGED, FEED_FAILED
+from metrics import metrics
+from modelRegistry import registry
+from newsScraper import NewsCategorizer, RSS_FEEDS, CLASSIFIER_BACKEND, EMBEDDING_INDEX
+
+
+class AdaptiveScheduler:
+    """
+    Gives every feed its own polling interval, adapted to how often it publishes.
+
+    The interval aims at about two polls per new entry, learned from the gaps
+    between entry timestamps. Feeds that fail or come back unchanged back off
+    exponentially, and every interval is jittered so feeds don't poll in lockstep.
+    """
+
+    def __init__(self, rss_urls, initial_interval=300, min_interval=60, max_interval=6 * 60 * 60,
+                 jitter=0.1, state_path="feed_schedule.json"):
+        """
+        Args:
+            rss_urls (list): List of RSS feed URLs.
+            initial_interval (float): Seconds between polls of a feed with no history.
+            min_interval (float): Shortest allowed interval in seconds.
+            max_interval (float): Longest allowed interval in seconds.
+            jitter (float): Random spread applied to every interval, as a fraction.
+            state_path (str): JSON file the learned intervals are kept in.
+        """
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.state_path = state_path
+        self.feeds = {url: {'interval': initial_interval, 'failures': 0, 'unchanged': 0} for url in rss_urls}
+        self.load()
+
+        # Spread the first polls over one initial interval rather than firing them all at once
+        now = time.time()
+        self._queue = [(now + random.uniform(0, min(initial_interval, 30)), url) for url in self.feeds]
+        heapq.heapify(self._queue)
+
+    def load(self):
+        """Restore learned intervals from disk for feeds still being polled."""
+        try:
+            with open(self.state_path, "r") as file:
+                content = file.read().strip()
+                state = json.loads(content) if content else {}
+        except (FileNotFoundError, ValueError):
+            state = {}
+        for url, feed in state.items():
+            if url in self.feeds:
+                self.feeds[url].update(feed)
+
+    def save(self):
+        """Write the learned intervals to disk, replacing the old file in one step."""
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.feeds, file, indent=4)
+        os.replace(temp_path, self.state_path)
+
+    def due(self, now=None):
+        """Return the feeds whose next poll time has passed, removing them from the queue."""
+        now = time.time() if now is None else now
+        urls = []
+        while self._queue and self._queue[0][0] <= now:
+            urls.append(heapq.heappop(self._queue)[1])
+        return urls
+
+    def seconds_until_next(self, now=None):
+        now = time.time() if now is None else now
+        return max(0.0, self._queue[0][0] - now) if self._queue else self.max_interval
+
+    def publish_interval(self, articles):
+        """
+        Estimates the average gap between entries of a feed.
+
+        Args:
+            articles (list): Articles from one fetch of the feed, with 'published_ts'.
+
+        Returns:
+            float: Seconds between entries, or None with too few timestamps.
+        """
+        timestamps = sorted({article['published_ts'] for article in articles if article.get('published_ts')})
+        if len(timestamps) < 2:
+            return None
+        return (timestamps[-1] - timestamps[0]) / (len(timestamps) - 1)
+
+    def record(self, url, status, articles, now=None):
+        """
+        Updates a feed's interval after a poll and queues its next poll.
+
+        Args:
+            url (str): The RSS feed URL.
+            status (str): FEED_CHANGED, FEED_UNCHANGED or FEED_FAILED.
+            articles (list): Articles returned by the poll.
+            now (float): Epoch seconds of the poll, defaults to the current time.
+
+        Returns:
+            float: Seconds until the feed is polled again.
+        """
+        now = time.time() if now is None else now
+        feed = self.feeds[url]
+        if status == FEED_FAILED:
+            feed['failures'] += 1
+            interval = feed['interval'] * (2 ** feed['failures'])
+        elif status == FEED_CHANGED:
+            feed['failures'] = 0
+            feed['unchanged'] = 0
+            gap = self.publish_interval(articles)
+            # Smooth towards two polls per published entry
+            feed['interval'] = 0.5 * feed['interval'] + 0.5 * (gap / 2) if gap else feed['interval']
+            interval = feed['interval']
+        else:
+            feed['failures'] = 0
+            feed['unchanged'] += 1
+            feed['interval'] = feed['interval'] * 1.5
+            interval = feed['interval']
+
+        feed['interval'] = min(max(feed['interval'], self.min_interval), self.max_interval)
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        delay = interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        heapq.heappush(self._queue, (now + delay, url))
+        return delay
+
+
+def run_daemon(categorizer, scheduler, expire_every=60 * 60, stop_event=None):
+    """
+    Polls feeds as they fall due, classifies new articles and stores them, until stopped.
+
+    Args:
+        categorizer (NewsCategorizer): Fetches, classifies and stores articles.
+        scheduler (AdaptiveScheduler): Decides when each feed is polled.
+        expire_every (float): Seconds between retention passes.
+        stop_event (threading.Event): Set to stop the daemon; SIGINT/SIGTERM also set it.
+    """
+    stop_event = stop_event or threading.Event()
+
+    def request_stop(signum, frame):
+        print("Shutting down...")
+        stop_event.set()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+    next_expiry = time.time() + expire_every
+    try:
+        while not stop_event.is_set():
+            due = scheduler.due()
+            if due:
+                for url, articles in categorizer.stream_news(due):
+                    status = categorizer.ingest_engine.last_status.get(url, FEED_FAILED)
+                    delay = scheduler.record(url, status, articles)
+                    if articles:
+                        categorised = categorizer.categorise_articles_with_ai(articles)
+                        new_count = sum(len(items) for items in categorised.values())
+                        print(f"{url}: {new_count} new articles, next poll in {delay:.0f}s.")
+                scheduler.save()
+                metrics.export()
+            if time.time() >= next_expiry:
+                categorizer.expire_articles()
+                next_expiry = time.time() + expire_every
+            stop_event.wait(min(scheduler.seconds_until_next(), max(0.0, next_expiry - time.time())))
+    finally:
+        # Flush everything so a restart picks up where this run stopped
+        scheduler.save()
+        categorizer.close()
+        metrics.export()
+
+
+def main():
+    # Structured metric events go to the log as JSON lines
+    logging.basicConfig(level=os.environ.get("NEWS_LOG_LEVEL", "INFO"), format="%(asctime)s %(name)s %(message)s")
+    categorizer = NewsCategorizer()
+    registry.warm(["sentence", "classifier"] if CLASSIFIER_BACKEND == "prototype" or EMBEDDING_INDEX else ["classifier"])
+    scheduler = AdaptiveScheduler(RSS_FEEDS)
+    print(f"Polling {len(RSS_FEEDS)} feeds. Press Ctrl+C to stop.")
+    run_daemon(categorizer, scheduler)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+class NewsPipeline:
+    """
+    Streams fetch -> classify -> display through bounded queues.
+
+    A fetcher thread pushes articles as each feed completes, a classifier thread
+    groups them into micro-batches, and the Tk main loop polls for classified
+    batches with after(), so the first articles appear after the first feed and
+    one batch instead of after the whole run.
+    """
+
+    def __init__(self, categorizer, batch_size=16, max_wait=0.5, max_pending=1000, poll_interval_ms=100):
+        """
+        Args:
+            categorizer (NewsCategorizer): Fetches, classifies and stores articles.
+            batch_size (int): Largest number of titles classified at once.
+            max_wait (float): Seconds to wait for a batch to fill before classifying it anyway.
+            max_pending (int): Bound of the fetched-article queue, which holds back the fetcher.
+            poll_interval_ms (int): How often the GUI checks for classified batches.
+        """
+        self.categorizer = categorizer
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.poll_interval_ms = poll_interval_ms
+        self.fetched = queue.Queue(maxsize=max_pending)
+        self.classified = queue.Queue(maxsize=64)
+        self._stop = threading.Event()
+        self._threads = []
+        self.finished = False
+
+    def start(self, rss_urls):
+        """Starts fetching and classifying in background threads."""
+        self._threads = [
+            threading.Thread(target=self._fetch, args=(rss_urls,), name="pipeline-fetch", daemon=True),
+            threading.Thread(target=self._classify, name="pipeline-classify", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _put(self, target, item):
+        # Blocking put that still notices stop()
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fetch(self, rss_urls):
+        try:
+            for url, articles in self.categorizer.stream_news(rss_urls):
+                for article in articles:
+                    if not self._put(self.fetched, article):
+                        return
+                if self._stop.is_set():
+                    return
+        except Exception as e:
+            print(f"Error fetching news: {e}")
+        finally:
+            self._put(self.fetched, _DONE)
+
+    def _next_batch(self):
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            timeout = 0.2 if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.fetched.get(timeout=timeout)
+            except queue.Empty:
+                if deadline is not None:
+                    break  # Batch waited long enough, classify what we have
+                continue
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.max_wait
+        return batch, False
+
+    def _classify(self):
+        try:
+            done = False
+            while not done and not self._stop.is_set():
+                batch, done = self._next_batch()
+                if batch:
+                    categorised = self.categorizer.categorise_articles_with_ai(batch)
+                    if categorised and not self._put(self.classified, categorised):
+                        return
+        except Exception as e:
+            print(f"Error classifying news: {e}")
+        finally:
+            self._put(self.classified, _DONE)
+
+    def attach(self, root, category_tree):
+        """
+        Polls for classified batches from the Tk main loop and adds them to the tree.
+
+        Args:
+            root (tk.Tk): The running Tk root window.
+            category_tree (CategoryTree): The tree the articles are added to.
+        """
+        def poll():
+            while True:
+                try:
+                    item = self.classified.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    self.finished = True
+                    print("All feeds classified.")
+                    return
+                for category, articles in item.items():
+                    category_tree.add_articles(articles, category)
+            root.after(self.poll_interval_ms, poll)
+
+        root.after(self.poll_interval_ms, poll)
+
+    def stop(self):
+        """Stops the background threads and waits for them to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
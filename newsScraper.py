@@ -1,26 +1,101 @@
 import json
 from collections import defaultdict
-import feedparser
-from transformers import pipeline
+import requests
 import webbrowser
 import tkinter as tk
 from tkinter import ttk
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import datetime
 import pytz
-
-# Load a pre-trained text classification model from HuggingFace
-classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+import sys
+import threading
+import time
+from feedCache import ValidatorStore
+from feedIngest import FeedIngestEngine, FEED_CHANGED, FEED_UNCHANGED, FEED_FAILED
+from modelRegistry import registry, get_classifier
+from classifierBackends import make_backend
+from classifierPool import ClassifierPool
+from articleStore import ArticleStore, ArticleMap
+from articleRecord import Article
+from retention import RetentionManager, RetentionPolicy
+from dateParsing import parse_published
+from feedParsing import parse_entries
+from newsTree import CategoryTree, row_options
+from newsPipeline import NewsPipeline
+from storyIndex import SHINGLE_VERSION, StoryIndex, shingles
+from classificationCache import ClassificationCache
+from labelScores import LabelScores
+from embeddingIndex import EmbeddingIndex
+from searchIndex import SearchIndex
+from metrics import metrics
 
 # Define categories for classification
 CATEGORIES = ["Politics", "Technology", "Sports", "Health", "Crime", "Business", "World", "Culture", "Weather", "UK"]
 
+# Feeds polled by the GUI and by the headless daemon
+RSS_FEEDS = [
+    "https://feeds.bbci.co.uk/news/rss.xml",
+    "https://rss.cnn.com/rss/edition_world.rss",
+    "https://www.aljazeera.com/xml/rss/all.xml",
+    "https://news.google.com/rss/search?q=site%3Areuters.com&hl=en-US&gl=US&ceid=US%3Aen",
+]
+
+# Classifier backend: "nli" (zero-shot bart-large-mnli) or "prototype" (MiniLM label prototypes, NLI for close calls)
+CLASSIFIER_BACKEND = "nli"
+
+# Worker processes used to classify large backlogs (0 classifies in this process)
+CLASSIFIER_WORKERS = 0
+
+# Keep MiniLM embeddings of every stored title for povFinder's related-article search
+EMBEDDING_INDEX = True
+
+# Search box of the news window: date filters, most rows shown, and a hint of the query syntax
+SEARCH_PERIODS = {"Any time": None, "Past 24 hours": 24 * 60 * 60, "Past week": 7 * 24 * 60 * 60, "Past month": 30 * 24 * 60 * 60}
+SEARCH_LIMIT = 500
+SEARCH_HINT = "e.g. storm category:weather after:2025-01-10"
+SEARCH_INDEXING = "Indexing articles for search..."
+ALL_SOURCES = "All sources"
+
+# How often the news window removes articles whose retention window has passed
+EXPIRE_INTERVAL_MS = 60 * 1000
+
+
+def __getattr__(name):
+    # The classifier is loaded on first use instead of at import time
+    if name == "classifier":
+        return get_classifier()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 class NewsCategorizer:
-    def __init__(self, file_path="classified_articles.json"):
+    def __init__(self, file_path="classified_articles.json", backend=None, db_path="articles.db", retention_policy=None,
+                 embedding_index=None):
         self.file_path = file_path
-        self.classified_articles = set()
-        self.articles_with_categories = {}
+        self.classifier_backend = backend or make_backend(CLASSIFIER_BACKEND, CATEGORIES, file_path)
+        if backend is None and CLASSIFIER_WORKERS:
+            self.classifier_backend = ClassifierPool(self.classifier_backend, CLASSIFIER_WORKERS)
+        self.classification_cache = ClassificationCache(self.classifier_backend.model_name, self.classifier_backend.labels)
+        self.store = ArticleStore(db_path)
+        # A view over the SQLite store rather than an in-memory copy; the store also
+        # answers whether a link was classified before
+        self.articles_with_categories = ArticleMap(self.store)
+        self.label_scores = LabelScores(self.store)
+        # Articles go once they are more than 7 whole days old (isOlder()), i.e. after 8 days,
+        # unless a category or source has its own window
+        self.retention = RetentionManager(self.store, retention_policy or RetentionPolicy(default_days=8))
+        self.feed_cache = ValidatorStore()
+        self.ingest_engine = None
+        self.story_index = StoryIndex()
+        # Off for offline runs (benchmarks, tests) that must not load the sentence model
+        use_embeddings = EMBEDDING_INDEX if embedding_index is None else embedding_index
+        self.embedding_index = EmbeddingIndex(self.store) if use_embeddings else None
+        self.search_index = None  # Built by enable_search() for the GUI
+        self.search_ready = threading.Event()  # Set once the stored articles are in the search index
+        # Held while a batch is classified or articles expire, which both change the story, search
+        # and embedding indexes; the GUI expires articles from its main loop while the pipeline classifies
+        self.update_lock = threading.RLock()
+        metrics.set_collector("news_categorizer", self.cache_metrics)
         self.load_classified_articles()
+        self.load_story_index()
 
     def isOlder(self, published_date):
         """
@@ -35,106 +110,315 @@ class NewsCategorizer:
         # Check if the time difference is greater than 7 days
         return time_difference.days > 7
 
+    def published_timestamp(self, published_str, published_parsed=None):
+        """
+        Convert a published date string to epoch seconds, once, at ingest.
+        If parsing fails, return the current time.
+        """
+        timestamp = parse_published(published_str, published_parsed)
+        if timestamp is None:
+            return int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+        return timestamp
+
+    @metrics.stage("load_classified_articles")
     def load_classified_articles(self):
-        """Load previously classified articles from a JSON file and remove those older than 7 days."""
-        try:
-            with open(self.file_path, "r") as file:
-                # Check if the file is empty
-                content = file.read().strip()
-                if content:  # If there's data in the file, load it
-                    data = json.loads(content)
-                    self.classified_articles = set(data.get("classified_articles", []))
-                    self.articles_with_categories = data.get("articles", {})
-                    
-                    # Ensure all articles have a classification in the loaded JSON
-                    for article in list(self.articles_with_categories.values()):
-                        if 'category' not in article:
-                            print(f"Warning: Article {article['title']} does not have a category.")
-                        # Check if the article is older than 7 days and remove it if so
-                        published_date = self.parse_date(article['published'])
-                        if published_date and self.isOlder(published_date):
-                            print(f"Removing article: {article['title']} (older than 7 days)")
-                            del self.articles_with_categories[article['link']]  # Remove article from the dictionary
-                            self.classified_articles.remove(article['link'])  # Remove from the classified set
-                    
-                    self.save_articles_to_json()
-                    print(f"Loaded {len(self.articles_with_categories)} classified articles.")
-                else:
-                    print("JSON file is empty. Starting with empty data.")
-                    self.classified_articles = set()
-                    self.articles_with_categories = {}
-        except FileNotFoundError:
-            print("No classified articles file found. Starting fresh.")
-            self.classified_articles = set()
-            self.articles_with_categories = {}
-
-    
+        """Open the article store, importing the old JSON file once, and remove expired articles."""
+        imported = self.store.migrate_from_json(self.file_path, self.published_timestamp)
+        if imported:
+            print(f"Migrated {imported} articles from {self.file_path}.")
+        self.expire_articles()
+        print(f"Loaded {len(self.articles_with_categories)} classified articles.")
+
+    def load_story_index(self):
+        """
+        Rebuild the near-duplicate index from the title shingles kept in the store,
+        computing and storing them once for articles that don't have them yet (e.g.
+        ones migrated from JSON) or that have them in an older encoding.
+        """
+        articles = []
+        backfill = {}
+        current = self.store.get_meta('shingle_version') == str(SHINGLE_VERSION)
+        for link, title, story, shingle_set in self.store.iter_shingles():
+            if shingle_set is None or not current:
+                shingle_set = backfill[link] = shingles(title)
+            # Interned, so the index shares one string per link with the Article records
+            articles.append((sys.intern(link), shingle_set, sys.intern(story or link)))
+        self.story_index.add_many(articles)
+        if backfill:
+            self.store.set_shingles(backfill)
+        if not current:
+            self.store.set_meta('shingle_version', str(SHINGLE_VERSION))
+
+    def expire_articles(self):
+        """
+        Removes articles whose retention window has passed. Cheap enough to call
+        periodically during a long-running session, not only at startup.
+
+        Returns:
+            list: Links of the removed articles.
+        """
+        with self.update_lock:
+            removed = self.retention.expire()
+            if removed:
+                self.story_index.remove(removed)
+                if self.embedding_index is not None:
+                    self.embedding_index.remove(removed)
+                if self.search_index is not None:
+                    self.search_index.remove(removed)
+                print(f"Removed {len(removed)} expired articles.")
+        return removed
+
+    @metrics.stage("save_articles_to_json")
     def save_articles_to_json(self):
         """
-        Save the current articles with categories to the JSON file.
+        Export the current articles with categories to a JSON file.
         """
         try:
             with open("articles.json", "w") as f:
-                # Save the current in-memory data (articles with categories)
-                json.dump(self.articles_with_categories, f, default=str, indent=4)
+                articles = {article.link: article.to_dict() for article in self.articles_with_categories.values()}
+                json.dump(articles, f, default=str, indent=4)
                 print("Articles saved to JSON.")
         except Exception as e:
             print(f"Error saving articles to JSON: {e}")
 
+    def close(self):
+        """Flush pending writes and release the store and the ingestion engine."""
+        self.save_classified_articles()
+        self.feed_cache.flush()
+        if self.ingest_engine is not None:
+            self.ingest_engine.close()
+            self.ingest_engine = None
+        self.store.close()
+        self.classification_cache.close()
+        if isinstance(self.classifier_backend, ClassifierPool):
+            self.classifier_backend.close()
+
+    def cache_metrics(self):
+        """Return the cache hit counters as (name, labels, value) gauges for metrics.export()."""
+        classification = self.classification_cache.stats()
+        validators = self.feed_cache.stats()
+        return [
+            ("news_classification_cache_hits", {'layer': 'memory'}, classification['memory_hits']),
+            ("news_classification_cache_hits", {'layer': 'disk'}, classification['disk_hits']),
+            ("news_classification_cache_misses", {}, classification['misses']),
+            ("news_classification_cache_hit_ratio", {}, classification['hit_rate']),
+            ("news_feed_unchanged_hits", {}, validators['hits']),
+            ("news_feed_unchanged_misses", {}, validators['misses']),
+            ("news_feed_unchanged_hit_ratio", {}, validators['hit_rate']),
+        ]
+
+    @metrics.stage("save_classified_articles")
     def save_classified_articles(self):
-        """Save the classified articles to a JSON file."""
-        with open(self.file_path, "w") as file:
-            json.dump({
-                "classified_articles": list(self.classified_articles),
-                "articles": self.articles_with_categories
-            }, file, indent=4)
-        print(f"Saved {len(self.articles_with_categories)} classified articles.")
+        """Commit all pending article writes to the store in one transaction."""
+        written = self.store.flush()
+        print(f"Saved {written} classified articles.")
 
+    @metrics.stage("categorise_articles_with_ai")
     def categorise_articles_with_ai(self, articles):
         """
         Categorises articles using AI-based text classification, skipping already-classified articles.
 
+        Near-duplicate titles (the same story from several feeds or redirect links) are
+        grouped into stories, and each story is classified only once.
+
         Args:
             articles (list): List of news articles.
 
         Returns:
             dict: Categorised news articles.
         """
+        with self.update_lock:
+            return self._categorise_articles(articles)
+
+    def _categorise_articles(self, articles):
         categorised_articles = defaultdict(list)
         new_articles = []
+        batch_links = set()
 
-        # Filter out already-classified articles
+        # Filter out already-classified articles, and repeats within the batch
         for article in articles:
             identifier = article['link']  # Use a unique identifier like 'link'
-            if identifier not in self.classified_articles:
+            if identifier not in batch_links and not self.store.contains(identifier):
                 new_articles.append(article)
-                self.classified_articles.add(identifier)  # Mark article as classified
+                batch_links.add(identifier)
+
+        metrics.inc("news_articles_seen_total", len(articles))
+        metrics.inc("news_articles_new_total", len(new_articles))
 
         # Classify only new articles
         if new_articles:
-            batch_titles = [article['title'] for article in new_articles]
-            results = classifier(batch_titles, candidate_labels=CATEGORIES)
-
-            for article, result in zip(new_articles, results):
-                predicted_category = result['labels'][0]  # Get the category with the highest score
-                categorised_articles[predicted_category].append(article)
-                self.articles_with_categories[article['link']] = {
-                    'title': article['title'],
-                    'category': predicted_category,
-                    'published': article['published'],
-                    'source': article['source'],
-                    'link': article['link']
-                }
-
-            # Save the classified articles to the JSON file after classification
+            categories = self._story_categories(new_articles)
+            to_classify = []
+            for article in new_articles:
+                if article['story'] not in categories:
+                    categories[article['story']] = None  # One title per new story
+                    to_classify.append(article)
+
+            batch_titles = [article['title'] for article in to_classify]
+            batch_sources = {article['title']: article['source'] for article in to_classify}
+            results = self.classify_titles(batch_titles, batch_sources)
+            story_results = {}
+            for article, result in zip(to_classify, results):
+                categories[article['story']] = result['labels'][0]  # Get the category with the highest score
+                story_results[article['story']] = result
+            if len(to_classify) < len(new_articles):
+                print(f"Classified {len(to_classify)} titles for {len(new_articles)} new articles.")
+
+            records = []
+            for article in new_articles:
+                predicted_category = categories[article['story']]
+                record = Article(
+                    article['link'],
+                    article['title'],
+                    source=article['source'],
+                    category=predicted_category,
+                    published_ts=article.get('published_ts') or self.published_timestamp(article['published']),
+                    story=article['story'],
+                    shingles=article['shingles'],
+                )
+                record.expires_at = self.retention.expires_at(record)
+                records.append(record)
+                categorised_articles[predicted_category].append(record)
+                self.articles_with_categories[record.link] = record
+                # Keep the full score vector so taxonomy changes don't need reclassification
+                if article['story'] in story_results:
+                    self.label_scores.put_result(article['link'], story_results[article['story']])
+                else:
+                    self.label_scores.copy(article['story'], article['link'])
+
+            # Commit the classified articles to the store after classification
             self.save_classified_articles()
+            self.update_embeddings(new_articles)
+            if self.search_index is not None:
+                self.search_index.add(records)
 
         return categorised_articles
 
+    def update_taxonomy(self, labels, top_k=1, threshold=None):
+        """
+        Re-ranks every stored article for a new label set, e.g. after CATEGORIES changes.
+
+        Removing labels or changing the threshold only re-ranks the stored score
+        vectors; added labels are scored for the (title, new label) pairs alone.
+        Vectors from another scorer (e.g. NLI fallback results of the prototype
+        backend, whose score() gives cosine similarities) are rescored whole, so
+        every article is ranked on the same scale.
+
+        Args:
+            labels (list): The new category names.
+            top_k (int): Number of labels ranked per article.
+            threshold (float): Minimum score for a label to be assigned.
+
+        Returns:
+            dict: Link mapped to its best labels, best first.
+        """
+        scorer = self.classifier_backend.scorer
+        for missing_labels, pairs in self.label_scores.missing_pairs(labels, scorer).items():
+            print(f"Scoring {len(pairs)} articles for {', '.join(missing_labels)}...")
+            results = self.classifier_backend.score([title for _, title in pairs], list(missing_labels))
+            for (link, _), result in zip(pairs, results):
+                self.label_scores.put_result(link, result)
+        self.store.flush()
+
+        ranked = self.label_scores.rank(labels, top_k=top_k, threshold=threshold, scorer=scorer)
+        changed = self.store.update_categories({link: best[0] for link, best in ranked.items()})
+        # A category with its own retention window moves the expiry time too
+        self.retention.refresh(changed)
+        if self.search_index is not None:
+            self.search_index.update_categories({link: best[0] for link, best in ranked.items()})
+        print(f"Re-ranked {len(ranked)} articles over {len(labels)} categories.")
+        return ranked
+
+    def enable_search(self, articles=None, background=False):
+        """
+        Builds the search index over the stored articles; from then on it is kept up
+        to date as articles are classified and expire. search_ready is set once the
+        stored articles are indexed.
+
+        Args:
+            articles (list): The stored articles, when the caller has loaded them already.
+            background (bool): Index them on a background thread and return straight away.
+
+        Returns:
+            SearchIndex: The index.
+        """
+        if self.search_index is None:
+            articles = self.articles_with_categories.values() if articles is None else articles
+            # Published before indexing, so articles classified meanwhile are added to it too
+            search_index = self.search_index = SearchIndex()
+
+            def build():
+                with metrics.stage("build_search_index"):
+                    search_index.add(articles)
+                self.search_ready.set()
+
+            if background:
+                threading.Thread(target=build, name="search-index", daemon=True).start()
+            else:
+                build()
+        return self.search_index
+
+    def update_embeddings(self, articles):
+        """Adds articles to the embedding index used for related-article search."""
+        if self.embedding_index is None:
+            return
+        try:
+            with metrics.stage("update_embeddings"):
+                self.embedding_index.add((article['link'], article['title']) for article in articles)
+        except Exception as e:
+            print(f"Error updating the embedding index: {e}")
+
+    @metrics.stage("classify_titles")
+    def classify_titles(self, titles, sources=None):
+        """
+        Classifies titles, answering repeated and lightly edited titles from the classification cache.
+
+        Args:
+            titles (list): The article titles.
+            sources (dict): Title mapped to its source, so only suffixes naming it are ignored.
+
+        Returns:
+            list: One classifier result per title.
+        """
+        results = self.classification_cache.get_many(titles, sources)
+        misses = list(dict.fromkeys(title for title in titles if title not in results))
+        metrics.inc("news_titles_classified_total", len(misses))
+        if misses:
+            fresh = dict(zip(misses, self.classifier_backend.classify(misses)))
+            self.classification_cache.put_many(fresh, sources)
+            results.update(fresh)
+        return [results[title] for title in titles]
+
+    def _story_categories(self, new_articles):
+        """
+        Assigns each new article to a story and returns the categories already known for those stories.
+
+        Args:
+            new_articles (list): Articles not classified before; 'story' and 'shingles' are set on each.
+
+        Returns:
+            dict: Story id mapped to the category of its stored first article.
+        """
+        categories = {}
+        for article in new_articles:
+            shingle_set = shingles(article['title'])
+            story = self.story_index.find(shingle_set) or article['link']
+            self.story_index.add(article['link'], shingle_set, story)
+            article['story'] = story
+            article['shingles'] = shingle_set
+            if story != article['link'] and story not in categories:
+                stored = self.articles_with_categories.get(story)
+                if stored and stored.get('category'):
+                    categories[story] = stored['category']
+        return categories
+
     def fetch_feed(self, url):
         """
         Fetches a single RSS feed and returns a list of articles.
 
+        Sends the stored ETag/Last-Modified validators with the request, and skips
+        parsing entirely when the server answers 304 or the body has not changed.
+
         Args:
             url (str): The RSS feed URL.
 
@@ -142,17 +426,53 @@ class NewsCategorizer:
             list: List of news articles with title, link, and publication date.
         """
         articles = []
-        feed = feedparser.parse(url)
-        for entry in feed.entries:
-            published_date = entry.published if 'published' in entry else datetime.datetime.now(datetime.timezone.utc).isoformat()
+        status, size = FEED_FAILED, 0
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, headers=self.feed_cache.request_headers(url), timeout=30)
+            size = len(response.content)
+            if self.feed_cache.is_unchanged(url, response.status_code, response.content):
+                status = FEED_UNCHANGED
+                return articles  # Nothing new since the last poll
+            response.raise_for_status()
+
+            articles = self.parse_feed(url, response.content)
+            self.feed_cache.update(url, response.headers, response.content)
+            self.feed_cache.flush()
+            status = FEED_CHANGED
+            return articles
+        finally:
+            metrics.record_fetch(url, time.perf_counter() - start, status, size, len(articles))
+
+    def parse_feed(self, url, content):
+        """
+        Parses a downloaded RSS feed into a list of articles.
+
+        Well-formed RSS 2.0 and Atom feeds are streamed, stopping once the entries
+        are ones already stored; anything else is parsed by feedparser.
+
+        Args:
+            url (str): The RSS feed URL, used to resolve relative links.
+            content (bytes): The raw feed document.
+
+        Returns:
+            list: List of news articles with title, link, and publication date.
+        """
+        articles = []
+        source, entries = parse_entries(content, url, is_known=self.store.contains)
+        for entry in entries:
+            published_date = entry['published'] or datetime.datetime.now(datetime.timezone.utc).isoformat()
             articles.append({
-                'title': entry.title,
-                'link': entry.link,
-                'source': feed.feed.title,
+                'title': entry['title'],
+                'link': entry['link'],
+                'source': source,
                 'published': published_date,
+                # Normalised once here; everything later compares this integer
+                'published_ts': self.published_timestamp(published_date, entry.get('published_parsed')),
             })
         return articles
 
+    @metrics.stage("fetch_news")
     def fetch_news(self, rss_urls):
         """
         Fetches news from a list of RSS feeds concurrently.
@@ -164,160 +484,191 @@ class NewsCategorizer:
             list: List of news articles with title, link, and publication date.
         """
         articles = []
-        with ThreadPoolExecutor() as executor:
-            futures = [executor.submit(self.fetch_feed, url) for url in rss_urls]
-            for future in as_completed(futures):
-                articles.extend(future.result())
+        for url, feed_articles in self.stream_news(rss_urls):
+            articles.extend(feed_articles)
         return articles
 
-    def _insert_article_into_category(self, tree, category_node, article):
+    def stream_news(self, rss_urls):
         """
-        Inserts an article into the specified category node in the Treeview,
-        with the most recent articles appearing at the top.
+        Fetches news from a list of RSS feeds concurrently, yielding each feed as it completes.
 
         Args:
-            tree (ttk.Treeview): The Treeview widget.
-            category_node (str): The ID of the category node in the Treeview.
-            article (dict): The article data containing 'title', 'published', and 'link'.
-        """
-        # Parse the published date and convert it to a datetime object
-        published_date = self.parse_date(article['published'])
-
-        # Format the published date to a more readable format (e.g., YYYY-MM-DD HH:MM:SS)
-        formatted_published_date = published_date.strftime(' %A %d %B %Y %H:%M:%S')
-
-        # Insert the article into the category node
-        tree.insert(category_node, 'end', text=article['title'], 
-                    values=(article['source'], formatted_published_date, article['link']),
-                    tags=(published_date,))  # Use date as a tag for sorting later
+            rss_urls (list): List of RSS feed URLs.
 
+        Yields:
+            tuple: The feed URL and its list of new articles.
+        """
+        if self.ingest_engine is None:
+            self.ingest_engine = FeedIngestEngine(self.feed_cache, self.parse_feed)
+        yield from self.ingest_engine.iter_feeds(rss_urls)
 
-    def display_news_gui(self, categorised_news):
+    def build_news_gui(self, categorised_news):
         """
-        Displays the categorised news articles in a GUI, ensuring newest articles appear at the top.
+        Builds the news window without entering the main loop.
 
         Args:
             categorised_news (dict): Categorised news articles.
+
+        Returns:
+            tuple: The Tk root window and its CategoryTree.
         """
         root = tk.Tk()
         root.title("Categorised News Aggregator")
 
+        # Search bar: every keystroke filters all the stored articles through the search index
+        search_bar = ttk.Frame(root)
+        search_bar.pack(fill='x', padx=5, pady=5)
+        ttk.Label(search_bar, text="Search:").pack(side='left')
+        query = tk.StringVar()
+        ttk.Entry(search_bar, textvariable=query, width=50).pack(side='left', fill='x', expand=True, padx=5)
+        source = tk.StringVar(value=ALL_SOURCES)
+        source_box = ttk.Combobox(search_bar, textvariable=source, state='readonly', width=20)
+        source_box.pack(side='left', padx=5)
+        period = tk.StringVar(value=next(iter(SEARCH_PERIODS)))
+        period_box = ttk.Combobox(search_bar, textvariable=period, values=list(SEARCH_PERIODS), state='readonly', width=14)
+        period_box.pack(side='left', padx=5)
+        status = ttk.Label(search_bar, text=SEARCH_INDEXING)
+        status.pack(side='left', padx=5)
+
         # Create a Treeview widget
         tree = ttk.Treeview(root, columns=('Source', 'Published', 'Link'), show='tree headings')
         tree.heading('#0', text='Category')
         tree.heading('Source', text='Source')
         tree.heading('Published', text='Published')
         tree.heading('Link', text='Link')
-
-        # Iterate over categories and add articles to the Treeview
+        category_tree = CategoryTree(tree)
+
+        # Search results replace the category tree while a search is active
+        results = ttk.Treeview(root, columns=('Source', 'Published', 'Link'), show='tree headings')
+        results.heading('#0', text='Title')
+        results.heading('Source', text='Source')
+        results.heading('Published', text='Published')
+        results.heading('Link', text='Link')
+
+        # Stored articles come back from the store already sorted newest first,
+        # so each category is filled without any further sorting. The search index
+        # is built on a background thread, so it doesn't hold up the first paint
+        stored_articles = self.articles_with_categories.values()
+        search_index = self.enable_search(stored_articles, background=True)
+        stored = defaultdict(list)
+        for article in stored_articles:
+            stored[article.get('category') or 'Uncategorized'].append(article)
+        for category, articles in stored.items():
+            category_tree.add_sorted(category, articles)
+
+        # Newly classified articles not yet in the store are placed by timestamp
         for category, articles in categorised_news.items():
-            # Check if the category already exists in the Treeview
-            category_node = self._find_category_node(tree, category)
-            
-            if not category_node:
-                # If the category doesn't exist, create it
-                category_node = tree.insert('', 'end', text=category)
-
-            # Sort articles by published date before inserting into category node
-            sorted_articles = sorted(articles, key=lambda x: self.parse_date(x['published']), reverse=True)
-            
-            for article in sorted_articles:
-                self._insert_article_into_category(tree, category_node, article)
-
-        # Also show articles that are already classified and stored in the JSON
-        for article in self.articles_with_categories.values():
-            category = article.get('category', 'Uncategorized')
-            category_node = self._find_category_node(tree, category)
-
-            if not category_node:
-                category_node = tree.insert('', 'end', text=category)
-
-            self._insert_article_into_category(tree, category_node, article)
+            category_tree.add_articles(articles, category)
 
         tree.pack(expand=True, fill='both')
 
-        # Open links in a web browser
+        def search(*args):
+            if not self.search_ready.is_set():
+                status.config(text=SEARCH_INDEXING)
+                return
+            seconds = SEARCH_PERIODS[period.get()]
+            source_name = None if source.get() == ALL_SOURCES else source.get()
+            if not query.get().strip() and seconds is None and source_name is None:
+                results.pack_forget()
+                tree.pack(expand=True, fill='both')
+                status.config(text=SEARCH_HINT)
+                return
+            after = int(time.time()) - seconds if seconds else None
+            articles, total = search_index.search(query.get(), source=source_name, after=after, limit=SEARCH_LIMIT)
+            results.delete(*results.get_children())
+            for article in articles:
+                results.insert('', 'end', **row_options(article))
+            shown = f", newest {len(articles)} shown" if total > len(articles) else ""
+            status.config(text=f"{total} matching articles{shown}")
+            if not results.winfo_manager():
+                tree.pack_forget()
+                results.pack(expand=True, fill='both')
+
+        def wait_for_index():
+            # Then shows the hint, or the results of whatever was typed while indexing
+            if self.search_ready.is_set():
+                search()
+            else:
+                root.after(100, wait_for_index)
+
+        def list_sources():
+            sources = search_index.values('source') if self.search_ready.is_set() else []
+            source_box.configure(values=[ALL_SOURCES] + sources)
+
+        query.trace_add('write', search)
+        source_box.configure(postcommand=list_sources)
+        source_box.bind('<<ComboboxSelected>>', search)
+        period_box.bind('<<ComboboxSelected>>', search)
+
+        # Open links in a web browser, or show the next page of a category
         def open_link(event):
-            selected_item = tree.selection()
+            selected_item = event.widget.selection()
             if selected_item:
-                values = tree.item(selected_item[0], 'values')
+                if event.widget is tree and category_tree.load_more(selected_item[0]):
+                    return
+                values = event.widget.item(selected_item[0], 'values')
                 if values and len(values) > 2:
                     webbrowser.open(values[2])  # Open the link in the default browser
 
-        def sort_treeview_by_datetime():
-            for item in tree.get_children():
-                tree.move(item, '', 0)  # Unset the item's current position
-            for category_node in tree.get_children():
-                sorted_items = sorted(tree.get_children(category_node), key=lambda x: tree.item(x)['tags'][0], reverse=True)
-                for index, item in enumerate(sorted_items):
-                    tree.move(item, category_node, index)
-        
-        # Sort after insertion
-        sort_treeview_by_datetime()
+        def expire():
+            # Skipped while the pipeline classifies a batch, rather than freezing the window
+            if self.update_lock.acquire(blocking=False):
+                try:
+                    removed = self.expire_articles()
+                finally:
+                    self.update_lock.release()
+                if removed:
+                    category_tree.remove_links(removed)
+                    if results.winfo_manager():
+                        search()
+            root.after(EXPIRE_INTERVAL_MS, expire)
 
         tree.bind('<Double-1>', open_link)
+        results.bind('<Double-1>', open_link)
+        root.after(100, wait_for_index)
+        root.after(EXPIRE_INTERVAL_MS, expire)
+        return root, category_tree
 
-        root.mainloop()
-
-    def _find_category_node(self, tree, category_name):
+    def display_news_gui(self, categorised_news):
         """
-        Finds the category node in the Treeview.
+        Displays the categorised news articles in a GUI, ensuring newest articles appear at the top.
 
         Args:
-            tree (ttk.Treeview): The Treeview widget.
-            category_name (str): The name of the category to find.
-
-        Returns:
-            str: The ID of the category node, or None if the category doesn't exist.
+            categorised_news (dict): Categorised news articles.
         """
-        # Iterate over all items in the Treeview
-        for child in tree.get_children():
-            # Check if the text of the current node matches the category name
-            if tree.item(child, 'text') == category_name:
-                return child
-        return None  # Return None if the category doesn't exist
+        root, _ = self.build_news_gui(categorised_news)
+        root.mainloop()
 
-    
     def parse_date(self, published_str):
         """
-        Convert a date string in the format 'Sat, 11 Jan 2025 11:13:50 GMT' to a datetime object (aware).
+        Convert an RFC 822 or ISO 8601 date string to a datetime object (aware, UTC).
         If parsing fails, return the current datetime as an aware datetime.
         """
-        try:
-            # Define the format to match the string 'Sat, 11 Jan 2025 11:13:50 GMT'
-            date_format = "%a, %d %b %Y %H:%M:%S GMT"
-            
-            # Parse the date string into a naive datetime object
-            naive_datetime = datetime.datetime.strptime(published_str, date_format)
-            
-            # Convert it to an aware datetime by setting the timezone to UTC
-            aware_datetime = pytz.utc.localize(naive_datetime)
-            
-            return aware_datetime
-        except ValueError:
-            # If parsing fails, return the current aware datetime in UTC
-            return datetime.datetime.now(pytz.utc)
+        return datetime.datetime.fromtimestamp(self.published_timestamp(published_str), pytz.utc)
 
 
 
 def main():
     categorizer = NewsCategorizer()  # Create an instance of the categorizer
-    rss_feeds = [
-        "https://feeds.bbci.co.uk/news/rss.xml",
-        "https://rss.cnn.com/rss/edition_world.rss",
-        "https://www.aljazeera.com/xml/rss/all.xml",
-        "https://news.google.com/rss/search?q=site%3Areuters.com&hl=en-US&gl=US&ceid=US%3Aen",
-    ]
-
-    print("Fetching news...")
-    articles = categorizer.fetch_news(rss_feeds)
-    print("Classifying articles...")
-    categorised_news = categorizer.categorise_articles_with_ai(articles)
+    rss_feeds = RSS_FEEDS
+
+    # Load the classifier models in the background while the feeds download
+    registry.warm(["sentence", "classifier"] if CLASSIFIER_BACKEND == "prototype" or EMBEDDING_INDEX else ["classifier"])
+
+    # Show the stored articles straight away; new ones stream in as they are classified
     print("Displaying news...")
-    categorizer.display_news_gui(categorised_news)
+    root, category_tree = categorizer.build_news_gui({})
+
+    print("Fetching and classifying news...")
+    pipeline = NewsPipeline(categorizer)
+    pipeline.start(rss_feeds)
+    pipeline.attach(root, category_tree)
+    root.mainloop()
+    pipeline.stop()
 
     # Save classified articles
     categorizer.save_classified_articles()
+    metrics.export()
 
 
 if __name__ == "__main__":
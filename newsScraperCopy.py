@@ -1,16 +1,22 @@
-import feedparser
+import requests
 import tkinter as tk
 from tkinter import ttk
 import webbrowser
 from collections import defaultdict
-from transformers import pipeline
-
-# Load a pre-trained text classification model from HuggingFace
-classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+from modelRegistry import registry, get_classifier
+from feedParsing import parse_entries
 
 # Define categories for classification
 CATEGORIES = ["Politics", "Technology", "Sports", "Health", "Business", "World", "Culture", "Weather", "UK", "Entertainment", "Science", "Other"]
 
+
+def __getattr__(name):
+    # The classifier is loaded on first use instead of at import time
+    if name == "classifier":
+        return get_classifier()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def fetch_news(rss_urls):
     """
     Fetches news from a list of RSS feeds.
@@ -23,13 +29,19 @@ def fetch_news(rss_urls):
     """
     articles = []
     for url in rss_urls:
-        feed = feedparser.parse(url)
-        for entry in feed.entries:
+        try:
+            response = requests.get(url, timeout=30)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error fetching {url}: {e!r}")
+            continue
+        source, entries = parse_entries(response.content, url)
+        for entry in entries:
             articles.append({
-                'title': entry.title,
-                'link': entry.link,
-                'source': feed.feed.title,
-                'published': entry.published if 'published' in entry else 'Unknown date',
+                'title': entry['title'],
+                'link': entry['link'],
+                'source': source,
+                'published': entry['published'] or 'Unknown date',
             })
     return articles
 
@@ -50,7 +62,7 @@ def categorise_articles_with_ai(articles):
         title = article['title']
         
         # Use the classifier to predict the category
-        result = classifier(title, candidate_labels=CATEGORIES)
+        result = get_classifier()(title, candidate_labels=CATEGORIES)
         predicted_category = result['labels'][0]  # Get the category with the highest score
         
         categorised_articles[predicted_category].append(article)
@@ -104,6 +116,9 @@ def main():
         "https://feeds.reuters.com/reuters/topNews",
     ]
 
+    # Load the classifier in the background while the feeds download
+    registry.warm(["classifier"])
+
     print("Fetching news...")
     articles = fetch_news(rss_feeds)
     categorised_news = categorise_articles_with_ai(articles)
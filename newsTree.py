@@ -0,0 +1,222 @@
+import bisect
+import datetime
+
+import pytz
+
+LOAD_MORE_TEXT = "Load more..."
+
+
+def row_options(article):
+    """Return the Treeview insert() options of an article row: its title, source, date and link."""
+    # Format the published date to a more readable format
+    published_date = datetime.datetime.fromtimestamp(article['published_ts'], pytz.utc)
+    formatted_published_date = published_date.strftime(' %A %d %B %Y %H:%M:%S')
+    return {'text': article['title'], 'values': (article['source'], formatted_published_date, article['link'])}
+
+
+class CategoryTree:
+    """
+    Lazily populated category view over a ttk.Treeview.
+
+    Articles are kept per category in a list sorted newest first, and category
+    nodes are found through a dict. Article rows are only inserted when a category
+    is expanded, one page at a time, so the window paints quickly no matter how
+    many articles are stored.
+
+    Articles of the same story (see storyIndex) are shown as child rows of the
+    story's first article instead of as separate rows.
+    """
+
+    def __init__(self, tree, page_size=200):
+        """
+        Args:
+            tree (ttk.Treeview): Treeview with 'Source', 'Published' and 'Link' columns.
+            page_size (int): Number of article rows inserted per page.
+        """
+        self.tree = tree
+        self.page_size = page_size
+        self.category_nodes = {}   # category -> node id
+        self.node_categories = {}  # node id -> category
+        self.articles = {}         # category -> story head articles, newest first
+        self.sort_keys = {}        # category -> negated timestamps, for bisect
+        self.links = set()
+        self.loaded = {}           # category -> number of article rows inserted
+        self.more_nodes = {}       # category -> "load more" (or placeholder) node id
+        self.heads = {}            # story id -> link of the row the story is shown under
+        self.members = {}          # head link -> other articles of the story
+        self.rows = {}             # link -> row id, for rows inserted so far
+        tree.bind('<<TreeviewOpen>>', self._on_open, add='+')
+
+    def category_node(self, category):
+        """Return the node of a category, creating it (collapsed) if needed."""
+        node = self.category_nodes.get(category)
+        if node is None:
+            node = self.tree.insert('', 'end', text=category)
+            self.category_nodes[category] = node
+            self.node_categories[node] = category
+            self.articles[category] = []
+            self.sort_keys[category] = []
+            self.loaded[category] = 0
+            # Placeholder child so the category can be expanded before it is filled
+            self.more_nodes[category] = self.tree.insert(node, 'end', text=LOAD_MORE_TEXT)
+        return node
+
+    def add_sorted(self, category, articles):
+        """
+        Adds articles that are already sorted newest first to an empty category.
+
+        Args:
+            category (str): The category name.
+            articles (list): Articles sorted by 'published_ts', newest first.
+        """
+        self.category_node(category)
+        if self.articles[category]:
+            self.add_articles(articles, category)
+            return
+        articles = [article for article in articles if article['link'] not in self.links]
+        batch_links = {article['link'] for article in articles}
+        heads = []
+        members = []
+        for article in articles:
+            story = article.get('story') or article['link']
+            if story == article['link'] or (story not in batch_links and story not in self.heads):
+                heads.append(article)
+            else:
+                members.append(article)
+        for article in heads:
+            self.links.add(article['link'])
+            self.heads.setdefault(article.get('story') or article['link'], article['link'])
+        self.articles[category] = heads
+        self.sort_keys[category] = [-article['published_ts'] for article in heads]
+        self._refresh_more_node(category)
+        self.add_articles(members, category)
+
+    def add_articles(self, articles, category=None):
+        """
+        Adds articles in any order, placing each one by its timestamp.
+
+        Args:
+            articles (iterable): Articles with 'category' (unless given) and 'published_ts'.
+            category (str): Category for all the articles, overriding their own.
+        """
+        for article in articles:
+            if article['link'] in self.links:
+                continue
+            self.links.add(article['link'])
+            story = article.get('story') or article['link']
+            head = self.heads.get(story)
+            if head is not None and head != article['link']:
+                self._add_member(head, article)
+                continue
+            self.heads[story] = article['link']
+            self._add_head(category or article.get('category', 'Uncategorized'), article)
+
+    def _add_head(self, name, article):
+        node = self.category_node(name)
+        index = bisect.bisect_right(self.sort_keys[name], -article['published_ts'])
+        self.sort_keys[name].insert(index, -article['published_ts'])
+        self.articles[name].insert(index, article)
+        # Only rows inside the part of the category already shown need inserting,
+        # unless the category was shown in full
+        fully_shown = self.loaded[name] and self.loaded[name] == len(self.articles[name]) - 1
+        if index < self.loaded[name] or fully_shown:
+            self._insert_row(node, index, article)
+            self.loaded[name] += 1
+        self._refresh_more_node(name)
+
+    def _add_member(self, head, article):
+        self.members.setdefault(head, []).append(article)
+        if head in self.rows:
+            self.rows[article['link']] = self.tree.insert(self.rows[head], 'end', **self._row_options(article))
+
+    def remove_links(self, links):
+        """Removes articles (e.g. expired ones) from the view."""
+        links = set(links) & self.links
+        if not links:
+            return
+        self.links -= links
+
+        # Story members first, so removed heads only promote surviving members
+        for head, members in self.members.items():
+            if any(member['link'] in links for member in members):
+                for member in members:
+                    if member['link'] in links and member['link'] in self.rows:
+                        self.tree.delete(self.rows.pop(member['link']))
+                self.members[head] = [member for member in members if member['link'] not in links]
+
+        orphans = []
+        for category, articles in self.articles.items():
+            kept = [article for article in articles if article['link'] not in links]
+            if len(kept) == len(articles):
+                continue
+            removed_rows = 0
+            for article in articles:
+                if article['link'] in links:
+                    if article['link'] in self.rows:
+                        self.tree.delete(self.rows.pop(article['link']))
+                        removed_rows += 1
+                    story = article.get('story') or article['link']
+                    self.heads.pop(story, None)
+                    for member in self.members.pop(article['link'], []):
+                        self.rows.pop(member['link'], None)  # Deleted with their head's row
+                        orphans.append((category, member))
+            self.articles[category] = kept
+            self.sort_keys[category] = [-article['published_ts'] for article in kept]
+            self.loaded[category] -= removed_rows
+            self._refresh_more_node(category)
+
+        # The first surviving member of a story becomes its new head
+        for category, member in orphans:
+            self.links.discard(member['link'])
+            self.add_articles([member], category)
+
+    def load_page(self, category):
+        """Inserts the next page of article rows for a category."""
+        node = self.category_nodes[category]
+        start = self.loaded[category]
+        end = min(start + self.page_size, len(self.articles[category]))
+        for index in range(start, end):
+            self._insert_row(node, index, self.articles[category][index])
+        self.loaded[category] = end
+        self._refresh_more_node(category)
+
+    def is_more_node(self, item):
+        return item in self.more_nodes.values()
+
+    def load_more(self, item):
+        """Loads the next page if `item` is a category's "load more" row."""
+        for category, node in self.more_nodes.items():
+            if node == item:
+                self.load_page(category)
+                return True
+        return False
+
+    def _on_open(self, event):
+        category = self.node_categories.get(self.tree.focus())
+        if category is not None and self.loaded[category] == 0:
+            self.load_page(category)
+
+    def _row_options(self, article):
+        return row_options(article)
+
+    def _insert_row(self, node, index, article):
+        row = self.tree.insert(node, index, **self._row_options(article))
+        self.rows[article['link']] = row
+        for member in self.members.get(article['link'], []):
+            self.rows[member['link']] = self.tree.insert(row, 'end', **self._row_options(member))
+
+    def _refresh_more_node(self, category):
+        node = self.category_nodes[category]
+        remaining = len(self.articles[category]) - self.loaded[category]
+        more_node = self.more_nodes.get(category)
+        if remaining <= 0:
+            if more_node is not None:
+                self.tree.delete(more_node)
+                self.more_nodes[category] = None
+            return
+        text = f"{LOAD_MORE_TEXT} ({remaining} more)"
+        if more_node is None:
+            self.more_nodes[category] = self.tree.insert(node, 'end', text=text)
+        else:
+            self.tree.item(more_node, text=text)
+            self.tree.move(more_node, node, 'end')
@@ -1,11 +1,20 @@
 import tkinter as tk
 from tkinter import messagebox
 import feedparser
-from newspaper import Article
-from transformers import pipeline
+from modelRegistry import registry, get_summarizer
+from metrics import metrics
+from summaryService import SummaryService
 
-# Initialize the summarization pipeline
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+# Summaries are made on background threads; the articles on screen are prefetched
+summary_service = SummaryService()
+article_frames = []
+
+
+def __getattr__(name):
+    # The summarizer is loaded on first use instead of at import time
+    if name == "summarizer":
+        return get_summarizer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Function to fetch the BBC News RSS feed
 def fetch_bbc_news_rss():
@@ -28,36 +37,45 @@ def fetch_bbc_news_rss():
 
     return articles
 
-# Function to fetch and summarize the full article
+# Function to fetch and summarize the full article (blocks until the summary is ready)
 def summarize_article(url):
-    # Fetch the article content using Newspaper3k
-    article = Article(url)
-    article.download()
-    article.parse()
-
-    # Summarize the article content using the BART model
-    full_text = article.text
-    input_length = len(full_text.split())
-    ml = 150 if input_length > 150 else input_length
-    minl = ml // 2
-    summary = summarizer(full_text, max_length=ml, min_length=minl, do_sample=False)
-
-    return summary[0]['summary_text']
+    return summary_service.request(url).result()
 
 # Function to show the summary in a popup window
 def show_summary(url):
-    try:
-        summary = summarize_article(url)
-        # Display summary in a new window or popup
-        summary_window = tk.Toplevel(root)
-        summary_window.title("Article Summary")
-        
-        summary_text = tk.Text(summary_window, wrap=tk.WORD, height=10, width=60)
-        summary_text.insert(tk.END, summary)
+    future = summary_service.request(url)
+
+    # Display summary in a new window or popup
+    summary_window = tk.Toplevel(root)
+    summary_window.title("Article Summary")
+
+    summary_text = tk.Text(summary_window, wrap=tk.WORD, height=10, width=60)
+    summary_text.insert(tk.END, "Summarising...")
+    summary_text.config(state=tk.DISABLED)
+    summary_text.pack(pady=10)
+
+    # Poll instead of waiting so the window stays responsive
+    def check():
+        if not summary_window.winfo_exists():
+            return
+        if not future.done():
+            summary_window.after(100, check)
+            return
+        if future.exception() is not None:
+            summary_window.destroy()
+            messagebox.showerror("Error", f"Error summarizing the article: {future.exception()}")
+            return
+        summary_text.config(state=tk.NORMAL)
+        summary_text.delete("1.0", tk.END)
+        summary_text.insert(tk.END, future.result())
         summary_text.config(state=tk.DISABLED)
-        summary_text.pack(pady=10)
-    except Exception as e:
-        messagebox.showerror("Error", f"Error summarizing the article: {e}")
+
+    check()
+
+# Function to prefetch the summaries of the articles currently on screen
+def prefetch_visible():
+    height = root.winfo_height()
+    summary_service.prefetch([link for frame, link in article_frames if frame.winfo_y() < height])
 
 # Function to display articles
 def display_articles():
@@ -66,10 +84,16 @@ def display_articles():
         messagebox.showerror("Error", "No articles found.")
         return
 
+    # Replace the articles of the previous fetch
+    for frame, _ in article_frames:
+        frame.destroy()
+    article_frames.clear()
+
     # Create a frame for each article
     for article in articles:
         article_frame = tk.Frame(root)
         article_frame.pack(fill='x', pady=5)
+        article_frames.append((article_frame, article['link']))
 
         # Title, Author, and Date
         title_label = tk.Label(article_frame, text=article['title'], font=("Arial", 12, 'bold'), anchor='w', width=50, relief='solid', padx=5)
@@ -85,6 +109,9 @@ def display_articles():
         summary_button = tk.Button(article_frame, text="Show Summary", command=lambda url=article['link']: show_summary(url))
         summary_button.pack(pady=5)
 
+    # Once laid out, start on the summaries the user can see
+    root.after_idle(prefetch_visible)
+
 # Create the main window
 root = tk.Tk()
 root.title("BBC News Scraper")
@@ -92,9 +119,15 @@ root.title("BBC News Scraper")
 # Create a refresh button
 refresh_button = tk.Button(root, text="Refresh", command=display_articles)
 refresh_button.pack(pady=10)
+root.bind('<Configure>', lambda event: prefetch_visible() if event.widget is root else None)
+
+# Load the summarizer in the background while the feed downloads
+registry.warm(["summarizer"])
 
 # Run the initial fetch and display
 display_articles()
 
 # Start the GUI
 root.mainloop()
+summary_service.close()
+metrics.export()
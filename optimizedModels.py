@@ -0,0 +1,122 @@
+import os
+import time
+
+# Converted models are cached here so the export/quantisation only happens once
+MODEL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "newsFeedParser", "models")
+
+INFERENCE_BACKENDS = ("pytorch", "int8", "onnx")
+
+TASK_MODEL_CLASSES = {
+    "zero-shot-classification": ("AutoModelForSequenceClassification", "ORTModelForSequenceClassification"),
+    "summarization": ("AutoModelForSeq2SeqLM", "ORTModelForSeq2SeqLM"),
+}
+
+
+def cache_path(model_name, backend):
+    return os.path.join(MODEL_CACHE_DIR, f"{model_name.replace('/', '--')}-{backend}")
+
+
+def _load_int8(task, model_name):
+    # Dynamic int8 quantisation of every Linear layer; activations stay fp32
+    import torch
+    import transformers
+
+    path = cache_path(model_name, "int8") + ".pt"
+    if os.path.exists(path):
+        return torch.load(path, weights_only=False)
+    model_class = getattr(transformers, TASK_MODEL_CLASSES[task][0])
+    model = model_class.from_pretrained(model_name).eval()
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    torch.save(quantized, path)
+    return quantized
+
+
+def _load_onnx(task, model_name):
+    import optimum.onnxruntime
+
+    path = cache_path(model_name, "onnx")
+    model_class = getattr(optimum.onnxruntime, TASK_MODEL_CLASSES[task][1])
+    if os.path.isdir(path):
+        return model_class.from_pretrained(path)
+    model = model_class.from_pretrained(model_name, export=True)
+    model.save_pretrained(path)
+    return model
+
+
+def build_pipeline(task, model_name, backend="pytorch"):
+    """
+    Builds a HuggingFace pipeline on the chosen inference backend.
+
+    Args:
+        task (str): "zero-shot-classification" or "summarization".
+        model_name (str): HuggingFace model id.
+        backend (str): "pytorch" (the reference), "int8" (dynamically quantised
+            PyTorch) or "onnx" (ONNX Runtime).
+
+    Returns:
+        transformers.Pipeline: The pipeline.
+    """
+    from transformers import pipeline, AutoTokenizer
+
+    if backend == "pytorch":
+        return pipeline(task, model=model_name)
+    if backend == "int8":
+        model = _load_int8(task, model_name)
+    elif backend == "onnx":
+        model = _load_onnx(task, model_name)
+    else:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_name))
+
+
+def check_parity(backend, labels, file_path="classified_articles.json", limit=200):
+    """
+    Compares an inference backend against the PyTorch reference on the stored articles.
+
+    Args:
+        backend (str): The backend to check, "int8" or "onnx".
+        labels (list): The category names.
+        file_path (str): The classified articles JSON file.
+        limit (int): Maximum number of stored titles used.
+
+    Returns:
+        dict: Top-1 agreement with the reference and with the stored labels, and
+            seconds per title for both backends.
+    """
+    from classifierBackends import load_labelled_examples
+    from modelRegistry import CLASSIFIER_MODEL
+
+    labelled = [(title, category) for category, titles in load_labelled_examples(file_path).items()
+                for title in titles][:limit]
+    titles = [title for title, _ in labelled]
+
+    report = {'titles': len(titles)}
+    predictions = {}
+    for name in ("pytorch", backend):
+        classifier = build_pipeline("zero-shot-classification", CLASSIFIER_MODEL, name)
+        classifier(titles[:2], candidate_labels=labels, multi_label=True)  # Warm up
+        start = time.perf_counter()
+        results = classifier(titles, candidate_labels=labels, multi_label=True)
+        report[f'{name}_seconds_per_title'] = (time.perf_counter() - start) / max(1, len(titles))
+        predictions[name] = [result['labels'][0] for result in results]
+
+    reference, candidate = predictions["pytorch"], predictions[backend]
+    report['agreement_with_reference'] = sum(a == b for a, b in zip(reference, candidate)) / max(1, len(titles))
+    report['agreement_with_stored_labels'] = sum(
+        prediction == category for prediction, (_, category) in zip(candidate, labelled)) / max(1, len(titles))
+    report['speedup'] = report['pytorch_seconds_per_title'] / report[f'{backend}_seconds_per_title']
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from newsScraper import CATEGORIES
+
+    parser = argparse.ArgumentParser(description="Check an optimised inference backend against the PyTorch reference.")
+    parser.add_argument("backend", choices=["int8", "onnx"])
+    parser.add_argument("--limit", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(check_parity(args.backend, CATEGORIES, limit=args.limit), indent=4))
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    body_hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bodies_last_access ON bodies (last_access);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    body_hash TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS extracted (
+    body_hash TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (body_hash, extractor)
+);
+CREATE TRIGGER IF NOT EXISTS delete_body AFTER DELETE ON bodies BEGIN
+    DELETE FROM pages WHERE body_hash = old.body_hash;
+    DELETE FROM extracted WHERE body_hash = old.body_hash;
+END;
+"""
+
+USER_AGENT = "Mozilla/5.0 (compatible; newsFeedParser)"
+
+# Shared by povFinder, newsaudio and bbc-news-scraper wherever they are started from
+PAGE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "newsFeedParser", "pages")
+
+
+class PageCache:
+    """
+    Fetches web pages through one pooled keep-alive session and keeps their bodies
+    in a compressed, content-addressed cache on disk, shared by every tool.
+
+    Pages younger than `ttl` are served from disk; older ones are revalidated with
+    If-None-Match / If-Modified-Since, and when the network fails the stale copy is
+    served. Bodies are evicted least recently used first once the cache outgrows
+    `max_bytes`. Values extracted from a body (e.g. the article text) are cached
+    under the body's hash, so each version of a page is parsed only once.
+    """
+
+    def __init__(self, cache_dir=PAGE_CACHE_DIR, ttl=60 * 60, max_bytes=256 * 1024 * 1024, timeout=20, pool_size=16):
+        """
+        Args:
+            cache_dir (str): Directory of the bodies and their SQLite index.
+            ttl (float): Seconds a page is served without revalidation.
+            max_bytes (int): Compressed size the cache is kept under.
+            timeout (float): Request timeout in seconds.
+            pool_size (int): Keep-alive connections kept per host.
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, "bodies"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def _body_path(self, body_hash):
+        return os.path.join(self.cache_dir, "bodies", body_hash[:2], f"{body_hash}.z")
+
+    def _read_body(self, body_hash):
+        try:
+            with open(self._body_path(body_hash), "rb") as file:
+                return zlib.decompress(file.read())
+        except (OSError, zlib.error):
+            return None
+
+    def _write_body(self, body):
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._body_path(body_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(zlib.compress(body, 6))
+            os.replace(tmp_path, path)
+        return body_hash, os.path.getsize(path)
+
+    def _touch(self, body_hash, now):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE bodies SET last_access = ? WHERE body_hash = ?", (now, body_hash))
+
+    def fetch(self, url):
+        """
+        Returns the body of a page, from the cache when it is fresh or still valid.
+
+        Args:
+            url (str): The page URL.
+
+        Returns:
+            bytes: The page body.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body_hash, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)).fetchone()
+        cached = self._read_body(row[0]) if row else None
+
+        if cached is not None and now - row[3] < self.ttl:
+            metrics.inc("news_page_cache_requests_total", result="hit")
+            self._touch(row[0], now)
+            return cached
+
+        headers = {}
+        if cached is not None:
+            if row[1]:
+                headers['If-None-Match'] = row[1]
+            if row[2]:
+                headers['If-Modified-Since'] = row[2]
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code != 304:
+                response.raise_for_status()
+        except requests.RequestException:
+            if cached is None:
+                raise
+            metrics.inc("news_page_cache_requests_total", result="stale")
+            return cached  # Better an old copy than nothing while offline
+
+        if response.status_code == 304 and cached is not None:
+            metrics.inc("news_page_cache_requests_total", result="revalidated")
+            with self._lock, self._conn:
+                self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (now, url))
+                self._conn.execute("UPDATE bodies SET last_access = ? WHERE body_hash = ?", (now, row[0]))
+            return cached
+
+        metrics.inc("news_page_cache_requests_total", result="miss")
+        body = response.content
+        body_hash, size = self._write_body(body)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO bodies (body_hash, size, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT(body_hash) DO UPDATE SET last_access = excluded.last_access",
+                (body_hash, size, now))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, body_hash, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, body_hash, response.headers.get('ETag'), response.headers.get('Last-Modified'), now))
+        self.evict()
+        return body
+
+    def extract(self, url, extractor, name=None):
+        """
+        Fetches a page and returns a value extracted from it, parsing each body version once.
+
+        Args:
+            url (str): The page URL.
+            extractor (callable): Takes (body, url) and returns a JSON-serialisable value.
+            name (str): Cache key of the extractor; change it when the extractor changes.
+
+        Returns:
+            object: The extracted value.
+        """
+        name = name or f"{extractor.__module__}.{extractor.__qualname__}"
+        body = self.fetch(url)
+        body_hash = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM extracted WHERE body_hash = ? AND extractor = ?", (body_hash, name)).fetchone()
+        if row:
+            metrics.inc("news_extracted_cache_requests_total", result="hit")
+            return json.loads(row[0])
+        metrics.inc("news_extracted_cache_requests_total", result="miss")
+        value = extractor(body, url)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extracted (body_hash, extractor, value) "
+                "SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM bodies WHERE body_hash = ?)",
+                (body_hash, name, json.dumps(value), body_hash))
+        return value
+
+    def evict(self):
+        """Removes the least recently used bodies until the cache is under `max_bytes`."""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM bodies").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            evicted = []
+            for body_hash, size in self._conn.execute("SELECT body_hash, size FROM bodies ORDER BY last_access"):
+                if total <= self.max_bytes:
+                    break
+                evicted.append(body_hash)
+                total -= size
+            with self._conn:
+                self._conn.executemany("DELETE FROM bodies WHERE body_hash = ?", [(body_hash,) for body_hash in evicted])
+        for body_hash in evicted:
+            try:
+                os.remove(self._body_path(body_hash))
+            except OSError:
+                pass
+        metrics.inc("news_page_cache_evictions_total", len(evicted))
+
+    def stats(self):
+        """Return the number of cached pages and bodies and the compressed size on disk."""
+        with self._lock:
+            pages = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            bodies, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM bodies").fetchone()
+        return {'pages': pages, 'bodies': bodies, 'bytes': size}
+
+    def close(self):
+        self.session.close()
+        self._conn.close()
+
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    """Return the page cache shared by every tool in the process, creating it on first use."""
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+        return _page_cache
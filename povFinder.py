@@ -1,43 +1,49 @@
-import feedparser
 import tkinter as tk
 from tkinter import ttk
 import webbrowser
-import requests
 from bs4 import BeautifulSoup
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-
-# Initialize the transformer model
-model = SentenceTransformer('all-MiniLM-L6-v2')
-
-# Define function to fetch related articles
-def get_related_articles(article_url):
-    search_url = f"https://news.google.com/search?q={article_url}&hl=en-US&gl=US&ceid=US:en"
-    response = requests.get(search_url)
-    soup = BeautifulSoup(response.content, 'html.parser')
+from modelRegistry import get_sentence_model
+from articleStore import ArticleStore
+from embeddingIndex import EmbeddingIndex
+from pageCache import get_page_cache
+
+
+def __getattr__(name):
+    # The sentence model is loaded on first use instead of at import time
+    if name == "model":
+        return get_sentence_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Define function to find related articles in the local embedding index
+def get_related_articles(store, index, article_url, title=None, k=20):
+    if article_url in index:
+        matches = index.related(article_url, k)
+    else:
+        matches = index.search_text(title or fetch_article_title(article_url), k + 1)
+        matches = [(link, score) for link, score in matches if link != article_url][:k]
 
     related_articles = []
-
-    # Find related articles in the Google News results
-    for item in soup.find_all('a', class_='DY5T1d'):
-        title = item.get_text()
-        link = "https://news.google.com" + item['href'][1:]
-        related_articles.append({'title': title, 'link': link})
+    for link, score in matches:
+        article = store.get(link)
+        if article:
+            related_articles.append({'title': article['title'], 'link': link, 'source': article.get('source'), 'score': score})
 
     print(f"Found {len(related_articles)} related articles.")
     return related_articles
 
-# Define function to fetch article content
-def fetch_article_content(url):
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, 'html.parser')
+# Define function to read the headline from an article page
+def parse_article_title(body, url):
+    soup = BeautifulSoup(body, 'html.parser')
 
-    # Extract the article text, this may vary based on the website structure
-    paragraphs = soup.find_all('p')
-    content = ' '.join([para.get_text() for para in paragraphs])
+    # Prefer the Open Graph title, which leaves out the site name
+    og_title = soup.find('meta', property='og:title')
+    if og_title and og_title.get('content'):
+        return og_title['content']
+    return soup.title.get_text(strip=True) if soup.title else url
 
-    print(f"Fetched article content: {content[:100]}...")  # Print the first 100 characters as a preview
-    return content
+# Define function to fetch the headline of an article the aggregator hasn't stored
+def fetch_article_title(url):
+    return get_page_cache().extract(url, parse_article_title)
 
 # Define function to display the articles in the GUI
 def display_related_articles_gui(original_article, related_articles):
@@ -45,16 +51,18 @@ def display_related_articles_gui(original_article, related_articles):
     root.title("Related Articles")
 
     # Create Treeview widget to display related articles
-    tree = ttk.Treeview(root, columns=('Title', 'Link'), show='headings')
+    tree = ttk.Treeview(root, columns=('Title', 'Source', 'Similarity', 'Link'), show='headings')
     tree.heading('Title', text='Title')
+    tree.heading('Source', text='Source')
+    tree.heading('Similarity', text='Similarity')
     tree.heading('Link', text='Link')
 
     # Insert the original article
-    tree.insert('', 'end', values=(original_article['title'], original_article['link']))
+    tree.insert('', 'end', values=(original_article['title'], original_article.get('source', ''), '', original_article['link']))
 
     # Insert related articles
     for article in related_articles:
-        tree.insert('', 'end', values=(article['title'], article['link']))
+        tree.insert('', 'end', values=(article['title'], article.get('source') or '', f"{article['score']:.2f}", article['link']))
 
     tree.pack(expand=True, fill='both')
 
@@ -64,22 +72,29 @@ def display_related_articles_gui(original_article, related_articles):
         if selected_item:
             values = tree.item(selected_item[0], 'values')
             if values:
-                webbrowser.open(values[1])
+                webbrowser.open(values[3])
 
     tree.bind('<Double-1>', open_link)
 
     root.mainloop()
 
 # Main function to find similar articles and display in GUI
-def find_similar_articles(article_url):
-    # Fetch the main article
-    article_content = fetch_article_content(article_url)
-    
-    # Get related articles using Google News
-    related_articles = get_related_articles(article_url)
+def find_similar_articles(article_url, db_path="articles.db"):
+    store = ArticleStore(db_path)
+    index = EmbeddingIndex(store)
+    try:
+        # Embed any stored articles the aggregator hasn't indexed yet
+        added = index.sync()
+        if added:
+            print(f"Indexed {added} stored articles.")
+
+        # Get related articles from every article the aggregator has stored
+        original_article = store.get(article_url) or {'title': fetch_article_title(article_url), 'link': article_url}
+        related_articles = get_related_articles(store, index, article_url, original_article['title'])
+    finally:
+        store.close()
 
     # Display related articles in GUI
-    original_article = {'title': 'Original Article', 'link': article_url}
     display_related_articles_gui(original_article, related_articles)
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+import json
+import time
+
+DAY = 24 * 60 * 60
+
+
+class RetentionPolicy:
+    """
+    How long articles are kept. A window set for an article's source wins over one
+    set for its category, which wins over the default.
+    """
+
+    def __init__(self, default_days=8, category_days=None, source_days=None):
+        """
+        Args:
+            default_days (float): Retention window for every other article.
+            category_days (dict): Category name mapped to its retention window in days.
+            source_days (dict): Source name mapped to its retention window in days.
+        """
+        self.default_days = default_days
+        self.category_days = dict(category_days or {})
+        self.source_days = dict(source_days or {})
+
+    def window(self, category, source):
+        """Return the retention window in seconds for an article's category and source."""
+        if source in self.source_days:
+            return int(self.source_days[source] * DAY)
+        if category in self.category_days:
+            return int(self.category_days[category] * DAY)
+        return int(self.default_days * DAY)
+
+    def expires_at(self, article):
+        """Return the epoch second at which an article should be removed."""
+        return article['published_ts'] + self.window(article.get('category'), article.get('source'))
+
+    def sql_expression(self):
+        """
+        Builds the SQL expression that computes expires_at from a row.
+
+        Returns:
+            tuple: The expression and its parameters.
+        """
+        cases = []
+        params = []
+        for source, days in self.source_days.items():
+            cases.append("WHEN source = ? THEN ?")
+            params.extend([source, int(days * DAY)])
+        for category, days in self.category_days.items():
+            cases.append("WHEN category = ? THEN ?")
+            params.extend([category, int(days * DAY)])
+        params.append(int(self.default_days * DAY))
+        if not cases:
+            return "published_ts + ?", params
+        return f"published_ts + CASE {' '.join(cases)} ELSE ? END", params
+
+    def signature(self):
+        return json.dumps([self.default_days, self.category_days, self.source_days], sort_keys=True)
+
+
+class RetentionManager:
+    """
+    Expires articles through the store's expires_at index, so each pass costs
+    O(expired) instead of a scan of every stored article, and can run as often
+    as needed during a long-lived session.
+    """
+
+    def __init__(self, store, policy=None):
+        self.store = store
+        self.policy = policy or RetentionPolicy()
+        self.apply_policy()
+
+    def apply_policy(self):
+        """Recompute every article's expiry time if the policy changed since the last run."""
+        signature = self.policy.signature()
+        if self.store.get_meta('retention_policy') != signature:
+            expression, params = self.policy.sql_expression()
+            self.store.set_expiry(expression, params)
+            self.store.set_meta('retention_policy', signature)
+
+    def expires_at(self, article):
+        return self.policy.expires_at(article)
+
+    def refresh(self, links):
+        """Recompute the expiry time of some articles, e.g. after their category changed."""
+        if links:
+            expression, params = self.policy.sql_expression()
+            self.store.set_expiry(expression, params, links=links)
+
+    def expire(self, now=None):
+        """
+        Removes every article whose retention window has passed.
+
+        Args:
+            now (float): Epoch seconds to expire against, defaults to the current time.
+
+        Returns:
+            list: Links of the removed articles.
+        """
+        now = int(time.time() if now is None else now)
+        # Rows written without an expiry time (e.g. by other tools) get one now
+        expression, params = self.policy.sql_expression()
+        self.store.set_expiry(expression, params, only_missing=True)
+        return self.store.delete_expired(now)
+
+    def next_expiry(self):
+        """Return the epoch second of the next article due to expire, or None if the store is empty."""
+        return self.store.next_expiry()
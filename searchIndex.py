@@ -0,0 +1,334 @@
+import bisect
+import datetime
+import re
+import sys
+import threading
+import unicodedata
+
+_WORD = re.compile(r"\w+")
+
+# Sorts after every word, so prefix + _LAST ends the range of words starting with prefix
+_LAST = chr(sys.maxunicode)
+
+# Facets that can be typed into a query, e.g. "storm source:bbc after:2025-01-10"
+QUERY_FACETS = ('source', 'category', 'after', 'before')
+
+# Fields indexed besides the title, when an article has them
+TEXT_FIELDS = ('description', 'summary')
+
+
+def fold(text):
+    """Lower-cases text and drops its accents, so "Zürich" is found by typing "zu"."""
+    text = text.casefold()
+    if text.isascii():
+        return text
+    return "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    """Split text into lower-case, unaccented words (in any script)."""
+    return _WORD.findall(fold(text)) if text else []
+
+
+def _day_start(value):
+    # after:/before: take a date, read as midnight UTC
+    day = datetime.date.fromisoformat(value)
+    return int(datetime.datetime(day.year, day.month, day.day, tzinfo=datetime.timezone.utc).timestamp())
+
+
+def _facet_key(value):
+    return "".join(tokenize(value))
+
+
+def _facet_keys(name):
+    # A facet value may start at any word of the name: "reuters" matches '"site:reuters.com" - Google News'
+    words = tokenize(name)
+    return ["".join(words[i:]) for i in range(len(words))]
+
+
+def parse_query(query):
+    """
+    Splits a search box query into words and facets.
+
+    The last word is completed as a prefix unless the query ends with a space, so
+    results narrow down while a word is still being typed. Facets are written as
+    name:value; source and category values match names with a word starting with
+    them ("source:bbc" matches "BBC News", "source:reuters" matches
+    '"site:reuters.com" - Google News'), and after/before take ISO dates.
+
+    Args:
+        query (str): The text of the search box.
+
+    Returns:
+        tuple: Whole words, the prefix being typed (or None), and a dict of facets.
+    """
+    words = []
+    facets = {}
+    for part in query.split():
+        name, separator, value = part.partition(":")
+        if separator and name.lower() in QUERY_FACETS and value:
+            facets[name.lower()] = value
+        else:
+            words.extend(tokenize(part))
+    prefix = None
+    if words and query and not query[-1].isspace():
+        prefix = words.pop()
+    return words, prefix, facets
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over article titles (and descriptions or summaries
+    where present), with source, category and date-range facets.
+
+    Every word maps to the set of documents containing it, and every source and
+    category to the set of its documents. A query intersects the smallest sets
+    first and completes the word being typed through a sorted vocabulary.
+    Documents are also kept newest first, so the first page of a large result is
+    found by walking that order, and a date range is a slice of it. Articles are
+    added and removed incrementally as they are classified and expire.
+    """
+
+    def __init__(self, bulk_size=256, scan_cost=20):
+        """
+        Args:
+            bulk_size (int): Batches larger than this re-sort the vocabulary and the
+                date order once instead of inserting into them one by one.
+            scan_cost (float): Cost of checking one document's words against a prefix,
+                relative to one set lookup, for choosing how to complete a prefix.
+        """
+        self.bulk_size = bulk_size
+        self.scan_cost = scan_cost
+        self.postings = {}    # word -> set of doc ids
+        self.vocabulary = []  # sorted words, for prefix completion
+        self.facets = {'source': {}, 'category': {}}  # facet -> value -> set of doc ids
+        self.doc_ids = {}     # link -> doc id
+        self.docs = []        # doc id -> article (None once removed)
+        self.doc_terms = []   # doc id -> its distinct words
+        self.timestamps = []  # doc id -> published_ts
+        self.free = []        # doc ids of removed articles, reused first
+        self.order_keys = []  # negated timestamps, ascending, so newest first
+        self.order_docs = []  # doc ids in the same order
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def __contains__(self, link):
+        return link in self.doc_ids
+
+    def add(self, articles):
+        """
+        Indexes articles, replacing earlier versions of the same links.
+
+        Args:
+            articles (iterable): Articles (Article records or dicts) with 'link',
+                'title', 'source', 'category' and 'published_ts'.
+
+        Returns:
+            int: The number of articles indexed.
+        """
+        articles = list(articles)
+        with self._lock:
+            self.remove([article['link'] for article in articles if article['link'] in self.doc_ids])
+            bulk = len(articles) > self.bulk_size
+            new_words = []
+            new_order = []
+            for article in articles:
+                text = " ".join(filter(None, [article['title']] + [article.get(field) for field in TEXT_FIELDS]))
+                terms = tuple(sys.intern(term) for term in dict.fromkeys(tokenize(text)))
+                published_ts = article.get('published_ts') or 0
+                if self.free:
+                    doc = self.free.pop()
+                    self.docs[doc] = article
+                    self.doc_terms[doc] = terms
+                    self.timestamps[doc] = published_ts
+                else:
+                    doc = len(self.docs)
+                    self.docs.append(article)
+                    self.doc_terms.append(terms)
+                    self.timestamps.append(published_ts)
+                self.doc_ids[article['link']] = doc
+
+                for term in terms:
+                    posting = self.postings.get(term)
+                    if posting is None:
+                        posting = self.postings[term] = set()
+                        if bulk:
+                            new_words.append(term)
+                        else:
+                            bisect.insort(self.vocabulary, term)
+                    posting.add(doc)
+                for facet, values in self.facets.items():
+                    values.setdefault(article.get(facet) or "", set()).add(doc)
+
+                if bulk:
+                    new_order.append((-published_ts, doc))
+                else:
+                    index = bisect.bisect_right(self.order_keys, -published_ts)
+                    self.order_keys.insert(index, -published_ts)
+                    self.order_docs.insert(index, doc)
+
+            if bulk:
+                self.vocabulary.extend(new_words)
+                self.vocabulary.sort()
+                order = sorted(list(zip(self.order_keys, self.order_docs)) + new_order)
+                self.order_keys = [key for key, _ in order]
+                self.order_docs = [doc for _, doc in order]
+        return len(articles)
+
+    def remove(self, links):
+        """Removes articles (e.g. expired ones) from the index."""
+        with self._lock:
+            for link in links:
+                doc = self.doc_ids.pop(link, None)
+                if doc is None:
+                    continue
+                for term in self.doc_terms[doc]:
+                    posting = self.postings[term]
+                    posting.discard(doc)
+                    if not posting:
+                        del self.postings[term]
+                        del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+                for facet, values in self.facets.items():
+                    self._discard_facet(values, self.docs[doc].get(facet) or "", doc)
+                index = bisect.bisect_left(self.order_keys, -self.timestamps[doc])
+                while self.order_docs[index] != doc:
+                    index += 1
+                del self.order_keys[index]
+                del self.order_docs[index]
+                self.docs[doc] = None
+                self.doc_terms[doc] = ()
+                self.free.append(doc)
+
+    @staticmethod
+    def _discard_facet(values, value, doc):
+        docs = values.get(value)
+        if docs is not None:
+            docs.discard(doc)
+            if not docs:
+                del values[value]
+
+    def update_categories(self, categories):
+        """
+        Moves articles to new categories, e.g. after NewsCategorizer.update_taxonomy().
+
+        Args:
+            categories (dict): Link mapped to its new category.
+        """
+        with self._lock:
+            values = self.facets['category']
+            for link, category in categories.items():
+                doc = self.doc_ids.get(link)
+                if doc is None:
+                    continue
+                article = self.docs[doc]
+                self._discard_facet(values, article.get('category') or "", doc)
+                if isinstance(article, dict):
+                    article['category'] = category
+                else:
+                    article.category = category
+                values.setdefault(category or "", set()).add(doc)
+
+    def values(self, facet):
+        """Return the values of a facet (e.g. every source), sorted."""
+        with self._lock:
+            return sorted(value for value in self.facets[facet] if value)
+
+    def _facet_docs(self, facet, value):
+        # Exact name first, otherwise every name with a word starting with the typed value
+        values = self.facets[facet]
+        if value in values:
+            return values[value]
+        key = _facet_key(value)
+        matches = [docs for name, docs in values.items() if any(k.startswith(key) for k in _facet_keys(name))]
+        return matches[0] if len(matches) == 1 else set().union(*matches)
+
+    def _prefix_terms(self, prefix):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + _LAST, start)
+        return self.vocabulary[start:end]
+
+    def search(self, query="", source=None, category=None, after=None, before=None, limit=200):
+        """
+        Finds the articles matching every word of a query, newest first.
+
+        Args:
+            query (str): Search box text; see parse_query() for the facet syntax.
+            source (str): Only articles from this source.
+            category (str): Only articles in this category.
+            after (int): Only articles published at or after this epoch second.
+            before (int): Only articles published before this epoch second.
+            limit (int): Maximum number of articles returned.
+
+        Returns:
+            tuple: The matching articles (at most `limit`) and the number of matches.
+        """
+        words, prefix, facets = parse_query(query)
+        try:
+            if 'after' in facets:
+                after = max(after or 0, _day_start(facets['after']))
+            if 'before' in facets:
+                before = min(before or sys.maxsize, _day_start(facets['before']))
+        except ValueError:
+            pass  # A date still being typed
+
+        with self._lock:
+            sets = []
+            for word in words:
+                posting = self.postings.get(word)
+                if posting is None:
+                    return [], 0
+                sets.append(posting)
+            for facet, value in (('source', facets.get('source', source)), ('category', facets.get('category', category))):
+                if value is not None:
+                    sets.append(self._facet_docs(facet, value))
+
+            candidates = None
+            if sets:
+                sets.sort(key=len)
+                candidates = sets[0].intersection(*sets[1:])
+
+            if prefix is not None:
+                terms = self._prefix_terms(prefix)
+                if not terms:
+                    return [], 0
+                postings = [self.postings[term] for term in terms]
+                if candidates is None:
+                    candidates = postings[0].union(*postings[1:])
+                elif len(candidates) * self.scan_cost < sum(min(len(candidates), len(posting)) for posting in postings):
+                    # A short prefix matches so many words that checking the candidates' own words is cheaper
+                    candidates = {doc for doc in candidates
+                                  if any(term.startswith(prefix) for term in self.doc_terms[doc])}
+                else:
+                    candidates = set().union(*(candidates & posting for posting in postings))
+
+            # The date range is a slice of the newest-first order
+            start = 0 if before is None else bisect.bisect_right(self.order_keys, -before)
+            end = len(self.order_keys) if after is None else bisect.bisect_right(self.order_keys, -after)
+            start = min(start, end)
+
+            if candidates is None:
+                docs = self.order_docs[start:min(end, start + limit)]
+                total = end - start
+            elif len(candidates) * 8 < end - start:
+                # Few matches: sort them directly
+                low, high = after or 0, before or sys.maxsize
+                ranked = sorted((doc for doc in candidates if low <= self.timestamps[doc] < high),
+                                key=self.timestamps.__getitem__, reverse=True)
+                docs = ranked[:limit]
+                total = len(ranked)
+            else:
+                # Many matches: the newest ones turn up early in the date order
+                docs = []
+                for doc in self.order_docs[start:end]:
+                    if doc in candidates:
+                        docs.append(doc)
+                        if len(docs) == limit:
+                            break
+                if after is None and before is None:
+                    total = len(candidates)
+                else:
+                    low, high = after or 0, before or sys.maxsize
+                    total = sum(1 for doc in candidates if low <= self.timestamps[doc] < high)
+            return [self.docs[doc] for doc in docs], total
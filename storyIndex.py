@@ -0,0 +1,343 @@
+import hashlib
+import re
+
+import numpy as np
+
+# Hash functions of the MinHash signature; the LSH bands are consecutive pairs of them
+SIGNATURE_SIZE = 64
+
+# Version of the shingles() encoding, stored with the articles so older ones are recomputed
+SHINGLE_VERSION = 2
+
+# Trailing " - Reuters" / " | BBC News" style source suffixes added by aggregators
+_SOURCE_SUFFIX = re.compile(r"\s+[-|–—]\s+(\S+\s*){1,4}$")
+_WORD = re.compile(r"\w+")
+
+# Words too common in headlines to say anything about the story
+STOP_WORDS = frozenset(
+    "a after amid an and are as at be by for from has have he her his in into is it its of on or over "
+    "s said say says she than that the their they this to was were who will with".split()
+)
+
+# English plural and tense endings dropped from ASCII words, longest first
+_ENDINGS = ("ese", "ies", "ing", "es", "ed", "s")
+
+# Odd multipliers and xor masks, one per hash function, fixed so stored signatures stay comparable
+_random = np.random.RandomState(20250112)
+_MULTIPLIERS = _random.randint(0, 2 ** 63, SIGNATURE_SIZE, dtype=np.uint64) | np.uint64(1)
+_MASKS = _random.randint(0, 2 ** 63, SIGNATURE_SIZE, dtype=np.uint64)
+del _random
+
+
+def title_words(title, source=None):
+    """
+    Drops a title's trailing source suffix and splits it into words (in any script), keeping their case.
+
+    Args:
+        title (str): The article title.
+        source (str): The article's source. When given, a suffix is only dropped if it
+            names that source (" - Reuters" on a "site:reuters.com" feed), so a headline
+            like "Trump is welcome to visit - but that's it" keeps its last words.
+
+    Returns:
+        list: The words.
+    """
+    title = title.strip()
+    suffix = _SOURCE_SUFFIX.search(title)
+    if suffix is not None:
+        suffix_words = _WORD.findall(suffix.group().lower())
+        if source is None or suffix_words and suffix_words[0] in _WORD.findall(source.lower()):
+            title = title[:suffix.start()]
+    return _WORD.findall(title)
+
+
+def normalise_title(title, source=None):
+    """
+    Lower-cases a title, drops its trailing source suffix and keeps only its words.
+
+    Args:
+        title (str): The article title.
+        source (str): The article's source; see title_words().
+
+    Returns:
+        list: The lower-case words.
+    """
+    return [word.lower() for word in title_words(title, source)]
+
+
+def _stem(word):
+    if word.isascii():
+        for ending in _ENDINGS:
+            if len(word) > len(ending) + 3 and word.endswith(ending):
+                return word[:-len(ending)]
+    return word
+
+
+def _token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), 'big')
+
+
+def shingles(title):
+    """
+    Computes the word shingles of a title: its words without stop words or
+    plural and tense endings, hashed to 31 bits, sorted and packed.
+
+    The lowest bit marks names: words capitalised after the first one, unless
+    most of them are (a title-case headline says nothing about which are names).
+
+    Args:
+        title (str): The article title.
+
+    Returns:
+        bytes: The packed shingles, stored with the article; empty when the
+            title has no words, and such titles never join a story.
+    """
+    words = title_words(title)
+    capitalised = sum(word[:1].isupper() for word in words[1:])
+    title_case = capitalised * 2 > len(words) - 1
+    named = {}
+    for i, word in enumerate(words):
+        lower = word.lower()
+        if lower in STOP_WORDS:
+            continue
+        key = _token_hash(_stem(lower)) & ~1
+        named[key] = named.get(key, 0) | (i > 0 and not title_case and word[:1].isupper())
+    return np.array(sorted(key | flag for key, flag in named.items()), dtype=np.uint32).tobytes()
+
+
+def _shingle_keys(packed):
+    return np.frombuffer(packed, dtype=np.uint32) >> 1
+
+
+def jaccard(a, b):
+    """Jaccard similarity of two packed shingle sets."""
+    a = _shingle_keys(a)
+    b = _shingle_keys(b)
+    shared = len(np.intersect1d(a, b, assume_unique=True))
+    return shared / (len(a) + len(b) - shared)
+
+
+def names_differ(a, b):
+    """
+    Checks whether two titles each name something the other doesn't mention, like
+    "Bank of England holds rates" and "Bank of Japan holds rates": a substitution
+    of names makes them different stories however many other words they share.
+
+    Args:
+        a (bytes): The shingles() of one title.
+        b (bytes): The shingles() of the other.
+
+    Returns:
+        bool: True when both titles have a name missing from the other.
+    """
+    a = np.frombuffer(a, dtype=np.uint32)
+    b = np.frombuffer(b, dtype=np.uint32)
+    a_names = a[(a & 1).astype(bool)] >> 1
+    b_names = b[(b & 1).astype(bool)] >> 1
+    return (len(np.setdiff1d(a_names, b >> 1, assume_unique=True)) > 0
+            and len(np.setdiff1d(b_names, a >> 1, assume_unique=True)) > 0)
+
+
+def signatures(shingle_sets):
+    """
+    Computes the MinHash signatures of many shingle sets at once.
+
+    Args:
+        shingle_sets (list): Packed shingle sets, none of them empty.
+
+    Returns:
+        numpy.ndarray: One row of SIGNATURE_SIZE uint32 minimums per set.
+    """
+    lengths = np.fromiter((len(packed) // 4 for packed in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+    values = _shingle_keys(b"".join(shingle_sets)).astype(np.uint64)
+    # One row per hash function, so each set's minimum is taken over contiguous memory
+    hashed = np.empty((SIGNATURE_SIZE, len(values)), dtype=np.uint32)
+    # Multiply-shift hashing, one odd multiplier per function; the high half holds the well-mixed
+    # bits. In chunks, so the 64-bit intermediates stay small
+    for start in range(0, len(values), 4096):
+        mixed = values[start:start + 4096] ^ _MASKS[:, None]
+        mixed *= _MULTIPLIERS[:, None]
+        mixed >>= np.uint64(32)
+        hashed[:, start:start + 4096] = mixed
+    starts = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    return np.minimum.reduceat(hashed, starts, axis=1).T
+
+
+class StoryIndex:
+    """
+    Groups near-duplicate titles into stories with MinHash LSH over word shingles.
+
+    Each title gets a MinHash signature whose consecutive pairs of values form
+    `bands` bucket keys; two titles whose shingle sets have Jaccard similarity s
+    share at least one bucket with probability 1 - (1 - s^2)^bands, so a lookup
+    only checks the titles in its own buckets. Those candidates are then compared
+    exactly, and the most similar one at or above `threshold` gives the story,
+    unless the two titles name different things (see names_differ()). Titles with
+    fewer than `min_shingles` shingles ("Storm hits Wales") are too short to tell
+    one story from another and never join one.
+
+    Large batches (the whole store at startup) go into sorted key arrays, one per
+    band, and the articles classified since then into dicts; removed articles are
+    only dropped from the arrays once they make up half of them.
+    """
+
+    def __init__(self, threshold=0.4, bands=32, bulk_size=1024, min_shingles=4):
+        """
+        Args:
+            threshold (float): Jaccard similarity from which two titles are the same story.
+            min_shingles (int): Shingles a title needs to join or start a story.
+            bands (int): Number of LSH bands, at most SIGNATURE_SIZE // 2.
+            bulk_size (int): Batches larger than this are merged into the sorted arrays.
+        """
+        if not 0 < bands <= SIGNATURE_SIZE // 2:
+            raise ValueError(f"bands must be between 1 and {SIGNATURE_SIZE // 2}")
+        self.threshold = threshold
+        self.bands = bands
+        self.bulk_size = bulk_size
+        self.min_shingles = min_shingles
+        self.buckets = [dict() for _ in range(bands)]  # band key -> link, or set of links
+        self.sorted_keys = np.zeros((bands, 0), dtype=np.uint64)  # band keys, one sorted row per band
+        self.sorted_rows = np.zeros((bands, 0), dtype=np.int32)   # position in sorted_links of every key
+        self.sorted_links = np.zeros(0, dtype=object)
+        self.stale = 0      # removed articles still in the sorted arrays
+        self.shingles = {}  # link -> packed shingle set
+        self.stories = {}   # link -> link of the story's first article
+
+    def _indexed(self, shingle_set):
+        return len(shingle_set) >= 4 * self.min_shingles
+
+    def _keys(self, shingle_sets):
+        # Two uint32 values make one uint64 key per band: one row of band keys per set
+        return np.ascontiguousarray(signatures(shingle_sets)[:, :2 * self.bands]).view(np.uint64)
+
+    def find(self, shingle_set):
+        """
+        Finds the story a title belongs to.
+
+        Args:
+            shingle_set (bytes): The title's shingles().
+
+        Returns:
+            str: The story id (link of its first article), or None if no near duplicate is stored.
+        """
+        if not self._indexed(shingle_set):
+            return None
+        keys = self._keys([shingle_set])[0]
+        candidates = set()
+        for band, key in zip(self.buckets, keys.tolist()):
+            members = band.get(key)
+            if members is None:
+                continue
+            if isinstance(members, str):
+                candidates.add(members)
+            else:
+                candidates.update(members)
+        if len(self.sorted_links):
+            for band_keys, band_rows, key in zip(self.sorted_keys, self.sorted_rows, keys):
+                start = band_keys.searchsorted(key)
+                end = band_keys.searchsorted(key, side='right')
+                if start < end:
+                    candidates.update(self.sorted_links[band_rows[start:end]].tolist())
+        best_link = None
+        best_similarity = self.threshold
+        for link in candidates:
+            stored = self.shingles.get(link)
+            if stored is None:
+                continue  # Removed, still in the sorted arrays
+            similarity = jaccard(stored, shingle_set)
+            if similarity >= best_similarity and not names_differ(stored, shingle_set):
+                best_link, best_similarity = link, similarity
+        return self.stories[best_link] if best_link is not None else None
+
+    def add(self, link, shingle_set, story=None):
+        """
+        Inserts an article, joining the given story or starting a new one.
+
+        Args:
+            link (str): The article link.
+            shingle_set (bytes): The title's shingles().
+            story (str): Story id to join; defaults to the article's own link.
+        """
+        self.add_many([(link, shingle_set, story)])
+
+    def add_many(self, articles):
+        """
+        Inserts many articles, computing their signatures in one pass (e.g. when
+        rebuilding the index at startup).
+
+        Args:
+            articles (iterable): (link, shingle set, story id or None) tuples.
+        """
+        articles = list(articles)
+        self.remove([link for link, _, _ in articles if link in self.shingles])
+        for link, shingle_set, story in articles:
+            self.shingles[link] = shingle_set
+            self.stories[link] = story or link
+        bucketed = [(link, shingle_set) for link, shingle_set, _ in articles if self._indexed(shingle_set)]
+        if not bucketed:
+            return
+        keys = self._keys([shingle_set for _, shingle_set in bucketed])
+        links = [link for link, _ in bucketed]
+        if len(bucketed) > self.bulk_size:
+            self._merge(keys.T, links)
+            return
+        for band, band_keys in zip(self.buckets, keys.T.tolist()):
+            for key, link in zip(band_keys, links):
+                members = band.setdefault(key, link)  # Most keys hold a single article; no set for those
+                if members is link:
+                    continue
+                if isinstance(members, str):
+                    band[key] = {members, link}
+                else:
+                    members.add(link)
+
+    def _merge(self, keys, links):
+        # Re-sorts every band's keys with the new ones (one column per link), dropping removed articles
+        new_links = np.empty(len(links), dtype=object)
+        new_links[:] = links
+        new_rows = np.arange(len(self.sorted_links), len(self.sorted_links) + len(links), dtype=np.int32)
+        links = np.concatenate([self.sorted_links, new_links])
+        keys = np.concatenate([self.sorted_keys, keys], axis=1)
+        rows = np.concatenate([self.sorted_rows, np.broadcast_to(new_rows, keys[:, len(self.sorted_links):].shape)], axis=1)
+        if self.stale:
+            live = np.fromiter((link in self.shingles for link in links.tolist()), dtype=bool, count=len(links))
+            kept = live[rows]
+            keys = keys[kept].reshape(self.bands, -1)
+            rows = (np.cumsum(live, dtype=np.int32) - 1)[rows[kept]].reshape(self.bands, -1)
+            links = links[live]
+            self.stale = 0
+        order = keys.argsort(axis=1, kind='stable')
+        self.sorted_keys = np.take_along_axis(keys, order, axis=1)
+        self.sorted_rows = np.take_along_axis(rows, order, axis=1)
+        self.sorted_links = links
+
+    def remove(self, links):
+        """Removes articles, e.g. when retention expires them."""
+        removed = []
+        for link in links:
+            shingle_set = self.shingles.pop(link, None)
+            if shingle_set is None:
+                continue
+            self.stories.pop(link, None)
+            if self._indexed(shingle_set):
+                removed.append((link, shingle_set))
+        if not removed:
+            return
+        links = [link for link, _ in removed]
+        for band, keys in zip(self.buckets, self._keys([shingle_set for _, shingle_set in removed]).T.tolist()):
+            for key, link in zip(keys, links):
+                members = band.get(key)
+                if members == link:
+                    del band[key]
+                elif isinstance(members, set):
+                    members.discard(link)
+                    if len(members) == 1:
+                        band[key] = members.pop()
+        if len(self.sorted_links):
+            self.stale += len(removed)
+            if self.stale * 2 > len(self.sorted_links):
+                self._merge(self.sorted_keys[:, :0], [])
+
+    def __len__(self):
+        return len(self.shingles)
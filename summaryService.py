@@ -0,0 +1,256 @@
+import hashlib
+import itertools
+import queue
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from modelRegistry import get_summarizer, SUMMARIZER_MODEL, INFERENCE_BACKEND
+from inferenceScheduler import scheduler
+from metrics import metrics
+from pageCache import get_page_cache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    url TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (url, text_hash, model)
+);
+"""
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Queue priorities: articles the user asked for go ahead of prefetched ones
+CLICKED = 0
+PREFETCH = 1
+
+
+def article_text(body, url):
+    """Return the main text of an article page, extracted with newspaper3k."""
+    from bs4 import UnicodeDammit
+    from newspaper import Article
+    article = Article(url)
+    article.download(input_html=UnicodeDammit(body, is_html=True).unicode_markup)
+    article.parse()
+    return article.text
+
+
+def extract_text(url):
+    """Returns the main text of an article, downloading and parsing it only when it changed."""
+    return get_page_cache().extract(url, article_text)
+
+
+class SummaryCache:
+    """
+    Summaries stored in SQLite under the article URL and a hash of its extracted
+    text, so an article is summarised again only when its text changes.
+    """
+
+    def __init__(self, db_path="summary_cache.db", model_name=None):
+        self.model_name = model_name or f"{SUMMARIZER_MODEL}:{INFERENCE_BACKEND}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def text_hash(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, url, text_hash):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE url = ? AND text_hash = ? AND model = ?",
+                (url, text_hash, self.model_name),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, url, text_hash, summary):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (url, text_hash, model, summary, created) VALUES (?, ?, ?, ?, ?)",
+                (url, text_hash, self.model_name, summary, time.time()),
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+class SummaryService:
+    """
+    Summarises articles on background threads so the GUI never waits on the model.
+
+    Articles are downloaded and extracted on a small thread pool, then queued for a
+    single model thread. Requests for an article the user clicked go ahead of
+    prefetched ones. Articles longer than the model's input window are split into
+    chunks at sentence boundaries, the chunks are summarised as one batch, and the
+    chunk summaries are joined and summarised once more when there are several.
+    Results are cached by URL and extracted-text hash (see SummaryCache).
+    """
+
+    def __init__(self, cache=None, download_workers=4, chunk_tokens=900, max_length=150):
+        """
+        Args:
+            cache (SummaryCache): Where summaries are kept, by default summary_cache.db.
+            download_workers (int): Articles downloaded at the same time.
+            chunk_tokens (int): Maximum tokens per chunk, below BART's 1024-token window.
+            max_length (int): Maximum summary length in tokens.
+        """
+        self.cache = cache or SummaryCache()
+        self.chunk_tokens = chunk_tokens
+        self.max_length = max_length
+        self._futures = {}     # url -> Future of its summary
+        self._texts = {}       # url -> (text, text hash) waiting for the model
+        self._clicked = set()  # urls the user asked for, queued ahead of prefetches
+        self._lock = threading.Lock()
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._downloads = ThreadPoolExecutor(max_workers=download_workers, thread_name_prefix="summary-download")
+        self._worker = threading.Thread(target=self._run, name="summary-model", daemon=True)
+        self._worker.start()
+
+    def request(self, url, priority=CLICKED):
+        """
+        Returns a Future of an article's summary, starting the work if needed.
+
+        Args:
+            url (str): The article URL.
+            priority (int): CLICKED or PREFETCH.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the summary text.
+        """
+        with self._lock:
+            future = self._futures.get(url)
+            if future is not None and not (future.done() and future.exception() is not None):
+                if priority == CLICKED and url not in self._clicked:
+                    self._clicked.add(url)
+                    if url in self._texts:
+                        # Already waiting for the model behind prefetches: queue it again in front
+                        self._queue.put((CLICKED, next(self._order), url))
+                return future
+            # New, or failed before (e.g. a network error): start again
+            future = self._futures[url] = Future()
+            if priority == CLICKED:
+                self._clicked.add(url)
+        self._downloads.submit(self._extract, url, future)
+        return future
+
+    def prefetch(self, urls):
+        """Starts summarising articles the user is likely to open."""
+        for url in urls:
+            self.request(url, priority=PREFETCH)
+
+    def summary(self, url):
+        """Return the summary if it is ready, otherwise None."""
+        future = self._futures.get(url)
+        if future is not None and future.done() and future.exception() is None:
+            return future.result()
+        return None
+
+    def _extract(self, url, future):
+        try:
+            with metrics.stage("download_article"):
+                text = extract_text(url)
+            text_hash = self.cache.text_hash(text)
+            cached = self.cache.get(url, text_hash)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        if cached is not None:
+            metrics.inc("news_summary_cache_hits_total")
+            future.set_result(cached)
+            return
+        metrics.inc("news_summary_cache_misses_total")
+        with self._lock:
+            self._texts[url] = (text, text_hash)
+            priority = CLICKED if url in self._clicked else PREFETCH
+        self._queue.put((priority, next(self._order), url))
+
+    def _run(self):
+        while True:
+            _, _, url = self._queue.get()
+            with self._lock:
+                pending = self._texts.pop(url, None)
+                future = self._futures.get(url)
+            if pending is None or future is None or future.done():
+                continue  # Queued twice after a click, already summarised
+            text, text_hash = pending
+            try:
+                with metrics.stage("summarize_article"):
+                    summary = self.summarize_text(text)
+                self.cache.put(url, text_hash, summary)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(summary)
+
+    def chunks(self, text, tokenizer=None):
+        """
+        Splits text at sentence boundaries into chunks that fit the model's input window.
+
+        Args:
+            text (str): The article text.
+            tokenizer (object): Tokenizer used to count tokens.
+
+        Returns:
+            list: The chunks, in order.
+        """
+        sentences = [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence]
+        if not sentences:
+            return []
+        lengths = scheduler.token_lengths(sentences, tokenizer)
+        chunks = []
+        current, current_tokens = [], 0
+        for sentence, length in zip(sentences, lengths):
+            if current and current_tokens + length > self.chunk_tokens:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += length
+        chunks.append(" ".join(current))
+        return chunks
+
+    def _summarize_batch(self, summarizer, texts):
+        def infer(batch):
+            # Summary lengths follow the original rule, capped by the shortest input of the batch
+            words = min(len(text.split()) for text in batch)
+            max_length = self.max_length if words > self.max_length else max(words, 1)
+            results = summarizer(batch, max_length=max_length, min_length=max_length // 2, do_sample=False,
+                                 truncation=True, batch_size=len(batch))
+            return [results] if isinstance(results, dict) else results
+
+        results = scheduler.run("summarizer", texts, infer, tokenizer=summarizer.tokenizer)
+        return [result['summary_text'] for result in results]
+
+    def summarize_text(self, text):
+        """
+        Summarises text of any length.
+
+        Args:
+            text (str): The article text.
+
+        Returns:
+            str: The summary.
+        """
+        summarizer = get_summarizer()
+        chunks = self.chunks(text, summarizer.tokenizer)
+        if not chunks:
+            return ""
+        summaries = self._summarize_batch(summarizer, chunks)
+        if len(summaries) == 1:
+            return summaries[0]
+        merged = " ".join(summaries)
+        # One more pass turns the chunk summaries into a single summary when they fit the window
+        if sum(scheduler.token_lengths([merged], summarizer.tokenizer)) < self.chunk_tokens:
+            return self._summarize_batch(summarizer, [merged])[0]
+        return merged
+
+    def close(self):
+        self._downloads.shutdown(wait=False, cancel_futures=True)
+        self.cache.close()
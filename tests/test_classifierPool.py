@@ -0,0 +1,51 @@
+import multiprocessing
+import os
+import time
+
+from classifierPool import ClassifierPool
+
+
+class StubBackend:
+    """Backend that reports the process each title was classified in, and can hang once."""
+
+    labels = ["A"]
+    model_name = "stub"
+    scorer = "stub"
+    models = ()
+
+    def __init__(self, hang_on=None):
+        self.hang_on = hang_on
+
+    def classify(self, titles):
+        if multiprocessing.parent_process() is not None and titles[0] == self.hang_on:
+            time.sleep(60)
+        return [(title, os.getpid()) for title in titles]
+
+
+def titles(prefix, count):
+    return [f"{prefix}{i}" for i in range(count)]
+
+
+def test_results_keep_title_order():
+    pool = ClassifierPool(StubBackend(), workers=2, shard_size=16)
+    try:
+        results = pool.classify(titles("t", 100))
+        assert [title for title, _ in results] == titles("t", 100)
+        assert os.getpid() not in {pid for _, pid in results}
+    finally:
+        pool.close()
+
+
+def test_hung_worker_is_replaced_and_only_its_batch_runs_in_process():
+    pool = ClassifierPool(StubBackend(hang_on="t16"), workers=2, shard_size=16, timeout=2, max_restarts=0)
+    try:
+        results = pool.classify(titles("t", 64))
+        assert [title for title, _ in results] == titles("t", 64)
+        assert dict(results)["t16"] == os.getpid()  # The hung shard finished in-process
+        assert pool.stats()['restarts'] == 1
+
+        # Earlier failures don't send later batches in-process
+        results = pool.classify(titles("x", 64))
+        assert os.getpid() not in {pid for _, pid in results}
+    finally:
+        pool.close()
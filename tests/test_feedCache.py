@@ -0,0 +1,120 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from feedCache import ValidatorStore
+from feedIngest import FEED_CHANGED, FEED_UNCHANGED, FeedIngestEngine
+
+FEED = b"<rss><channel><item><title>Storm hits coast</title></item></channel></rss>"
+
+
+class FeedServer(ThreadingHTTPServer):
+    """Local stand-in for a feed server, serving one body with an ETag."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FeedHandler)
+        self.body = FEED
+        self.etag = '"v1"'
+        self.honour_validators = True  # False serves 200 every time, like servers without ETag support
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/feed.xml"
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if server.honour_validators and self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', server.etag)
+        self.send_header('Content-Length', str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = FeedServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ValidatorStore(str(tmp_path / "feed_validators.json"))
+
+
+@pytest.fixture
+def engine(store):
+    parsed = []
+
+    def parse_feed(url, body):
+        parsed.append(body)
+        return [{'title': "Storm hits coast", 'link': url}]
+
+    engine = FeedIngestEngine(store, parse_feed, retries=0, timeout=5)
+    engine.parsed = parsed
+    yield engine
+    engine.close()
+
+
+def poll(engine, url):
+    return dict(engine.iter_feeds([url]))[url]
+
+
+def test_second_poll_gets_304(server, store, engine):
+    assert len(poll(engine, server.url)) == 1
+    assert engine.last_status[server.url] == FEED_CHANGED
+    assert 'If-None-Match' not in server.requests[0]
+
+    assert poll(engine, server.url) == []
+    assert engine.last_status[server.url] == FEED_UNCHANGED
+    assert server.requests[1]['If-None-Match'] == '"v1"'
+    assert len(engine.parsed) == 1
+    assert store.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_unchanged_body_is_not_parsed(server, store, engine):
+    server.honour_validators = False
+    poll(engine, server.url)
+    assert poll(engine, server.url) == []
+    assert engine.last_status[server.url] == FEED_UNCHANGED
+    assert len(engine.parsed) == 1
+
+    server.body = FEED.replace(b"Storm", b"Flood")
+    assert len(poll(engine, server.url)) == 1
+    assert len(engine.parsed) == 2
+    assert store.stats()['hits'] == 1
+    assert store.stats()['misses'] == 2
+
+
+def test_validators_saved_once_per_poll(server, store, engine, monkeypatch):
+    saves = []
+    save = store.save
+    monkeypatch.setattr(store, 'save', lambda: saves.append(threading.current_thread()) or save())
+    other = server.url + "?edition=uk"
+    assert len(dict(engine.iter_feeds([server.url, other]))) == 2
+    assert len(saves) == 1
+    assert saves[0] is not engine._thread  # Written off the event loop
+
+    with open(store.file_path) as file:
+        assert set(json.load(file)) == {server.url, other}
+    assert ValidatorStore(store.file_path).request_headers(server.url) == {'If-None-Match': '"v1"'}
+
+    poll(engine, server.url)
+    assert len(saves) == 1  # Nothing changed, nothing written
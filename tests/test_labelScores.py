@@ -0,0 +1,78 @@
+import pytest
+
+from newsScraper import NewsCategorizer
+from retention import DAY, RetentionPolicy
+
+SCORES = {'A': 0.6, 'B': 0.4, 'C': 0.9}
+
+
+class StubBackend:
+    """Classifier stand-in that records which labels it was asked to score."""
+
+    name = "stub"
+    models = ()
+
+    def __init__(self, labels):
+        self.labels = list(labels)
+        self.model_name = "stub"
+        self.scorer = "stub"
+        self.scored = []
+
+    def classify(self, titles):
+        return self.score(titles, self.labels)
+
+    def score(self, titles, labels):
+        self.scored.append((list(titles), list(labels)))
+        ranked = sorted(labels, key=SCORES.get, reverse=True)
+        return [{'sequence': title, 'labels': ranked, 'scores': [SCORES[label] for label in ranked],
+                 'scorer': self.scorer} for title in titles]
+
+
+def article(link, title):
+    return {'link': link, 'title': title, 'source': "site:example.com",
+            'published': "Mon, 13 Jan 2025 10:00:00 GMT", 'published_ts': 1736762400}
+
+
+@pytest.fixture
+def categorizer_factory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    opened = []
+
+    def make(db_path, **kwargs):
+        categorizer = NewsCategorizer(backend=StubBackend(["A", "B"]), db_path=str(tmp_path / db_path),
+                                      embedding_index=False, **kwargs)
+        opened.append(categorizer)
+        return categorizer
+
+    yield make
+    for categorizer in opened:
+        categorizer.close()
+
+
+def test_cache_hit_keeps_scorer_so_taxonomy_update_scores_new_labels_only(categorizer_factory):
+    title = "Central bank raises interest rates to curb inflation"
+    first = categorizer_factory("first.db")
+    first.categorise_articles_with_ai([article("l1", title)])
+    first.close()
+
+    # A fresh store, answered from the classification cache on disk
+    second = categorizer_factory("second.db")
+    second.categorise_articles_with_ai([article("l9", title)])
+    assert second.classifier_backend.scored == []
+    assert second.classification_cache.stats()['disk_hits'] == 1
+    assert second.store.get_scores("l9")[1] == "stub"
+
+    second.update_taxonomy(["A", "B", "C"])
+    assert second.classifier_backend.scored == [([title], ["C"])]
+
+
+def test_taxonomy_update_moves_expiry_with_category(categorizer_factory):
+    categorizer = categorizer_factory("articles.db", retention_policy=RetentionPolicy(default_days=8, category_days={"C": 30}))
+    published_ts = article("l1", "")['published_ts']
+    categorizer.categorise_articles_with_ai([article("l1", "Central bank raises interest rates to curb inflation")])
+    assert categorizer.articles_with_categories["l1"]['category'] == "A"
+    assert categorizer.articles_with_categories["l1"]['expires_at'] == published_ts + 8 * DAY
+
+    categorizer.update_taxonomy(["A", "B", "C"])
+    assert categorizer.articles_with_categories["l1"]['category'] == "C"
+    assert categorizer.articles_with_categories["l1"]['expires_at'] == published_ts + 30 * DAY
@@ -0,0 +1,74 @@
+from newsTree import CategoryTree
+
+
+class FakeTreeview:
+    """The part of ttk.Treeview that CategoryTree uses, without a display."""
+
+    def __init__(self):
+        self.children = {'': []}
+        self.texts = {}
+        self.count = 0
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def focus(self):
+        return ''
+
+    def insert(self, parent, index, text="", values=()):
+        self.count += 1
+        item = f"I{self.count}"
+        self.children[item] = []
+        self.texts[item] = text
+        siblings = self.children[parent]
+        siblings.insert(len(siblings) if index == 'end' else index, item)
+        return item
+
+    def delete(self, item):
+        for child in list(self.children[item]):
+            self.delete(child)
+        for siblings in self.children.values():
+            if item in siblings:
+                siblings.remove(item)
+        del self.children[item]
+
+    def item(self, item, text=None):
+        self.texts[item] = text
+
+    def move(self, item, parent, index):
+        self.children[parent].remove(item)
+        self.children[parent].append(item)
+
+    def titles(self, parent=''):
+        return [(self.texts[item], self.titles(item)) for item in self.children[parent]]
+
+
+def article(link, title, published_ts, story=None):
+    return {'link': link, 'title': title, 'source': "BBC News", 'published_ts': published_ts, 'story': story or link}
+
+
+def test_removing_a_story_head_promotes_its_first_member():
+    tree = FakeTreeview()
+    view = CategoryTree(tree)
+    view.add_sorted("World", [
+        article("l3", "Chad's ruling party wins majority", 300, story="l1"),
+        article("l2", "Floods in Spain", 200),
+        article("l1", "Chad ruling party wins parliamentary majority", 100),
+    ])
+    view.load_page("World")
+    assert tree.titles() == [("World", [
+        ("Floods in Spain", []),
+        ("Chad ruling party wins parliamentary majority", [("Chad's ruling party wins majority", [])]),
+    ])]
+
+    # The surviving member becomes a row of its own, placed by its own date
+    view.remove_links(["l1"])
+    assert tree.titles() == [("World", [
+        ("Chad's ruling party wins majority", []),
+        ("Floods in Spain", []),
+    ])]
+    assert view.links == {"l2", "l3"}
+
+    view.remove_links(["l2", "l3"])
+    assert tree.titles() == [("World", [])]
+    assert view.links == set()
@@ -0,0 +1,79 @@
+import pytest
+
+from searchIndex import SearchIndex, parse_query, tokenize
+
+ARTICLES = [
+    {'link': "l1", 'title': "Президент выступил с обращением", 'source': "RIA", 'category': "Politics",
+     'published_ts': 1736762400},
+    {'link': "l2", 'title': "Floods close roads around Zürich", 'source': '"site:reuters.com" - Google News',
+     'category': "Weather", 'published_ts': 1736766000},
+    {'link': "l3", 'title': "Storm warning for the Scottish coast", 'source': "BBC News",
+     'category': "Weather", 'published_ts': 1736769600, 'description': "Gales expected overnight"},
+]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.add(ARTICLES)
+    return index
+
+
+def links(result):
+    articles, total = result
+    assert total == len(articles)
+    return [article['link'] for article in articles]
+
+
+def test_tokenize_keeps_every_script_and_drops_accents():
+    assert tokenize("Президент России") == ["президент", "россии"]
+    assert tokenize("Zürich, São Paulo") == ["zurich", "sao", "paulo"]
+
+
+def test_parse_query_splits_words_prefix_and_facets():
+    assert parse_query("storm coa source:bbc") == (["storm"], "coa", {'source': "bbc"})
+    assert parse_query("storm source:bbc ") == (["storm"], None, {'source': "bbc"})
+    assert parse_query("storm coa") == (["storm"], "coa", {})
+    assert parse_query("storm ") == (["storm"], None, {})
+
+
+def test_non_latin_words_are_searchable(index):
+    assert links(index.search("Президент ")) == ["l1"]
+    assert links(index.search("прези")) == ["l1"]
+    assert links(index.search("Канцлер ")) == []
+
+
+def test_accented_words_complete_from_plain_letters(index):
+    assert links(index.search("zu")) == ["l2"]
+    assert links(index.search("Zür")) == ["l2"]
+
+
+def test_results_are_newest_first_and_include_descriptions(index):
+    assert links(index.search("")) == ["l3", "l2", "l1"]
+    assert links(index.search("gales ")) == ["l3"]
+    assert links(index.search("storm", limit=1)) == ["l3"]
+
+
+def test_source_facet_matches_any_word_of_the_name(index):
+    assert links(index.search("source:reuters")) == ["l2"]
+    assert links(index.search("source:reuters.com")) == ["l2"]
+    assert links(index.search("source:bbc")) == ["l3"]
+    assert links(index.search("source:news")) == ["l3", "l2"]
+    assert links(index.search("category:weather floods")) == ["l2"]
+
+
+def test_date_facets_slice_the_range(index):
+    assert links(index.search(after=1736766000)) == ["l3", "l2"]
+    assert links(index.search(before=1736766000)) == ["l1"]
+    assert links(index.search("after:2025-01-14")) == []
+
+
+def test_remove_and_update_categories(index):
+    index.remove(["l2"])
+    assert "l2" not in index
+    assert links(index.search("zu")) == []
+    assert index.values('source') == ["BBC News", "RIA"]
+
+    index.update_categories({"l3": "Scotland"})
+    assert links(index.search("category:scotland")) == ["l3"]
+    assert links(index.search("category:weather")) == []
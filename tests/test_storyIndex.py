@@ -0,0 +1,90 @@
+import pytest
+
+from storyIndex import StoryIndex, jaccard, names_differ, normalise_title, shingles
+
+# Reports of one story from different outlets, from classified_articles.json
+SAME_STORY = [
+    ("Los Angeles wildfires devour thousands of homes, death toll rises to 10 - Reuters",
+     "Los Angeles fires: Death toll expected to rise - Reuters"),
+    ("Sudan army says its forces enter Wad Madani in push to retake city from RSF",
+     "Sudanese army advances to retake city of Wad Madani from RSF - Reuters"),
+    ("Sudan army says its forces enter Wad Madani in push to retake city from RSF",
+     "Celebrations in Sudan as army retakes key city of Wad Madani from RSF"),
+    ("Trump prosecutor Jack Smith resigns from Justice Department - Reuters",
+     "Jack Smith, who led Trump prosecutions, leaves US Justice Department"),
+    ("Chad ruling party wins parliamentary majority, provisional results show - Reuters",
+     "Chad's ruling party wins majority in controversial parliamentary election"),
+]
+
+# Headlines sharing most of their words but about different things
+DIFFERENT_STORIES = [
+    ("Earthquake strikes Japan", "Earthquake strikes Turkey"),
+    ("Storm hits Wales", "Storm hits Scotland"),
+    ("Bank of England holds interest rates", "Bank of Japan holds interest rates"),
+]
+
+
+def story_of(first, second):
+    index = StoryIndex()
+    index.add("first", shingles(first))
+    return index.find(shingles(second))
+
+
+@pytest.mark.parametrize("first, second", SAME_STORY)
+def test_reports_of_one_story_are_grouped(first, second):
+    assert story_of(first, second) == "first"
+    assert story_of(second, first) == "first"
+
+
+@pytest.mark.parametrize("first, second", DIFFERENT_STORIES)
+def test_similar_headlines_about_different_things_are_not_grouped(first, second):
+    assert jaccard(shingles(first), shingles(second)) >= 0.4  # Similar enough to have been grouped
+    assert story_of(first, second) is None
+    assert story_of(second, first) is None
+
+
+def test_names_differ_only_for_a_substitution():
+    england = shingles("Bank of England holds interest rates")
+    assert names_differ(england, shingles("Bank of Japan holds interest rates"))
+    # A name only one of the titles mentions is extra detail, not a different story
+    assert not names_differ(england, shingles("Bank of England holds interest rates at 4.75 percent"))
+    # Nothing is a name in a title-case headline
+    assert not names_differ(shingles("Bank Of England Holds Interest Rates"),
+                            shingles("Bank Of Japan Holds Interest Rates"))
+
+
+def test_titles_without_words_never_join_a_story():
+    index = StoryIndex()
+    index.add("first", shingles("!!! ???"))
+    assert shingles("!!! ???") == b""
+    assert index.find(shingles("... !!!")) is None
+
+
+def test_non_latin_titles_are_words():
+    assert normalise_title("Президент России выступил с обращением") == ["президент", "россии", "выступил", "с", "обращением"]
+    index = StoryIndex()
+    index.add("first", shingles("Президент России выступил с обращением к нации"))
+    assert index.find(shingles("Президент России выступил с обращением")) == "first"
+    assert index.find(shingles("東京で大きな地震 被害の情報 相次ぐ 気象庁")) is None
+
+
+def test_source_suffix_is_only_dropped_for_its_source():
+    assert normalise_title("Trump is welcome to visit - but that's it", "site:bbc.co.uk") == \
+        ["trump", "is", "welcome", "to", "visit", "but", "that", "s", "it"]
+    assert normalise_title("Storm hits coast - Reuters", "site:reuters.com") == ["storm", "hits", "coast"]
+
+
+def test_bulk_and_incremental_inserts_agree():
+    titles = [f"Council approves new budget for district {i} schools and roads" for i in range(1500)]
+    bulk = StoryIndex(bulk_size=100)
+    bulk.add_many((f"l{i}", shingles(title), None) for i, title in enumerate(titles))
+    incremental = StoryIndex(bulk_size=100)
+    for i, title in enumerate(titles[:50]):
+        incremental.add(f"l{i}", shingles(title))
+    query = shingles(SAME_STORY[0][0])
+    assert bulk.find(query) is None and incremental.find(query) is None
+    assert bulk.find(shingles(titles[0])) is not None
+
+    bulk.remove([f"l{i}" for i in range(1500)])
+    assert len(bulk) == 0
+    assert bulk.find(shingles(titles[0])) is None